@@ -3,16 +3,40 @@ from flask_cors import CORS
 import firebase_admin
 from firebase_admin import credentials, firestore
 import google.generativeai as genai
-from google.cloud import speech, texttospeech
-import openai
 import base64
 import os
-import numpy as np
-import cv2
-import pytesseract
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, ServiceContext
 from config import AIConfig
-import time
+from services.provider_guard import get_guard, guard_stats, ProviderUnavailable
+from services.audio_cache import AudioCache
+from services.health_service import ProviderHealth
+from services.lazy_import import lazy_import, import_stats
+from services.http_pool import get_session, http_stats
+from services.conversation_context import ConversationContext, count_tokens, truncate_tokens
+from services.ocr_pipeline import OcrPipeline, OcrBusy
+from concurrent.futures.process import BrokenProcessPool
+import threading
+
+# Heavy, modality-specific libraries load on first use (speech here, OpenCV and
+# Tesseract in the OCR workers)
+speech = lazy_import("google.cloud.speech")
+texttospeech = lazy_import("google.cloud.texttospeech")
+
+# ✅ OCR pipeline - Tesseract runs in a bounded pool of worker processes with a
+# result cache in front. The workers are forked here, before anything below
+# starts a thread
+ocr_pipeline = OcrPipeline(
+    workers=AIConfig.OCR_WORKERS,
+    max_pending=AIConfig.OCR_MAX_PENDING,
+    timeout=AIConfig.OCR_TIMEOUT,
+    preprocess=AIConfig.OCR_PREPROCESS,
+    max_side=AIConfig.OCR_MAX_SIDE,
+    tesseract_config=AIConfig.OCR_TESSERACT_CONFIG,
+    cache_entries=AIConfig.OCR_CACHE_ENTRIES,
+    perceptual=AIConfig.OCR_PERCEPTUAL_CACHE,
+    max_distance=AIConfig.OCR_PERCEPTUAL_MAX_DISTANCE
+)
+if AIConfig.OCR_PREFORK:
+    ocr_pipeline.start()
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -47,6 +71,91 @@ def options_handler(path=""):
     # The after_request handler will add the CORS headers
     return resp, 200
 
+# ✅ Provider guards - shared rate limiters and circuit breakers, so a 429 burst
+# fails over or returns a retry-after instead of sleeping in request threads
+gemini_guard = get_guard(
+    "gemini",
+    rate=AIConfig.GEMINI_REQUESTS_PER_MINUTE / 60.0,
+    capacity=AIConfig.PROVIDER_BURST,
+    failure_threshold=AIConfig.PROVIDER_FAILURE_THRESHOLD,
+    recovery_timeout=AIConfig.PROVIDER_RECOVERY_TIMEOUT
+)
+openai_guard = get_guard(
+    "openai",
+    rate=AIConfig.OPENAI_REQUESTS_PER_MINUTE / 60.0,
+    capacity=AIConfig.PROVIDER_BURST,
+    failure_threshold=AIConfig.PROVIDER_FAILURE_THRESHOLD,
+    recovery_timeout=AIConfig.PROVIDER_RECOVERY_TIMEOUT
+)
+tts_guard = get_guard(
+    "google_tts",
+    rate=AIConfig.TTS_REQUESTS_PER_MINUTE / 60.0,
+    capacity=AIConfig.PROVIDER_BURST,
+    failure_threshold=AIConfig.PROVIDER_FAILURE_THRESHOLD,
+    recovery_timeout=AIConfig.PROVIDER_RECOVERY_TIMEOUT
+)
+
+# ✅ Canned phrases - spoken verbatim, so their audio is pre-synthesized at startup
+GREETING_TEXT = "Hi, I'm Mentaura. How can I help you today? What are you interested in learning about?"
+AI_FALLBACK_TEXT = "I'm having trouble generating a response due to technical issues. Please try asking a different question or try again later."
+
+# ✅ Tutor prompt for /api/process_text - split into sections so each request only
+# carries the instructions that apply to it
+TUTOR_PREAMBLE = """You are Mentaura, a personalized AI tutor having a one-on-one conversation with a student.
+Your goal is to EXPLAIN the following topic in a teacher-like way, not just read or state information."""
+
+STYLE_INSTRUCTIONS = """IMPORTANT INSTRUCTIONS:
+1. For simple questions or follow-ups:
+   - Keep responses short and conversational
+   - Acknowledge the student's answer if they provided one
+   - Use phrases like "That's right!", "Good answer!", or "Let me clarify..."
+   - Stay focused on the specific question asked
+2. For concept explanations:
+   - Provide detailed, thorough explanations
+   - Use real-life examples and analogies
+   - Break down complex ideas
+   - Include key points and definitions
+3. Always maintain conversation style:
+   - Use a warm, conversational tone
+   - Add thinking sounds like "hmm", "well", "let me think..."
+   - Acknowledge previous context
+   - End with a relevant follow-up question
+4. Response length guidelines:
+   - Simple questions/follow-ups: 2-3 sentences
+   - Concept explanations: 4-6 sentences
+   - Always be concise and clear"""
+
+CONTINUITY_INSTRUCTIONS = """TOPIC CONTINUITY:
+- When a student asks a follow-up question, ALWAYS stay on the original topic
+- If the student asked about addition, keep explaining addition
+- NEVER switch to a different topic (like baking, cooking, etc.)
+- The student is asking for more information about the SAME topic"""
+
+EXPLAIN_AGAIN_INSTRUCTIONS = """THIS IS AN "EXPLAIN AGAIN" REQUEST:
+- The student did not fully understand your previous explanation
+- Re-explain the SAME topic with more detail or from a different angle, using new examples, analogies and simpler terms
+- NEVER explain or define what "explain again" means, and don't acknowledge the request
+- Don't say "As I mentioned before" or "As I was saying"
+- Start DIRECTLY with the new explanation (e.g. "Let me explain this differently..." or "Another way to understand this is...")"""
+
+TUTOR_CLOSING = """Remember: You are having a PERSONAL CONVERSATION with ONE STUDENT. Be friendly, supportive, and explain things clearly.
+Don't just read information - EXPLAIN it in a way that helps the student truly understand.
+Always maintain conversation continuity by referencing previous context when relevant."""
+
+ALL_INSTRUCTIONS = "\n\n".join([STYLE_INSTRUCTIONS, CONTINUITY_INSTRUCTIONS, EXPLAIN_AGAIN_INSTRUCTIONS])
+
+# ✅ TTS audio cache - content-addressed MP3 blobs, so repeated phrases skip synthesis
+try:
+    audio_cache = AudioCache(AIConfig.AUDIO_CACHE_DIR, AIConfig.AUDIO_CACHE_MAX_BYTES)
+except Exception as e:
+    print(f"Audio cache initialization error: {e}")
+    audio_cache = None
+
+# Voice used for every server-side synthesis in this app
+TTS_VOICE_NAME = "en-US-Neural2-F"
+TTS_SPEAKING_RATE = 0.92  # Slightly slower for better comprehension
+TTS_PITCH = 0.0  # Neutral pitch
+
 # ✅ Initialize Firebase
 try:
     cred = credentials.Certificate("mentaura-75fa0-firebase-adminsdk-fbsvc-e0c852c9ad.json")
@@ -81,37 +190,112 @@ except Exception as e:
     print("Continuing without Gemini...")
     model = None
 
-# ✅ Speech-to-Text & Text-to-Speech
-try:
-    speech_client = speech.SpeechClient()
-    tts_client = texttospeech.TextToSpeechClient()
-    print("Google Speech services initialized successfully")
-except Exception as e:
-    print(f"Google Speech services initialization error: {e}")
-    print("Continuing without speech services...")
-    speech_client = None
-    tts_client = None
+# ✅ Speech-to-Text & Text-to-Speech - created on first use (or by the warm-up thread)
+speech_client = None
+tts_client = None
+speech_clients_ready = False
+speech_clients_lock = threading.Lock()
+
+def init_speech_clients():
+    """Import google.cloud speech and create both clients, once"""
+    global speech_client, tts_client, speech_clients_ready
+    if speech_clients_ready:
+        return
+    with speech_clients_lock:
+        if speech_clients_ready:
+            return
+        try:
+            speech_client = speech.SpeechClient()
+            tts_client = texttospeech.TextToSpeechClient()
+            print("Google Speech services initialized successfully")
+        except Exception as e:
+            print(f"Google Speech services initialization error: {e}")
+            print("Continuing without speech services...")
+        speech_clients_ready = True
+
+if AIConfig.WARM_UP_IMPORTS:
+    threading.Thread(target=init_speech_clients, name="speech-warm-up", daemon=True).start()
 
 # ✅ OpenAI API Setup - Using the new OpenAI API (v1.0+)
 openai_api_key = os.environ.get("OPENAI_API_KEY", "")
 os.environ["OPENAI_API_KEY"] = openai_api_key
 
+# Keep-alive connections for raw REST calls to OpenAI
+openai_http = get_session(
+    "openai",
+    pool_size=AIConfig.HTTP_POOL_SIZE,
+    connect_timeout=AIConfig.HTTP_CONNECT_TIMEOUT,
+    read_timeout=AIConfig.HTTP_READ_TIMEOUT,
+    retries=AIConfig.HTTP_RETRIES,
+    backoff=AIConfig.HTTP_RETRY_BACKOFF
+)
+
 # ✅ Initialize OpenAI client with proper configuration
+# The key is not validated here; the background health probe checks it
 try:
     from openai import OpenAI
-    openai_client = OpenAI(api_key=openai_api_key)
-    # Validate API key with a simple test request
-    test_response = openai_client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": "Hello"}],
-        max_tokens=5
-    )
-    print("OpenAI client initialized successfully")
+    openai_client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+    print("OpenAI client initialized successfully" if openai_client else "OPENAI_API_KEY not set, continuing without OpenAI")
 except Exception as e:
-    print(f"OpenAI API key authentication error: {str(e)}")
-    print("The provided API key appears to be invalid. Using fallback error handling.")
+    print(f"OpenAI initialization error: {str(e)}")
     openai_client = None
 
+# ✅ Conversation context - per-user history kept under a token budget for tutor prompts
+def summarize_conversation(previous_summary, messages):
+    """Fold older messages into the rolling conversation summary with a small model"""
+    if openai_client is None:
+        return None
+    transcript = "\n".join(f"{'Student' if role == 'user' else 'Mentaura'}: {text}" for role, text in messages)
+    response = openai_guard.call(
+        openai_client.chat.completions.create,
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "Update the summary of a tutoring conversation. Keep the topics covered, "
+                                          "what the student struggled with and what was already explained. "
+                                          "Reply with at most five short bullet points."},
+            {"role": "user", "content": f"Summary so far:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"}
+        ],
+        temperature=0.2,
+        max_tokens=AIConfig.CONTEXT_SUMMARY_MAX_TOKENS
+    )
+    return response.choices[0].message.content.strip()
+
+conversation_context = ConversationContext(
+    budget_tokens=AIConfig.CONTEXT_TOKEN_BUDGET,
+    recent_messages=AIConfig.CONTEXT_RECENT_MESSAGES,
+    message_max_tokens=AIConfig.CONTEXT_MESSAGE_MAX_TOKENS,
+    summary_max_tokens=AIConfig.CONTEXT_SUMMARY_MAX_TOKENS,
+    max_users=AIConfig.CONTEXT_MAX_USERS,
+    summarize=summarize_conversation if AIConfig.CONTEXT_SUMMARIZER == "llm" else None
+)
+
+# ✅ Background provider health probes - startup never waits on the network
+def probe_gemini():
+    if model is None:
+        return False
+    genai.get_model(f"models/{AIConfig.GOOGLE_MODEL}")
+    return True
+
+def probe_openai():
+    if openai_client is None:
+        return False
+    openai_client.models.list()
+    return True
+
+def probe_google_tts():
+    init_speech_clients()
+    if tts_client is None:
+        return False
+    tts_client.list_voices(language_code=AIConfig.TTS_LANGUAGE)
+    return True
+
+provider_health = ProviderHealth(interval=AIConfig.HEALTH_PROBE_INTERVAL)
+provider_health.register("gemini", probe_gemini, required=True)
+provider_health.register("openai", probe_openai, required=True)
+provider_health.register("google_tts", probe_google_tts)
+if AIConfig.HEALTH_PROBES_ENABLED:
+    provider_health.start()
+
 # ✅ Health check endpoint
 @app.route("/health", methods=['GET', 'OPTIONS'])
 def health_check():
@@ -127,9 +311,26 @@ def health_check():
             "gemini": model is not None,
             "openai": openai_client is not None,
             "speech": speech_client is not None and tts_client is not None
-        }
+        },
+        "providers": guard_stats(),
+        "provider_health": provider_health.status(),
+        "lazy_imports": import_stats(),
+        "audio_cache": audio_cache.stats() if audio_cache is not None else None,
+        "http": http_stats(),
+        "conversation_context": conversation_context.stats(),
+        "ocr": ocr_pipeline.stats()
     }), 200
 
+# ✅ Readiness endpoint - 503 until an LLM provider has passed its health probe
+@app.route("/ready", methods=['GET'])
+def readiness_check():
+    """Report whether the server can answer AI requests yet"""
+    ready = provider_health.ready() or not AIConfig.HEALTH_PROBES_ENABLED
+    return jsonify({
+        "ready": ready,
+        "providers": provider_health.status()
+    }), 200 if ready else 503
+
 # ✅ Homepage Route (Fix 404)
 @app.route("/")
 def home():
@@ -138,6 +339,12 @@ def home():
 # ✅ Function to process user input (text, image, voice)
 @app.route("/process_input", methods=["POST"])
 def process_input():
+    # Multipart uploads carry the media as raw bytes, skipping base64 entirely
+    if "voice" in request.files:
+        return handle_voice_input(request.files["voice"].read())
+    if "image" in request.files:
+        return handle_image_input(request.files["image"].read())
+    
     data = request.json
     if "text" in data:
         return handle_text_input(data["text"])
@@ -152,7 +359,7 @@ def handle_text_input(user_input):
     # Special handling for greetings
     if user_input.lower().strip() in ["hi", "hello"]:
         # Only generate voice response for greetings without text response
-        greeting_text = "Hi, I'm Mentaura. How can I help you today? What are you interested in learning about?"
+        greeting_text = GREETING_TEXT
         voice_response = generate_speech(greeting_text)
         return jsonify({"text": "", "audio": voice_response, "is_greeting": True})
     
@@ -160,39 +367,22 @@ def handle_text_input(user_input):
         if model is None:
             return jsonify({"text": "Sorry, the AI service is currently unavailable.", "error": "Gemini API not available"})
         
-        # Use retry logic to handle rate limits
-        max_retries = 3
-        current_retry = 0
-        last_error = None
+        # Rate limits are handled by the guard: instead of sleeping we fall
+        # straight through to OpenAI
+        response = gemini_guard.call(model.generate_content, user_input)
+        text_response = response.text
+        voice_response = generate_speech(text_response)
         
-        while current_retry < max_retries:
-            try:
-                response = model.generate_content(user_input)
-                text_response = response.text
-                voice_response = generate_speech(text_response)
-                
-                # Return voice-only response by setting text to empty string
-                return jsonify({"text": "", "audio": voice_response, "voice_only": True})
-            except Exception as e:
-                if "429" in str(e) and current_retry < max_retries - 1:
-                    # This is a rate limit error, let's wait and retry
-                    wait_time = (2 ** current_retry) * 5  # Exponential backoff: 5, 10, 20 seconds
-                    print(f"Rate limit hit, waiting {wait_time} seconds before retry {current_retry + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                    current_retry += 1
-                    last_error = e
-                else:
-                    # Not a rate limit error or final retry failed
-                    raise e
-        
-        # If we've exhausted retries
-        raise last_error
+        # Return voice-only response by setting text to empty string
+        return jsonify({"text": "", "audio": voice_response, "voice_only": True})
     except Exception as e:
         print(f"Error in handle_text_input: {e}")
+        retry_after = e.retry_after if isinstance(e, ProviderUnavailable) else None
         # Try to use OpenAI as fallback
         if openai_client is not None:
             try:
-                openai_response = openai_client.chat.completions.create(
+                openai_response = openai_guard.call(
+                    openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[{"role": "user", "content": user_input}],
                     max_tokens=500
@@ -203,40 +393,59 @@ def handle_text_input(user_input):
                 return jsonify({"text": "", "audio": fallback_voice, "voice_only": True})
             except Exception as openai_err:
                 print(f"OpenAI fallback also failed: {openai_err}")
+                if isinstance(openai_err, ProviderUnavailable):
+                    retry_after = min(retry_after or openai_err.retry_after, openai_err.retry_after)
         
+        if retry_after is not None:
+            return jsonify({
+                "text": "I'm getting a lot of questions right now. Please try again in a moment.",
+                "error": str(e),
+                "retry_after": int(retry_after) + 1
+            })
         return jsonify({"text": f"I'm having trouble processing your request: {str(e)}", "error": str(e)})
 
 # ✅ Function to extract text from an image
-def handle_image_input(image_base64):
-    image_data = base64.b64decode(image_base64)
-    nparr = np.frombuffer(image_data, np.uint8)
-    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    
-    extracted_text = pytesseract.image_to_string(img)
+def handle_image_input(image):
+    # Raw bytes from a multipart upload, or base64 from a JSON body
+    image_data = base64.b64decode(image) if isinstance(image, str) else image
+    try:
+        extracted_text = ocr_pipeline.extract_text(image_data)
+    except (OcrBusy, TimeoutError, BrokenProcessPool) as e:
+        # A full queue, a slow worker or one that crashed: the same image should work on a retry
+        return jsonify({
+            "text": "I'm reading a lot of pictures right now. Please try again in a moment.",
+            "error": str(e),
+            "retry_after": getattr(e, "retry_after", 2)
+        })
+    except ValueError as e:
+        return jsonify({"text": "Sorry, I couldn't open that image. Please try another picture.", "error": str(e)})
     return handle_text_input(extracted_text)
 
+# ✅ Function to transcribe in-memory audio - no temp files, so concurrent requests can't clobber each other
+def transcribe_audio(audio_data):
+    """Run Google Speech-to-Text on LINEAR16 audio bytes; returns "" if nothing was recognized"""
+    audio = speech.RecognitionAudio(content=audio_data)
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        language_code="en-US"
+    )
+    response = speech_client.recognize(config=config, audio=audio)
+    if not response.results:
+        return ""
+    return response.results[0].alternatives[0].transcript
+
 # ✅ Function to process voice input
-def handle_voice_input(audio_base64):
+def handle_voice_input(audio):
+    init_speech_clients()
     if speech_client is None:
         return jsonify({"text": "Sorry, voice recognition is currently unavailable.", "error": "Speech services not available"})
         
     try:
-        audio_data = base64.b64decode(audio_base64)
-        audio_file = "user_audio.wav"
-        
-        with open(audio_file, "wb") as f:
-            f.write(audio_data)
-
-        with open(audio_file, "rb") as f:
-            audio = speech.RecognitionAudio(content=f.read())
-
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            language_code="en-US"
-        )
-
-        response = speech_client.recognize(config=config, audio=audio)
-        text_input = response.results[0].alternatives[0].transcript
+        # Raw bytes from a multipart upload, or base64 from a JSON body
+        audio_data = base64.b64decode(audio) if isinstance(audio, str) else audio
+        text_input = transcribe_audio(audio_data)
+        if not text_input:
+            return jsonify({"text": "Sorry, I couldn't make out what you said. Could you try again?", "error": "No speech recognized"})
         return handle_text_input(text_input)
     except Exception as e:
         print(f"Error in handle_voice_input: {e}")
@@ -246,11 +455,19 @@ def handle_voice_input(audio_base64):
 def generate_speech(text):
     print(f"Generating speech for text of length: {len(text)}")
     
+    cache_key = None
+    if audio_cache is not None:
+        cache_key = audio_cache.make_key(text, TTS_VOICE_NAME, TTS_SPEAKING_RATE, TTS_PITCH, "google")
+        cached_audio = audio_cache.get(cache_key)
+        if cached_audio is not None:
+            return base64.b64encode(cached_audio).decode('utf-8')
+    
     # Try to use the external TTS service first
     try:
         # If TTS client isn't available, try initializing it again
         global tts_client
         
+        init_speech_clients()
         if tts_client is None:
             # Try initializing with Firebase credentials
             try:
@@ -269,42 +486,30 @@ def generate_speech(text):
         # Build the voice request
         voice = texttospeech.VoiceSelectionParams(
             language_code="en-US",
-            name="en-US-Neural2-F",
+            name=TTS_VOICE_NAME,
             ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
         )
         
         # Select the type of audio file
         audio_config = texttospeech.AudioConfig(
             audio_encoding=texttospeech.AudioEncoding.MP3,
-            speaking_rate=0.92,  # Slightly slower for better comprehension
-            pitch=0.0,  # Neutral pitch
+            speaking_rate=TTS_SPEAKING_RATE,
+            pitch=TTS_PITCH,
             volume_gain_db=0.0  # Default volume
         )
         
-        # Implement retry logic for TTS
-        max_retries = 3
-        current_retry = 0
+        # Perform the text-to-speech request; when Google TTS is throttled the
+        # guard fails fast and the client-side TTS fallback below takes over
+        response = tts_guard.call(
+            tts_client.synthesize_speech,
+            input=synthesis_input, voice=voice, audio_config=audio_config
+        )
         
-        while current_retry < max_retries:
-            try:
-                # Perform the text-to-speech request
-                response = tts_client.synthesize_speech(
-                    input=synthesis_input, voice=voice, audio_config=audio_config
-                )
-                
-                # Return the audio content as base64
-                return base64.b64encode(response.audio_content).decode('utf-8')
-            except Exception as e:
-                # Check if it's a rate limit or quota error
-                if "429" in str(e) and current_retry < max_retries - 1:
-                    wait_time = (2 ** current_retry) * 3  # Exponential backoff
-                    print(f"TTS rate limit hit, waiting {wait_time} seconds before retry {current_retry + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                    current_retry += 1
-                else:
-                    # Not a rate limit or final retry failed
-                    raise e
-                    
+        if cache_key is not None:
+            audio_cache.put(cache_key, response.audio_content)
+        
+        # Return the audio content as base64
+        return base64.b64encode(response.audio_content).decode('utf-8')
     except Exception as e:
         print(f"Error in generate_speech: {str(e)}")
         # Return a special flag to indicate client-side speech synthesis should be used
@@ -316,6 +521,16 @@ def generate_speech(text):
             "pitch": 1.0   # Neutral pitch
         }
 
+# ✅ Pre-warm the audio cache with canned phrases in the background
+def prewarm_audio_cache():
+    if audio_cache is None:
+        return
+    for phrase in (GREETING_TEXT, AI_FALLBACK_TEXT):
+        generate_speech(phrase)
+    print(f"Audio cache pre-warmed: {audio_cache.stats()}")
+
+threading.Thread(target=prewarm_audio_cache, name="audio-cache-prewarm", daemon=True).start()
+
 # ✅ Function to generate practice questions
 @app.route("/practice_questions", methods=["POST"])
 def practice_questions():
@@ -330,7 +545,7 @@ def practice_questions():
         if model is not None:
             try:
                 prompt = f"Generate 5 practice questions about {topic}. Format each question as a numbered list."
-                response = model.generate_content(prompt)
+                response = gemini_guard.call(model.generate_content, prompt)
                 questions = response.text
                 
                 # Validate response
@@ -345,7 +560,8 @@ def practice_questions():
         # Try to use OpenAI as fallback
         if openai_client is not None:
             try:
-                openai_response = openai_client.chat.completions.create(
+                openai_response = openai_guard.call(
+                    openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a helpful assistant that generates practice questions."},
@@ -394,7 +610,7 @@ def new_topic():
         if model is not None:
             try:
                 prompt = f"Based on an interest in '{topic}', suggest one related topic that a person might want to learn about next. Respond with just the name of the topic, no additional text."
-                response = model.generate_content(prompt)
+                response = gemini_guard.call(model.generate_content, prompt)
                 new_topic = response.text.strip()
                 
                 # Validate response
@@ -409,7 +625,8 @@ def new_topic():
         # Try to use OpenAI as fallback
         if openai_client is not None:
             try:
-                openai_response = openai_client.chat.completions.create(
+                openai_response = openai_guard.call(
+                    openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a helpful assistant that suggests related topics."},
@@ -509,9 +726,8 @@ def generate_time_lapse():
     prompt = data["text"]
     
     try:
-        # Use the legacy/direct approach without client
-        import requests
-        response = requests.post(
+        # Use the legacy/direct approach without client, over the pooled session
+        response = openai_http.post(
             "https://api.openai.com/v1/images/generations",
             headers={
                 "Content-Type": "application/json",
@@ -547,7 +763,7 @@ def generate_ai_response(text, user_id, context=None):
             try:
                 prompt = f"""You are Mentaura, a personalized AI tutor. 
                 Answer the following question or request in a teacher-like way: {text}"""
-                response = model.generate_content(prompt)
+                response = gemini_guard.call(model.generate_content, prompt)
                 return response.text
             except Exception as e:
                 print(f"Error using Gemini for response: {str(e)}")
@@ -556,7 +772,8 @@ def generate_ai_response(text, user_id, context=None):
         # Use OpenAI as fallback
         if openai_client is not None:
             try:
-                response = openai_client.chat.completions.create(
+                response = openai_guard.call(
+                    openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are Mentaura, a personalized AI tutor."},
@@ -571,7 +788,7 @@ def generate_ai_response(text, user_id, context=None):
                 # If both APIs fail, use a generic fallback response
                 
         # Ultimate fallback if all APIs fail
-        return f"I'm having trouble generating a response due to technical issues. Please try asking a different question or try again later."
+        return AI_FALLBACK_TEXT
     except Exception as e:
         print(f"Error in generate_ai_response: {str(e)}")
         return f"I'm having trouble generating a response. {str(e)}"
@@ -645,33 +862,15 @@ def generate_structured_notes(text, topic):
             Keep the notes concise, clear, and visually organized.
             """
             
-            # Generate the notes with retry logic
-            max_retries = 2
-            current_retry = 0
-            last_error = None
-            
-            while current_retry <= max_retries:
-                try:
-                    # Generate the notes
-                    notes_response = model.generate_content(notes_prompt)
-                    notes_text = notes_response.text
-                    return notes_text
-                except Exception as e:
-                    error_str = str(e)
-                    if "429" in error_str and current_retry < max_retries:
-                        # Rate limit error, apply exponential backoff
-                        wait_time = (2 ** current_retry) * 2  # 2, 4 seconds (shorter for notes)
-                        print(f"Rate limit hit in notes generation, waiting {wait_time}s before retry {current_retry+1}/{max_retries}")
-                        time.sleep(wait_time)
-                        current_retry += 1
-                        last_error = e
-                    else:
-                        # Other error or final retry, fall back to OpenAI
-                        print(f"Error generating structured notes: {error_str}")
-                        # Break out to fallback
-                        break
+            # Generate the notes
+            try:
+                notes_response = gemini_guard.call(model.generate_content, notes_prompt)
+                notes_text = notes_response.text
+                return notes_text
+            except Exception as e:
+                # Rate limited, circuit open or other error: fall back to OpenAI
+                print(f"Error generating structured notes: {str(e)}")
             
-            # If we're here, either we exceeded retries or had non-rate-limit error
             # Fall back to OpenAI
             print("Falling back to OpenAI for structured notes generation")
             
@@ -693,7 +892,8 @@ def generate_structured_notes(text, topic):
             
             try:
                 # Using the OpenAI client instead of the legacy API
-                response = openai_client.chat.completions.create(
+                response = openai_guard.call(
+                    openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are an educational assistant creating structured notes for students."},
@@ -757,7 +957,7 @@ def api_process_text():
         # Check if this is a greeting message
         if isGreeting:
             # For greeting, return a voice-only response
-            greeting_text = "Hi, I'm Mentaura. How can I help you today? What are you interested in learning about?"
+            greeting_text = GREETING_TEXT
             voice_response = generate_speech(greeting_text)
             
             # Check if we're using client-side TTS
@@ -795,29 +995,20 @@ def api_process_text():
         # Process with Gemini if available, fall back to OpenAI
         response_text = None
         
-        # Build context string with more detailed conversation history
+        # Conversation history under a token budget: rolling summary plus the last few turns
         recent_messages = data.get('context', {}).get('recentMessages', [])
         topics = data.get('context', {}).get('topics', [])
         current_topic = data.get('context', {}).get('currentTopic', '')
         previous_topic = data.get('context', {}).get('previousTopic', '')
+        window = conversation_context.build(user_id, recent_messages, text)
         
         print(f"Current topic from context: '{current_topic}'")
-        print(f"Recent messages count: {len(recent_messages)}")
-        
-        context_str = ""
-        if recent_messages:
-            context_str += "Previous conversation:\n"
-            for msg in recent_messages[-5:]:  # Last 5 messages for better context
-                role = msg.get('role', 'user')
-                msg_text = msg.get('text', '')
-                # Add role-specific context markers
-                if role == 'user':
-                    context_str += f"Student: {msg_text}\n"
-                else:
-                    context_str += f"Mentaura: {msg_text}\n"
+        print(f"Conversation context: {len(window.messages)} messages, {window.tokens} tokens")
+        
+        context_str = window.render()
         
         if topics:
-            context_str += f"\nCurrent topics: {', '.join(topics)}\n"
+            context_str += f"\nCurrent topics: {', '.join(topics[-AIConfig.CONTEXT_MAX_TOPICS:])}\n"
         
         if current_topic:
             context_str += f"\nCurrent topic being discussed: {current_topic}\n"
@@ -827,9 +1018,9 @@ def api_process_text():
             print("Handling 'explain again' request")
             # Find the last AI message for reference
             last_ai_message = None
-            for msg in reversed(recent_messages):
-                if msg.get('role') == 'ai':
-                    last_ai_message = msg.get('text', '')
+            for role, msg_text in reversed(window.messages):
+                if role == 'ai':
+                    last_ai_message = msg_text
                     print(f"Found last AI message: {last_ai_message[:50]}...")
                     break
             
@@ -875,17 +1066,9 @@ def api_process_text():
                             topic_to_explain = first_sentence
                             print(f"Using first sentence as topic: {topic_to_explain}")
                 
-                # Focus on providing a new explanation of the SAME topic
+                # The instructions for re-explaining are in EXPLAIN_AGAIN_INSTRUCTIONS
                 context_str += f"\nThis is an 'explain again' request. The topic to re-explain is: {topic_to_explain}\n"
-                context_str += "CRITICAL INSTRUCTION: DO NOT explain what 'explain again' means. Instead, re-explain the previous concept with more detail or from a different angle.\n"
-                context_str += "CRITICAL INSTRUCTION: You must ONLY explain the topic specified. DO NOT switch topics or explain what 'explain again' means.\n"
-                context_str += "CRITICAL INSTRUCTION: The user is asking you to explain the SAME topic again, but differently.\n"
-                context_str += "CRITICAL INSTRUCTION: NEVER start your response with 'explain again means'. ALWAYS start directly with the re-explanation.\n"
-                context_str += f"CRITICAL INSTRUCTION: You must CONTINUE explaining {topic_to_explain}. The user wants to learn MORE about this SAME topic.\n"
-                context_str += f"Your previous explanation was: {last_ai_message}\n"
-                context_str += "Now provide a NEW explanation of the SAME topic, using different examples or a different approach.\n"
-                context_str += "Start your explanation directly without any meta-commentary about 'explain again'.\n"
-                context_str += "Begin your response with a phrase like 'Let me explain this differently...' or 'Another way to understand this is...'\n"
+                context_str += f"Your previous explanation was: {truncate_tokens(last_ai_message, AIConfig.CONTEXT_MESSAGE_MAX_TOKENS)}\n"
                 
                 # Also store these in the context
                 data['context']['currentTopic'] = topic_to_explain
@@ -898,137 +1081,41 @@ def api_process_text():
             print("Handling follow-up request")
             context_str += "\nThis is a follow-up request. Please maintain continuity with the previous conversation.\n"
             
-            # Find the last AI message for reference
-            last_ai_message = None
-            for msg in reversed(recent_messages):
-                if msg.get('role') == 'ai':
-                    last_ai_message = msg.get('text', '')
-                    break
-            
-            # Also check context for last response
-            if not last_ai_message and data.get('context', {}).get('lastResponse'):
-                last_ai_message = data.get('context', {}).get('lastResponse')
-            
-            if last_ai_message:
+            # The last response is usually already in the window; only add it when it isn't
+            if not any(role == 'ai' for role, _ in window.messages) and data.get('context', {}).get('lastResponse'):
+                last_ai_message = truncate_tokens(data['context']['lastResponse'], AIConfig.CONTEXT_MESSAGE_MAX_TOKENS)
                 context_str += f"\nYour last response was: {last_ai_message}\n"
         
-        # Build the context string with very explicit explain again handling
-        context_string = ""
-        if 'context' in data and data['context']:
-            context_data = data['context']
-            
-            # Add critical section for explain again handling
-            if isExplainAgain:
-                context_string += "\n\nCRITICAL INSTRUCTION FOR EXPLAIN AGAIN REQUEST:\n"
-                context_string += "The student has specifically asked you to explain the topic again. This means:\n"
-                context_string += "1. They did not understand your previous explanation\n"
-                context_string += "2. You MUST re-explain the SAME topic you were just discussing\n"
-                context_string += "3. Use different words, simpler terms, and more examples\n"
-                context_string += "4. Do NOT acknowledge the 'explain again' request - just start your explanation directly\n"
-                context_string += "5. Do NOT say phrases like 'As I mentioned before' or 'As I was saying'\n"
-                context_string += "6. Start with phrases like 'Let me explain it differently:' or 'Here's another way to think about it:'\n\n"
-                
-                app.logger.info("CRITICAL: Added explicit 'explain again' instructions to context")
-        
-        # Create the prompt with enhanced context handling
-        prompt = f"""You are Mentaura, a personalized AI tutor having a one-on-one conversation with a student. 
-        Your goal is to EXPLAIN the following topic in a teacher-like way, not just read or state information.
-        
-        {context_str}
-        
-        IMPORTANT INSTRUCTIONS:
-        1. For "explain again" requests:
-           - DO NOT EXPLAIN WHAT "EXPLAIN AGAIN" MEANS
-           - Instead, re-explain the previous concept with more detail or from a different angle
-           - Reference your previous explanation and build upon it
-           - Use new examples or analogies if possible
-           - STAY FOCUSED ON THE SAME TOPIC - do not switch to a different topic
-           - NEVER respond with anything about what "explain again" means
-           - Always provide a complete new explanation of the original topic
-           - NEVER start with "Explain again means..." or any variation of defining the phrase
-           - Start DIRECTLY with your new explanation (e.g., "Let's look at this concept differently...")
-        
-        2. For simple questions or follow-ups:
-           - Keep responses short and conversational
-           - Acknowledge the student's answer if they provided one
-           - Use phrases like "That's right!", "Good answer!", or "Let me clarify..."
-           - Stay focused on the specific question asked
-           - NEVER switch to a different topic - stay on the original topic
-        
-        3. For concept explanations:
-           - Provide detailed, thorough explanations
-           - Use real-life examples and analogies
-           - Break down complex ideas
-           - Include key points and definitions
-        
-        4. Always maintain conversation style:
-           - Use a warm, conversational tone
-           - Add thinking sounds like "hmm", "well", "let me think..."
-           - Acknowledge previous context
-           - End with a relevant follow-up question
-        
-        5. Response length guidelines:
-           - Simple questions/follow-ups: 2-3 sentences
-           - Concept explanations: 4-6 sentences
-           - Always be concise and clear
-        
-        6. CRITICAL: Topic Continuity
-           - When a student asks a follow-up question, ALWAYS stay on the original topic
-           - If asked to "explain again", you must ONLY explain the original topic differently
-           - If the student asked about addition, keep explaining addition
-           - If the student asked about subtraction, keep explaining subtraction
-           - NEVER switch to a different topic (like baking, cooking, etc.)
-           - NEVER explain what "explain again" means - just explain the subject again
-           - The student is asking for more information about the SAME topic
-           
-        7. FOR "EXPLAIN AGAIN" REQUESTS:
-           - NEVER DEFINE THE PHRASE "EXPLAIN AGAIN"
-           - Always start your response with a direct explanation like "Let me try a different approach..." 
-           - or "Here's another way to understand..."
-           - DO NOT START with "Explain again means..." or any similar phrasing
-           - ONLY explain the original topic, nothing else
-        
-        Remember: You are having a PERSONAL CONVERSATION with ONE STUDENT. Be friendly, supportive, and explain things clearly.
-        Don't just read information - EXPLAIN it in a way that helps the student truly understand.
-        Always maintain conversation continuity by referencing previous context when relevant.
-        
-        Topic to explain: {text}"""
+        # Only the instruction sections that apply to this kind of request
+        instructions = [STYLE_INSTRUCTIONS]
+        if isExplainAgain or isFollowUp:
+            instructions.append(CONTINUITY_INSTRUCTIONS)
+        if isExplainAgain:
+            instructions.append(EXPLAIN_AGAIN_INSTRUCTIONS)
+        instructions = "\n\n".join(instructions)
+        
+        prompt = f"""{TUTOR_PREAMBLE}
+
+{context_str}
+{instructions}
+
+{TUTOR_CLOSING}
+
+Topic to explain: {text}"""
+        
+        context_report = conversation_context.report(
+            window, count_tokens(prompt),
+            instruction_tokens_saved=count_tokens(ALL_INSTRUCTIONS) - count_tokens(instructions)
+        )
+        app.logger.info(f"Prompt tokens: {context_report['promptTokens']} ({context_report['savedTokens']} saved)")
         
         # Try with Gemini first, fall back to OpenAI on error
         if model is not None:
             try:
                 print(f"Sending prompt to Gemini (length: {len(prompt)})")
-                
-                # Implement retry logic for rate limits
-                max_retries = 3
-                current_retry = 0
-                last_error = None
-                
-                while current_retry < max_retries:
-                    try:
-                        response = model.generate_content(prompt)
-                        response_text = response.text
-                        print(f"Generated response with Gemini (length: {len(response_text)})")
-                        break  # Success, exit retry loop
-                    except Exception as e:
-                        error_str = str(e)
-                        print(f"Error with Gemini API (attempt {current_retry+1}/{max_retries}): {error_str}")
-                        
-                        if "429" in error_str and current_retry < max_retries - 1:
-                            # Rate limit error, apply exponential backoff
-                            wait_time = (2 ** current_retry) * 5  # 5, 10, 20 seconds
-                            print(f"Rate limit hit, waiting {wait_time} seconds before retry")
-                            time.sleep(wait_time)
-                            current_retry += 1
-                            last_error = e
-                        else:
-                            # Other error or final retry, fall back to OpenAI
-                            print(f"Error using Gemini for response: {error_str}")
-                            print("Falling back to OpenAI for response generation")
-                            response_text = generate_ai_response(text, user_id, data.get('context', {}))
-                            print(f"Generated fallback response with OpenAI (length: {len(response_text) if response_text else 0})")
-                            break  # Exit retry loop
-                
+                response = gemini_guard.call(model.generate_content, prompt)
+                response_text = response.text
+                print(f"Generated response with Gemini (length: {len(response_text)})")
             except Exception as e:
                 print(f"Error with Gemini API: {str(e)}")
                 print("Falling back to OpenAI for response generation")
@@ -1055,10 +1142,14 @@ def api_process_text():
         if not text.lower().strip() in ["hi", "hello"]:
             structured_notes = generate_structured_notes(text, topic_for_notes)
         
+        if response_text != AI_FALLBACK_TEXT:
+            conversation_context.record(user_id, text, response_text)
+        
         # Prepare response
         response = {
             "text": response_text,
-            "isOnline": True
+            "isOnline": True,
+            "context": context_report
         }
         
         # If structured notes were generated, add them to the response
@@ -1124,36 +1215,28 @@ def api_process_voice():
         return options_handler()
     
     try:
-        data = request.get_json()
-        audio = data.get("audio")
-        user_id = data.get("userId", "guest")
+        # Accept a multipart 'audio' file part (raw bytes) or JSON with base64 audio
+        upload = request.files.get("audio")
+        if upload is not None:
+            audio_data = upload.read()
+            user_id = request.form.get("userId", "guest")
+        else:
+            data = request.get_json()
+            audio = data.get("audio")
+            user_id = data.get("userId", "guest")
+            # Decode base64 audio straight into memory
+            audio_data = base64.b64decode(audio) if audio else None
         
-        if not audio:
+        if not audio_data:
             return jsonify({"error": "No audio data provided"}), 400
         
-        # Decode base64 audio
-        audio_data = base64.b64decode(audio)
-        audio_file = "temp_voice_input.wav"
-        
-        with open(audio_file, "wb") as f:
-            f.write(audio_data)
-        
         # Process audio to text
         transcribed_text = ""
         
+        init_speech_clients()
         if speech_client:
             # Use Google Speech-to-Text
-            with open(audio_file, "rb") as f:
-                audio = speech.RecognitionAudio(content=f.read())
-            
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-                language_code="en-US"
-            )
-            
-            response = speech_client.recognize(config=config, audio=audio)
-            if response.results:
-                transcribed_text = response.results[0].alternatives[0].transcript
+            transcribed_text = transcribe_audio(audio_data)
         else:
             # Fallback for testing
             transcribed_text = "What is a dataset"
@@ -1163,7 +1246,7 @@ def api_process_voice():
         
         if isGreeting:
             # For greeting, return a voice-only response
-            greeting_text = "Hi, I'm Mentaura. How can I help you today? What are you interested in learning about?"
+            greeting_text = GREETING_TEXT
             voice_response = generate_speech(greeting_text)
             
             # Check if we're using client-side TTS
@@ -1190,7 +1273,7 @@ def api_process_voice():
         if model is not None:
             try:
                 prompt = f"""As Mentaura, the AI tutor, explain this concept in a teacher-like way: {transcribed_text}"""
-                response = model.generate_content(prompt)
+                response = gemini_guard.call(model.generate_content, prompt)
                 response_text = response.text
             except Exception as e:
                 print(f"Error with Gemini API: {str(e)}")
@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify, session, make_response
+from flask import Flask, request, jsonify, session, make_response, Response, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO
 import os
 from dotenv import load_dotenv
 import logging
-from services.ai_service import AIService
-from services.speech_service import SpeechService
+import threading
+from datetime import datetime
+from services.ai_service import setup_ai_models, openai_guard
+from services.provider_guard import ProviderUnavailable, guard_stats
+from services.speech_service import setup_speech_services, transcription_failed
+from services.health_service import ProviderHealth
+from services.lazy_import import import_stats
+from services.async_runtime import run_async, runtime_stats
+from services.http_pool import http_stats
+from config import ProviderConfig
+from utils import detect_emotion, read_media_request
 import json
+import base64
 
 # Load environment variables
 load_dotenv()
@@ -51,46 +61,28 @@ services_loaded = False
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('mentaura')
 
-# Initialize services
-ai_service = AIService()
-speech_service = SpeechService()
+# Initialize services - one shared instance of each, reused by every route module
+ai_service = setup_ai_models()
+speech_service = setup_speech_services()
 
-# ✅ OpenAI API Setup - Using the new OpenAI API (v1.0+)
-try:
-    openai_api_key = os.environ.get("OPENAI_API_KEY")
-    if not openai_api_key:
-        logger.warning("OPENAI_API_KEY not found in environment variables")
-        openai_client = None
-    else:
-        # Initialize OpenAI client with proper configuration
-        from openai import OpenAI
-        from openai import BadRequestError, AuthenticationError, RateLimitError
-        
-        # Validate API key format before initializing client
-        if openai_api_key.startswith('sk-') and len(openai_api_key) > 20:
-            openai_client = OpenAI(api_key=openai_api_key)
-            # Test the API key with a minimal request
-            try:
-                # Simple models.list request to verify API key works
-                openai_client.models.list(limit=1)
-                logger.info("OpenAI client initialized and API key validated successfully")
-            except AuthenticationError as auth_err:
-                logger.error(f"OpenAI API key authentication error: {auth_err}")
-                openai_client = None
-            except RateLimitError as rate_err:
-                logger.warning(f"OpenAI API rate limit error during initialization: {rate_err}")
-                # Still initialize the client, we'll handle rate limits during requests
-        else:
-            logger.error("Invalid OpenAI API key format")
-            openai_client = None
-except Exception as e:
-    logger.error(f"Error initializing OpenAI: {e}")
-    openai_client = None
+def prewarm_speech_cache():
+    """Synthesize the canned greeting and fallback phrases ahead of the first request"""
+    try:
+        warmed = run_async(speech_service.prewarm_audio_cache())
+        logger.info(f"Pre-warmed audio cache with {warmed} phrases")
+    except Exception as e:
+        logger.error(f"Error pre-warming audio cache: {e}")
+
+threading.Thread(target=prewarm_speech_cache, name='audio-cache-prewarm', daemon=True).start()
 
 # Add rate limit handling with proper error response
 def handle_rate_limit(api_call_func, *args, **kwargs):
     """
-    Handle rate limit errors with exponential backoff
+    Run an OpenAI call through the shared provider guard without blocking
+    
+    Rate limits are never waited out in the request thread. When OpenAI is
+    throttling us, or the circuit is open, the caller gets a retry_after
+    immediately instead.
     
     Args:
         api_call_func: The API call function to execute
@@ -99,62 +91,53 @@ def handle_rate_limit(api_call_func, *args, **kwargs):
     Returns:
         API response or error information dictionary
     """
-    import time
     from openai import RateLimitError, AuthenticationError, BadRequestError
     
-    retry_delay = 30  # Start with 30 seconds
-    max_retries = 3
-    
-    for attempt in range(max_retries):
-        try:
-            # Execute the API call function
-            return api_call_func(*args, **kwargs)
-        except RateLimitError as e:
-            error_msg = f"Rate limit hit, waiting {retry_delay} seconds before retry {attempt + 1}/{max_retries}"
-            logger.warning(error_msg)
-            
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                retry_delay *= 2  # Exponential backoff
-            else:
-                return {
-                    "error": True,
-                    "error_type": "rate_limit",
-                    "message": str(e),
-                    "retry_after": retry_delay,
-                    "code": 429
-                }
-        except AuthenticationError as e:
-            logger.error(f"Authentication error: {e}")
-            return {
-                "error": True,
-                "error_type": "authentication",
-                "message": str(e),
-                "code": 401
-            }
-        except BadRequestError as e:
-            logger.error(f"Bad request error: {e}")
-            return {
-                "error": True,
-                "error_type": "bad_request",
-                "message": str(e),
-                "code": 400
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return {
-                "error": True,
-                "error_type": "unexpected",
-                "message": str(e),
-                "code": 500
-            }
-    
-    return {
-        "error": True,
-        "error_type": "max_retries",
-        "message": "Maximum retries exceeded",
-        "code": 429
-    }
+    try:
+        # Execute the API call function
+        return openai_guard.call(api_call_func, *args, **kwargs)
+    except ProviderUnavailable as e:
+        logger.warning(str(e))
+        return {
+            "error": True,
+            "error_type": "rate_limit" if e.reason == "rate_limited" else "unavailable",
+            "message": str(e),
+            "retry_after": int(e.retry_after) + 1,
+            "code": 429 if e.reason == "rate_limited" else 503
+        }
+    except RateLimitError as e:
+        logger.warning(f"Rate limit hit: {e}")
+        return {
+            "error": True,
+            "error_type": "rate_limit",
+            "message": str(e),
+            "retry_after": int(openai_guard.breaker.retry_after()) + 1,
+            "code": 429
+        }
+    except AuthenticationError as e:
+        logger.error(f"Authentication error: {e}")
+        return {
+            "error": True,
+            "error_type": "authentication",
+            "message": str(e),
+            "code": 401
+        }
+    except BadRequestError as e:
+        logger.error(f"Bad request error: {e}")
+        return {
+            "error": True,
+            "error_type": "bad_request",
+            "message": str(e),
+            "code": 400
+        }
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return {
+            "error": True,
+            "error_type": "unexpected",
+            "message": str(e),
+            "code": 500
+        }
 
 # Special route for root path OPTIONS requests
 @app.route('/', methods=['OPTIONS'])
@@ -181,8 +164,6 @@ def load_services():
     # Import service modules
     try:
         from services.auth_service import init_firebase
-        from services.ai_service import setup_ai_models
-        from services.speech_service import setup_speech_services
 
         # Import route modules
         from routes.auth_routes import auth_bp
@@ -195,18 +176,6 @@ def load_services():
             db = init_firebase()
         except Exception as e:
             print(f"Firebase initialization error: {e}")
-            
-        # Setup AI models
-        try:
-            ai_models = setup_ai_models()
-        except Exception as e:
-            print(f"AI model setup error: {e}")
-            
-        # Setup Speech Services
-        try:
-            speech_services = setup_speech_services()
-        except Exception as e:
-            print(f"Speech service setup error: {e}")
 
         # Register blueprints
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -221,6 +190,23 @@ def load_services():
 # Call load_services() to initialize everything when the app starts
 load_services()
 
+# Provider reachability is checked in the background so startup never waits on the network
+provider_health = ProviderHealth(interval=ProviderConfig.HEALTH_PROBE_INTERVAL)
+provider_health.register("gemini", ai_service.probe_gemini, required=True)
+provider_health.register("openai", ai_service.probe_openai, required=True)
+provider_health.register("google_tts", speech_service.probe_google_tts)
+provider_health.register("edge_tts", speech_service.probe_edge_tts)
+if ProviderConfig.HEALTH_PROBES_ENABLED:
+    provider_health.start()
+
+def book_search_stats():
+    # The learning blueprint (and its search cache) loads with the other routes
+    try:
+        from routes.learning_routes import book_search
+        return book_search.stats()
+    except Exception:
+        return None
+
 # Health check endpoint
 @app.route("/health", methods=['GET', 'OPTIONS'])
 def health_check():
@@ -239,10 +225,42 @@ def health_check():
     response = jsonify({
         "status": "ok", 
         "version": "1.0.0",
-        "services_loaded": services_loaded
+        "services_loaded": services_loaded,
+        "cache": {
+            "responses": ai_service.response_cache.stats() if ai_service.response_cache else None,
+            "audio": speech_service.audio_cache.stats() if speech_service.audio_cache else None,
+            "books": book_search_stats(),
+            "questions": ai_service.question_bank.stats() if ai_service.question_bank else None,
+            "semantic": ai_service.semantic_cache.stats() if ai_service.semantic_cache else None
+        },
+        "providers": guard_stats(),
+        "provider_health": provider_health.status(),
+        "lazy_imports": import_stats(),
+        "llm_flights": ai_service.flights.stats() if ai_service.flights else None,
+        "rag": ai_service.rag_engine.stats() if ai_service.rag_engine else None,
+        "async_runtime": runtime_stats(),
+        "http": http_stats(),
+        "transcoder": speech_service.transcoder.stats()
     })
     return response, 200
 
+# Readiness endpoint for load balancers and orchestrators
+@app.route("/ready", methods=['GET'])
+def readiness_check():
+    """
+    Report whether the server can answer AI requests yet
+    
+    Returns 503 until the routes are registered and at least one LLM
+    provider has passed its background health probe.
+    """
+    ready = services_loaded and (provider_health.ready() or not ProviderConfig.HEALTH_PROBES_ENABLED)
+    response = jsonify({
+        "ready": ready,
+        "services_loaded": services_loaded,
+        "providers": provider_health.status()
+    })
+    return response, 200 if ready else 503
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(e):
@@ -268,13 +286,273 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
+    close_voice_streams(request.sid)
 
 @socketio.on('message')
 def handle_message(data):
-    # Process message and emit response
+    """Treat plain messages carrying text as streaming text requests"""
     print(f"Received message: {data}")
-    # You can call your AI service here and emit the response
-    # socketio.emit('response', response_data)
+    if isinstance(data, str):
+        data = {'text': data}
+    if isinstance(data, dict) and data.get('text'):
+        socketio.start_background_task(stream_text_response, request.sid, data)
+
+@socketio.on('process_text')
+def handle_process_text(data):
+    """Streaming counterpart of /api/ai/process-text
+
+    Emits ai_stream_start, one ai_stream_chunk per model chunk and a final
+    ai_stream_done carrying the full text, emotion and optional notes.
+    """
+    socketio.start_background_task(stream_text_response, request.sid, data or {})
+
+def stream_text_response(sid, data):
+    """Forward model chunks to a single client as they are generated"""
+    request_id = data.get('requestId')
+    text = data.get('text', '')
+    user_id = data.get('uid') or data.get('userId')
+    settings = data.get('settings')
+    image = data.get('image')
+    
+    if not text:
+        socketio.emit('ai_stream_error', {'requestId': request_id, 'error': 'Text input is required'}, to=sid)
+        return
+    
+    logger.info(f"Streaming text request for user {user_id or 'anonymous'}: {text[:30]}...")
+    socketio.emit('ai_stream_start', {'requestId': request_id}, to=sid)
+    
+    chunks = []
+    try:
+        chunk_stream = ai_service.stream_gemini(
+            text,
+            image=image,
+            user_settings=settings,
+            use_cache=not data.get('noCache', False),
+            image_mime_type=data.get('imageMimeType'),
+            semantic=True
+        )
+        for index, chunk in enumerate(chunk_stream):
+            chunks.append(chunk)
+            socketio.emit('ai_stream_chunk', {
+                'requestId': request_id,
+                'index': index,
+                'text': chunk
+            }, to=sid)
+    except Exception as e:
+        logger.error(f"Error in stream_text_response: {str(e)}")
+        socketio.emit('ai_stream_error', {'requestId': request_id, 'error': str(e)}, to=sid)
+        return
+    
+    response_text = ''.join(chunks)
+    response = build_text_response(
+        text,
+        response_text,
+        generate_emotion=data.get('generateEmotionalSpeech', True),
+        generate_notes=data.get('generateStructuredNotes', False),
+        include_images=data.get('includeImages', False)
+    )
+    response['requestId'] = request_id
+    socketio.emit('ai_stream_done', response, to=sid)
+    
+    if data.get('generateSpeech'):
+        emit_speech_segments(sid, request_id, response_text, settings, binary=data.get('binaryAudio', False))
+    
+    if data.get('uid'):
+        try:
+            from services.auth_service import store_user_learning_data
+            from routes.ai_routes import extract_topic
+            store_user_learning_data(data['uid'], {
+                'timestamp': datetime.now().isoformat(),
+                'userInput': text,
+                'aiResponse': response_text,
+                'topic': extract_topic(text, response_text),
+                'type': 'image' if image else data.get('inputType', 'text')
+            })
+        except Exception as e:
+            logger.error(f"Error storing streamed interaction: {str(e)}")
+
+@socketio.on('voice_upload')
+def handle_voice_upload(data):
+    """Voice question sent as a binary frame: {audio: <bytes>, requestId, uid, settings}
+
+    The transcript is emitted as voice_transcript, then the answer streams
+    exactly as for process_text. Speech segments are sent as binary
+    frames unless binaryAudio is false.
+    """
+    socketio.start_background_task(transcribe_and_stream, request.sid, data or {})
+
+def transcribe_and_stream(sid, data):
+    request_id = data.get('requestId')
+    audio = data.get('audio')
+    if not audio:
+        socketio.emit('ai_stream_error', {'requestId': request_id, 'error': 'Audio input is required'}, to=sid)
+        return
+    
+    transcript = run_async(speech_service.speech_to_text(audio))
+    if transcription_failed(transcript):
+        socketio.emit('ai_stream_error', {'requestId': request_id, 'error': 'Failed to transcribe audio'}, to=sid)
+        return
+    socketio.emit('voice_transcript', {'requestId': request_id, 'text': transcript}, to=sid)
+    
+    stream_text_response(sid, dict(
+        data,
+        text=transcript,
+        audio=None,
+        inputType='voice',
+        generateSpeech=data.get('generateSpeech', True),
+        binaryAudio=data.get('binaryAudio', True)
+    ))
+
+# Live voice streams keyed by (sid, requestId)
+voice_streams = {}
+voice_streams_lock = threading.Lock()
+
+@socketio.on('voice_stream_start')
+def handle_voice_stream_start(data):
+    """Start streaming recognition: {requestId, sampleRate, uid, settings}
+
+    The client then sends LINEAR16 audio as voice_stream_chunk binary
+    frames while the user speaks and voice_stream_end when recording
+    stops. Interim transcripts come back as voice_partial; as soon as the
+    final transcript is known it is emitted as voice_transcript and the
+    answer streams exactly as for voice_upload.
+    """
+    data = data or {}
+    key = (request.sid, data.get('requestId'))
+    stream = speech_service.open_voice_stream(data.get('sampleRate'))
+    if stream is None:
+        socketio.emit('ai_stream_error', {'requestId': key[1], 'error': 'Speech recognition is not available'}, to=request.sid)
+        return
+    
+    with voice_streams_lock:
+        previous = voice_streams.pop(key, None)
+        voice_streams[key] = stream
+    if previous:
+        previous.close()
+    socketio.start_background_task(recognize_and_stream, request.sid, stream, data)
+
+@socketio.on('voice_stream_chunk')
+def handle_voice_stream_chunk(data):
+    """Audio frame for a live stream: {requestId, audio: <bytes>}"""
+    data = data or {}
+    with voice_streams_lock:
+        stream = voice_streams.get((request.sid, data.get('requestId')))
+    if stream:
+        stream.push(data.get('audio'))
+
+@socketio.on('voice_stream_end')
+def handle_voice_stream_end(data):
+    data = data or {}
+    with voice_streams_lock:
+        stream = voice_streams.pop((request.sid, data.get('requestId')), None)
+    if stream:
+        stream.close()
+
+def close_voice_streams(sid):
+    with voice_streams_lock:
+        keys = [key for key in voice_streams if key[0] == sid]
+        streams = [voice_streams.pop(key) for key in keys]
+    for stream in streams:
+        stream.close()
+
+def recognize_and_stream(sid, stream, data):
+    """Relay interim transcripts, then answer the final one without waiting for voice_stream_end"""
+    request_id = data.get('requestId')
+    transcript = ''
+    try:
+        for text, final in stream.results():
+            if final:
+                transcript = text
+                break
+            socketio.emit('voice_partial', {'requestId': request_id, 'text': text}, to=sid)
+    except Exception as e:
+        logger.error(f"Error in streaming recognition: {str(e)}")
+    finally:
+        # Frames still in flight after the final result are dropped
+        stream.close()
+        with voice_streams_lock:
+            if voice_streams.get((sid, request_id)) is stream:
+                del voice_streams[(sid, request_id)]
+    
+    if not transcript:
+        socketio.emit('ai_stream_error', {'requestId': request_id, 'error': 'Failed to transcribe audio'}, to=sid)
+        return
+    socketio.emit('voice_transcript', {'requestId': request_id, 'text': transcript}, to=sid)
+    
+    stream_text_response(sid, dict(
+        data,
+        text=transcript,
+        inputType='voice',
+        generateSpeech=data.get('generateSpeech', True),
+        binaryAudio=data.get('binaryAudio', True)
+    ))
+
+@socketio.on('image_upload')
+def handle_image_upload(data):
+    """Image question sent as a binary frame: {image: <bytes>, imageMimeType, text, requestId}"""
+    data = data or {}
+    if not data.get('image'):
+        socketio.emit('ai_stream_error', {'requestId': data.get('requestId'), 'error': 'Image input is required'}, to=request.sid)
+        return
+    data.setdefault('text', 'What is shown in this image?')
+    # Image answers are never served from the response cache
+    socketio.start_background_task(stream_text_response, request.sid, dict(data, noCache=True))
+
+@socketio.on('speak')
+def handle_speak(data):
+    """Synthesize text as ordered audio segments pushed to the client as they are ready"""
+    data = data or {}
+    socketio.start_background_task(
+        emit_speech_segments, request.sid, data.get('requestId'), data.get('text', ''), data.get('voiceSettings'),
+        data.get('binaryAudio', False)
+    )
+
+def emit_speech_segments(sid, request_id, text, voice_settings=None, binary=False):
+    """Emit one tts_segment event per synthesized sentence chunk, in order
+    
+    With binary=True each segment's audio is raw MP3 bytes, which
+    Socket.IO sends as a binary attachment instead of base64 text.
+    """
+    if not text:
+        socketio.emit('tts_error', {'requestId': request_id, 'error': 'No text provided'}, to=sid)
+        return
+    
+    try:
+        for segment in speech_service.stream_text_to_speech(text, voice_settings, binary=binary):
+            segment['requestId'] = request_id
+            socketio.emit('tts_segment', segment, to=sid)
+    except Exception as e:
+        logger.error(f"Error in emit_speech_segments: {str(e)}")
+        socketio.emit('tts_error', {'requestId': request_id, 'error': str(e)}, to=sid)
+
+def build_text_response(text, response_text, generate_emotion=True, generate_notes=False, include_images=False):
+    """Build the JSON payload shared by the HTTP and streaming text endpoints"""
+    response = {
+        "text": response_text,
+        "isOnline": True
+    }
+    
+    # Add emotion if requested
+    if generate_emotion:
+        response["emotion"] = detect_emotion(text, response_text)
+    
+    # Generate structured notes if requested
+    if generate_notes:
+        structured_notes = {
+            "title": ai_service._extract_title(response_text),
+            "keyPoints": ai_service._extract_key_points(response_text, 3),
+            "details": ai_service._extract_details(response_text)
+        }
+        response["structuredNotes"] = structured_notes
+        
+        # Add images if requested
+        if include_images:
+            response["images"] = [
+                {"url": "https://via.placeholder.com/500x300?text=Mentaura+Learning+Visual", 
+                 "caption": "Illustrative image for " + structured_notes["title"]}
+            ]
+    
+    return response
 
 @app.route('/api/ai/process-text', methods=['POST'])
 def process_text():
@@ -292,43 +570,9 @@ def process_text():
         logger.info(f"Processing text request for user {user_id}: {text[:30]}...")
         
         # Process the text with AI service
-        response_text = ai_service.query_gemini(text)
-        
-        # Prepare response
-        response = {
-            "text": response_text,
-            "isOnline": True
-        }
+        response_text = ai_service.query_gemini(text, use_cache=not data.get('noCache', False), semantic=True)
         
-        # Add emotion if requested
-        if generate_emotion:
-            # Determine appropriate emotion
-            if "error" in response_text.lower() or "sorry" in response_text.lower():
-                response["emotion"] = "concerned"
-            elif any(word in text.lower() for word in ["how", "why", "what", "explain"]):
-                response["emotion"] = "thoughtful"
-            elif any(word in text.lower() for word in ["thanks", "thank", "appreciate"]):
-                response["emotion"] = "happy"
-            elif any(word in text.lower() for word in ["amazing", "wow", "cool", "awesome"]):
-                response["emotion"] = "excited"
-            else:
-                response["emotion"] = "neutral"
-        
-        # Generate structured notes if requested
-        if generate_notes:
-            structured_notes = {
-                "title": ai_service._extract_title(response_text),
-                "keyPoints": ai_service._extract_key_points(response_text, 3),
-                "details": ai_service._extract_details(response_text)
-            }
-            response["structuredNotes"] = structured_notes
-            
-            # Add images if requested
-            if include_images:
-                response["images"] = [
-                    {"url": "https://via.placeholder.com/500x300?text=Mentaura+Learning+Visual", 
-                     "caption": "Illustrative image for " + structured_notes["title"]}
-                ]
+        response = build_text_response(text, response_text, generate_emotion, generate_notes, include_images)
         
         return jsonify(response)
     except Exception as e:
@@ -352,11 +596,10 @@ def get_services():
     return jsonify(services)
 
 @app.route('/api/speech-to-text', methods=['POST'])
-async def speech_to_text():
-    """Convert speech to text"""
+def speech_to_text():
+    """Convert speech to text from JSON base64 or a multipart 'audio' file part"""
     try:
-        data = request.json
-        audio_data = data.get('audio')
+        data, audio_data, _, _ = read_media_request(request, 'audio')
         
         if not audio_data:
             return jsonify({"error": "No audio data provided"}), 400
@@ -366,7 +609,7 @@ async def speech_to_text():
             speech_service.init_google_speech()
         
         # Process speech to text
-        transcript = await speech_service.speech_to_text(audio_data)
+        transcript = run_async(speech_service.speech_to_text(audio_data))
         
         return jsonify({"text": transcript})
     except Exception as e:
@@ -374,8 +617,12 @@ async def speech_to_text():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/text-to-speech', methods=['POST'])
-async def text_to_speech():
-    """Convert text to speech"""
+def text_to_speech():
+    """Convert text to speech
+    
+    Returns JSON with base64 audio by default, raw MP3 when the client
+    sends Accept: audio/mpeg, or NDJSON segments when stream is true.
+    """
     try:
         data = request.json
         text = data.get('text')
@@ -388,13 +635,22 @@ async def text_to_speech():
         if not speech_service.tts_client:
             speech_service.init_google_tts()
         
+        # Stream sentence-sized segments as newline-delimited JSON
+        if data.get('stream'):
+            segments = speech_service.stream_text_to_speech(text, voice_settings)
+            lines = (json.dumps(segment) + '\n' for segment in segments)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
         # Process text to speech
-        audio_base64 = await speech_service.text_to_speech(text, voice_settings)
+        audio, _ = run_async(speech_service.synthesize_speech(text, voice_settings))
         
-        if not audio_base64:
+        if not audio:
             return jsonify({"error": "Failed to generate speech"}), 500
         
-        return jsonify({"audio": audio_base64})
+        if request.accept_mimetypes.best_match(['application/json', 'audio/mpeg']) == 'audio/mpeg':
+            return Response(audio, mimetype='audio/mpeg')
+        
+        return jsonify({"audio": base64.b64encode(audio).decode('utf-8')})
     except Exception as e:
         logger.error(f"Error in text_to_speech: {str(e)}")
         return jsonify({"error": str(e)}), 500
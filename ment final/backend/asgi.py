@@ -0,0 +1,133 @@
+"""
+Mentaura AI Teacher - ASGI entry point
+
+Serves the AI and speech hot paths as native coroutines, so one worker
+can keep hundreds of LLM/TTS calls in flight on a single event loop
+instead of tying up a thread for each. Every other route is handed to
+the Flask app over WSGI, and Flask views that call run_async() use the
+same loop.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Socket.IO events are still served by the Flask-SocketIO server
+(python run.py).
+"""
+
+import json
+import asyncio
+import base64
+from contextlib import asynccontextmanager
+
+from services import async_runtime
+
+# Work started while the app is imported waits for the server's loop
+async_runtime.expect_external_loop()
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, Mount
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app, speech_service
+from routes.ai_routes import answer_text, answer_voice
+
+ALLOWED_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
+
+async def read_media(request, field, json_fields=('settings', 'voiceSettings')):
+    """Starlette counterpart of utils.read_media_request: (data, media, binary)"""
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get(field)
+        data = {key: value for key, value in form.items() if isinstance(value, str)}
+        for name in json_fields:
+            if isinstance(data.get(name), str):
+                try:
+                    data[name] = json.loads(data[name])
+                except json.JSONDecodeError:
+                    data[name] = None
+        media = await upload.read() if upload is not None and not isinstance(upload, str) else None
+        return data, media, True
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    return data or {}, (data or {}).get(field), False
+
+def with_cors(handler):
+    """Answer preflights and add the same CORS headers as the Flask after_request hook"""
+    async def endpoint(request):
+        if request.method == 'OPTIONS':
+            response = Response()
+        else:
+            try:
+                response = await handler(request)
+            except Exception as e:
+                response = JSONResponse({'error': str(e)}, status_code=500)
+        origin = request.headers.get('origin', '')
+        response.headers['Access-Control-Allow-Origin'] = origin if origin in ALLOWED_ORIGINS else ALLOWED_ORIGINS[0]
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,X-Requested-With'
+        response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE,OPTIONS'
+        return response
+    return endpoint
+
+async def process_text(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    body, status = await answer_text(data)
+    return JSONResponse(body, status_code=status)
+
+async def process_voice(request):
+    data, audio_input, binary = await read_media(request, 'audio')
+    body, status = await answer_voice(data, audio_input, binary)
+    return JSONResponse(body, status_code=status)
+
+async def speech_to_text(request):
+    _, audio_data, _ = await read_media(request, 'audio')
+    if not audio_data:
+        return JSONResponse({'error': 'No audio data provided'}, status_code=400)
+    return JSONResponse({'text': await speech_service.speech_to_text(audio_data)})
+
+async def text_to_speech(request):
+    data = await request.json()
+    text = data.get('text')
+    voice_settings = data.get('voiceSettings')
+    if not text:
+        return JSONResponse({'error': 'No text provided'}, status_code=400)
+
+    if data.get('stream'):
+        async def lines():
+            async for segment in speech_service.text_to_speech_pipeline(text, voice_settings):
+                yield json.dumps(segment) + '\n'
+        return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+    audio, _ = await speech_service.synthesize_speech(text, voice_settings)
+    if not audio:
+        return JSONResponse({'error': 'Failed to generate speech'}, status_code=500)
+
+    accept = request.headers.get('accept', '')
+    if 'audio/mpeg' in accept and 'application/json' not in accept:
+        return Response(audio, media_type='audio/mpeg')
+    return JSONResponse({'audio': base64.b64encode(audio).decode('utf-8')})
+
+@asynccontextmanager
+async def lifespan(_):
+    async_runtime.attach(asyncio.get_running_loop())
+    yield
+    await async_runtime.aclose()
+
+methods = ['POST', 'OPTIONS']
+app = Starlette(
+    routes=[
+        Route('/api/ai/process-text', with_cors(process_text), methods=methods),
+        Route('/api/ai/process-voice', with_cors(process_voice), methods=methods),
+        Route('/api/speech-to-text', with_cors(speech_to_text), methods=methods),
+        Route('/api/text-to-speech', with_cors(text_to_speech), methods=methods),
+        Mount('/', app=WSGIMiddleware(flask_app))
+    ],
+    lifespan=lifespan
+)
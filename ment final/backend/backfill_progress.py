@@ -0,0 +1,70 @@
+"""
+Mentaura AI Teacher - Progress Backfill
+
+Rebuilds the per-topic progress aggregates behind /api/learning/progress
+from each user's stored learning history (local event log and, unless
+--local-only is given, Firestore).
+
+Usage:
+    python backfill_progress.py                 # every user found in user_data/
+    python backfill_progress.py --uid abc --uid def
+"""
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import StorageConfig
+
+
+def discover_users(directory):
+    """Find user IDs that have a learning snapshot or event log"""
+    users = set()
+    if not os.path.isdir(directory):
+        return users
+    for name in os.listdir(directory):
+        for suffix in ('_events.jsonl', '_learning.json'):
+            if name.endswith(suffix):
+                users.add(name[:-len(suffix)])
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild learning progress aggregates")
+    parser.add_argument('--uid', action='append', help="User ID to rebuild (repeatable, default: all local users)")
+    parser.add_argument('--local-only', action='store_true', help="Skip Firestore history")
+    args = parser.parse_args()
+
+    if not args.local_only:
+        from services.auth_service import init_firebase
+        try:
+            init_firebase()
+        except Exception:
+            print("Firestore unavailable, rebuilding from local history only")
+            args.local_only = True
+
+    from services.auth_service import rebuild_user_progress
+
+    users = args.uid or sorted(discover_users(StorageConfig.USER_DATA_DIR))
+    if not users:
+        print(f"No users found in {StorageConfig.USER_DATA_DIR}")
+        return 0
+
+    failed = 0
+    for uid in users:
+        try:
+            count = rebuild_user_progress(uid, include_firestore=not args.local_only)
+            print(f"{uid}: {count} records")
+        except Exception as e:
+            failed += 1
+            print(f"{uid}: failed ({e})")
+
+    print(f"Rebuilt progress for {len(users) - failed}/{len(users)} users")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Mentaura AI Teacher - in-flight request capacity benchmark
+
+Sends a burst of concurrent LLM requests two ways using the local fake
+model: the blocking query_gemini on a fixed thread pool (how a threaded
+Flask worker serves them), and query_gemini_async gathered on the shared
+event loop (how the ASGI entry point serves them). The thread pool can
+only hold --threads calls at once, while the event loop holds every
+request in flight without a thread per call.
+
+Usage: python benchmarks/bench_async_concurrency.py [--requests 500] [--threads 32]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Let the whole burst through the provider guard, and never hit the cache
+os.environ.setdefault('GEMINI_REQUESTS_PER_MINUTE', '1000000')
+os.environ.setdefault('PROVIDER_BURST', '100000')
+os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ai_service import AIService
+from services.fake_llm import FakeGeminiModel
+from services.async_runtime import run_async
+
+def prompt(index):
+    return f"Explain topic number {index} at intermediate level"
+
+def run_threaded(ai_service, requests, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: ai_service.query_gemini(prompt(i), use_cache=False), range(requests)))
+    return time.perf_counter() - start, threads
+
+async def gather_async(ai_service, requests):
+    await asyncio.gather(*(ai_service.query_gemini_async(prompt(i), use_cache=False) for i in range(requests)))
+
+def run_async_loop(ai_service, requests):
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    run_async(gather_async(ai_service, requests))
+    return time.perf_counter() - start, threading.active_count() - threads_before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='concurrent requests per mode')
+    parser.add_argument('--threads', type=int, default=32, help='worker threads for the blocking mode')
+    parser.add_argument('--latency', type=float, default=0.5, help='fake model response time in seconds')
+    args = parser.parse_args()
+
+    ai_service = AIService()
+    ai_service.gemini_model = FakeGeminiModel(first_chunk_delay=args.latency, chunk_delay=0)
+
+    # Start the loop before timing so its thread isn't counted
+    run_async(asyncio.sleep(0))
+
+    for label, (elapsed, threads) in (
+        ('threads', run_threaded(ai_service, args.requests, args.threads)),
+        ('asyncio', run_async_loop(ai_service, args.requests)),
+    ):
+        print(f"{label:<8} {args.requests} requests in {elapsed:6.2f}s  "
+              f"({args.requests / elapsed:7.1f} req/s, {threads} extra threads)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Mentaura AI Teacher - book search cache benchmark
+
+Simulates many users typing popular titles into the library search box
+(one search per keystroke) against the local fake Open Library server.
+Reports how many searches reached upstream, how many were coalesced onto
+an in-flight request, and the latency of cache hits. It then fails the
+fake server with 503s and checks that expired entries are still served.
+
+Usage: python benchmarks/bench_book_search.py [--users 50] [--latency 0.08]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# The loopback server must not go through any configured proxy
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1'
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.http_pool import get_session
+from services.book_search import BookSearch
+from services.fake_openlibrary import FakeOpenLibrary
+
+POPULAR = ['harry potter', 'the hobbit', 'a brief history of time', 'cosmos', 'the selfish gene']
+
+def keystrokes(title):
+    """The queries a search-as-you-type box sends, with a few stray spaces and capitals"""
+    queries = [title[:i] for i in range(3, len(title) + 1)]
+    return [q.title() if random.random() < 0.2 else q for q in queries]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50, help='concurrent users typing')
+    parser.add_argument('--latency', type=float, default=0.08, help='fake Open Library response time')
+    args = parser.parse_args()
+
+    fake = FakeOpenLibrary(latency=args.latency)
+    base_url = fake.start()
+    search = BookSearch(get_session('openlibrary', pool_size=args.users), base_url=base_url, ttl=60)
+
+    def user(index):
+        random.seed(index)
+        for query in keystrokes(random.choice(POPULAR)):
+            search.search(query)
+            time.sleep(random.uniform(0.01, 0.05))  # typing speed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        list(pool.map(user, range(args.users)))
+    elapsed = time.perf_counter() - start
+
+    stats = search.stats()
+    searches = stats['hits'] + stats['misses'] + stats['coalesced']
+    print(f"searches:          {searches} from {args.users} users in {elapsed:.2f}s")
+    print(f"upstream requests: {fake.requests} ({fake.requests / searches:.1%} of searches)")
+    print(f"coalesced:         {stats['coalesced']}")
+    print(f"cache hits:        {stats['hits']} (hit rate {stats['hit_rate']:.1%})")
+
+    # Warm hit latency for a popular query
+    samples = []
+    for _ in range(10000):
+        started = time.perf_counter()
+        search.search('Harry  Potter')
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    print(f"hit latency:       p50={samples[len(samples) // 2] * 1e6:.1f}us  p99={samples[int(len(samples) * 0.99)] * 1e6:.1f}us")
+
+    # Upstream outage after the entries have expired
+    search.ttl = 0
+    search.search('on the origin of species')
+    fake.status = 503
+    before = search.stats()['stale']
+    books = search.search('on the origin of species')
+    served_stale = search.stats()['stale'] > before and bool(books)
+    print(f"outage:            {'served stale results' if served_stale else 'FAILED to serve stale results'}")
+
+    fake.stop()
+    return 0 if served_stale else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
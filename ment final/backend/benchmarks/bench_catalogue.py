@@ -0,0 +1,82 @@
+"""
+Mentaura AI Teacher - static catalogue benchmark
+
+Serves the course list through a bare Flask app two ways: rebuilding the
+payload and calling jsonify on every request (as the routes used to), and
+returning the catalogue's pre-serialized bytes with ETag/Last-Modified.
+Also times a revalidation that the client already holds, which should
+come back as an empty 304, and the view functions on their own.
+
+Usage: python benchmarks/bench_catalogue.py [--requests 5000]
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+
+from flask import Flask, request, jsonify
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import ResourceConfig
+from services.catalogue import Catalogue
+from utils import precompiled_response
+
+def make_app(catalogue, raw):
+    app = Flask(__name__)
+
+    @app.route('/dynamic')
+    def dynamic():
+        # Stands in for the hardcoded literal the route used to build per request
+        return jsonify({'courses': copy.deepcopy(raw)})
+
+    @app.route('/precompiled')
+    def precompiled():
+        return precompiled_response(catalogue.courses, request)
+
+    return app
+
+def run(label, client, path, count, headers=None):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label:<12} status={response.status_code}  bytes={len(response.data):5d}  "
+          f"p50={samples[len(samples) // 2] * 1e6:7.1f}us  p99={samples[int(len(samples) * 0.99)] * 1e6:7.1f}us")
+    return response
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help='requests per mode')
+    args = parser.parse_args()
+
+    catalogue = Catalogue(ResourceConfig.CATALOGUE_PATH)
+    with open(ResourceConfig.CATALOGUE_PATH, 'r', encoding='utf-8') as f:
+        raw = json.load(f)['courses']
+    client = make_app(catalogue, raw).test_client()
+
+    run('dynamic', client, '/dynamic', args.requests)
+    first = run('precompiled', client, '/precompiled', args.requests)
+    cached = run('revalidate', client, '/precompiled', args.requests,
+                 headers={'If-None-Match': first.headers['ETag']})
+
+    # The view alone, without the test client's WSGI round trip
+    app = client.application
+    with app.test_request_context('/'):
+        for name in ('dynamic', 'precompiled'):
+            view = app.view_functions[name]
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                view()
+            print(f"{name + ' view':<18} {(time.perf_counter() - start) / args.requests * 1e6:7.1f}us per call")
+
+    return 0 if cached.status_code == 304 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
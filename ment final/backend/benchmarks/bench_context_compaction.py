@@ -0,0 +1,79 @@
+"""
+Mentaura AI Teacher - conversation context compaction benchmark
+
+Replays a synthetic tutoring conversation against the top-level app's
+services.conversation_context, the way /api/process_text sees it: each
+turn the frontend re-sends its last 5 messages, which used to be pasted
+into the prompt verbatim. Reports, per turn, the history tokens the old
+prompt carried and what the token-budgeted window (rolling summary plus
+the last few messages) carries instead, for a signed-in student and for
+an anonymous one, plus the time build() takes.
+
+Usage: python benchmarks/bench_context_compaction.py [--turns 30] [--answer-words 220] [--budget 600]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TOP_LEVEL_DIR = os.path.dirname(BACKEND_DIR)
+# The top-level app has its own services package
+sys.path.insert(0, TOP_LEVEL_DIR)
+
+from services.conversation_context import ConversationContext, count_tokens, _get_encoding
+
+WORDS = ('energy light plant cell glucose oxygen water carbon chlorophyll leaf sugar process reaction '
+         'sunlight roots stem molecule example think imagine factory kitchen recipe step because').split()
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+def paragraph(rng, words):
+    parts = []
+    while sum(len(p.split()) for p in parts) < words:
+        parts.append(sentence(rng, rng.randint(8, 18)))
+    return ' '.join(parts)
+
+def replay(context, user_id, turns, answer_words, rng):
+    history, legacy, compacted, build_times = [], [], [], []
+    for turn in range(turns):
+        question = f"Can you explain {rng.choice(WORDS)} {rng.choice(WORDS)} in photosynthesis? (turn {turn})"
+        history.append({'role': 'user', 'text': question})
+        recent = history[-5:]
+        legacy.append(sum(count_tokens(m['text']) for m in recent))
+
+        started = time.perf_counter()
+        window = context.build(user_id, recent, question)
+        build_times.append(time.perf_counter() - started)
+        compacted.append(window.tokens)
+
+        answer = paragraph(rng, answer_words)
+        context.record(user_id, question, answer)
+        history.append({'role': 'ai', 'text': answer})
+    return legacy, compacted, build_times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turns', type=int, default=30)
+    parser.add_argument('--answer-words', type=int, default=220, help='length of each tutor answer')
+    parser.add_argument('--message-tokens', type=int, default=200, help='cap on each verbatim message')
+    parser.add_argument('--budget', type=int, default=600, help='history token budget')
+    args = parser.parse_args()
+
+    print(f"token counter: {'tiktoken' if _get_encoding() is not None else 'estimate (4 chars/token)'}")
+    for label, user_id in (('signed-in', 'student-1'), ('anonymous', 'guest')):
+        context = ConversationContext(budget_tokens=args.budget, message_max_tokens=args.message_tokens)
+        legacy, compacted, build_times = replay(context, user_id, args.turns, args.answer_words, random.Random(1))
+        # Steady state: once the frontend's 5-message window is full
+        steady = slice(3, None)
+        avg_legacy = sum(legacy[steady]) / len(legacy[steady])
+        avg_compacted = sum(compacted[steady]) / len(compacted[steady])
+        print(f"{label:<10} history tokens per prompt: verbatim {avg_legacy:.0f} -> budgeted {avg_compacted:.0f} "
+              f"({1 - avg_compacted / avg_legacy:.0%} fewer, max {max(compacted)}), "
+              f"build {sorted(build_times)[len(build_times) // 2] * 1e6:.0f}us p50")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Mentaura AI Teacher - pooled HTTP session benchmark
+
+Sends the same requests to a local keep-alive server with bare
+requests.get (a new connection per call, as the provider call sites used
+to) and through services.http_pool's pooled session, then prints latency
+and the pool's connection-reuse stats. --delay-ms adds a pause before
+each new connection is accepted, to stand in for the TCP+TLS handshake
+to a remote API.
+
+Usage: python benchmarks/bench_http_pool.py [--requests 200] [--workers 8] [--delay-ms 30]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import http.server
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# The loopback server must not go through any configured proxy
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1'
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.http_pool import get_session, http_stats
+
+BODY = json.dumps({'docs': [{'title': 'Example'}] * 10}).encode('utf-8')
+
+def make_server(handshake_delay):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; avoid the delayed-ACK stall
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Runs once per connection, not per request
+            time.sleep(handshake_delay)
+            super().setup()
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(label, get, url, requests_count, workers):
+    def timed(_):
+        start = time.perf_counter()
+        get(url).json()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = sorted(pool.map(timed, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<8} p50={latencies[len(latencies) // 2] * 1000:6.1f}ms  "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:6.1f}ms  total={elapsed:5.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per mode')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent callers')
+    parser.add_argument('--delay-ms', type=float, default=30, help='simulated connection setup cost')
+    args = parser.parse_args()
+
+    server = make_server(args.delay_ms / 1000)
+    url = f'http://127.0.0.1:{server.server_address[1]}/search.json'
+    pooled = get_session('bench', pool_size=args.workers)
+
+    run('fresh', lambda u: requests.get(u, timeout=10), url, args.requests, args.workers)
+    run('pooled', pooled.get, url, args.requests, args.workers)
+    print(json.dumps(http_stats()['bench']))
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Mentaura AI Teacher - import-time profile
+
+Imports an app module in a fresh interpreter under `python -X importtime`
+and reports the slowest top-level packages, total import time, peak RSS
+and which heavy optional libraries ended up loaded. Those libraries
+(OpenCV, Tesseract, Google Cloud speech, pydub, Edge TTS) should only
+load on first use, so a freshly started worker shouldn't list them.
+
+Usage:
+    python benchmarks/bench_import_time.py            # backend/app.py
+    python benchmarks/bench_import_time.py --top-level  # ../app.py
+    python benchmarks/bench_import_time.py --limit 30
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TOP_LEVEL_DIR = os.path.dirname(BACKEND_DIR)
+
+HEAVY_MODULES = [
+    'cv2', 'pytesseract', 'numpy', 'llama_index', 'google.cloud.speech',
+    'google.cloud.texttospeech', 'pydub', 'sounddevice', 'edge_tts'
+]
+
+# Runs in the child interpreter after the app import
+CHILD = """
+import sys, json
+import app
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024  # bytes on macOS
+except ImportError:
+    rss_kb = None
+print('@@' + json.dumps({
+    'rss_kb': rss_kb,
+    'loaded': [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+STUBBED_ENV = {
+    'MENTAURA_FAKE_LLM': 'true',
+    'PROVIDER_HEALTH_PROBES': 'false',
+    'WARM_UP_IMPORTS': 'false',
+    'AUDIO_CACHE_ENABLED': 'false'
+}
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+            # Leading spaces in the name encode nesting depth
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top-level', action='store_true', help='profile the top-level app.py instead of backend/app.py')
+    parser.add_argument('--limit', type=int, default=20, help='packages to list')
+    args = parser.parse_args()
+
+    cwd = TOP_LEVEL_DIR if args.top_level else BACKEND_DIR
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD],
+        cwd=cwd, env=dict(os.environ, **STUBBED_ENV), capture_output=True, text=True
+    )
+    summary = [line[2:] for line in result.stdout.splitlines() if line.startswith('@@')]
+    if result.returncode != 0 or not summary:
+        print(result.stderr[-2000:])
+        sys.exit(f"import of app in {cwd} failed")
+    summary = json.loads(summary[-1])
+
+    # Self time summed per top-level package
+    packages = defaultdict(int)
+    timings = parse_importtime(result.stderr)
+    for name, (self_us, _) in timings.items():
+        packages[name.split('.')[0]] += self_us
+
+    total_us = sum(packages.values())
+    print(f"profiled: {os.path.join(cwd, 'app.py')}")
+    print(f"modules imported:   {len(timings)}")
+    print(f"total import time:  {total_us / 1000:8.1f}ms")
+    if summary['rss_kb']:
+        print(f"peak RSS:           {summary['rss_kb'] / 1024:8.1f}MB")
+    print(f"heavy libs loaded:  {', '.join(summary['loaded']) or 'none'}")
+    print()
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.limit]:
+        print(f"{name:<32}{self_us / 1000:>10.1f}{self_us / total_us:>8.1%}")
+
+if __name__ == '__main__':
+    main()
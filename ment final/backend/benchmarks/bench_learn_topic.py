@@ -0,0 +1,65 @@
+"""
+Mentaura AI Teacher - learn_topic fan-out benchmark
+
+Drives POST /api/learning/learn/<topic> with a stubbed AIService whose
+three generations each sleep for a fixed latency. With the calls fanned
+out, wall-clock time should track max() of the latencies, not sum().
+
+Usage: python benchmarks/bench_learn_topic.py [--rounds 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+import routes.learning_routes as learning_routes
+
+LATENCIES = {
+    'content': 0.8,
+    'practice_questions': 0.6,
+    'related_topics': 0.4
+}
+
+class StubAIService:
+    """AIService stand-in with artificial per-call latency"""
+    def query_gemini(self, prompt, image=None, user_settings=None):
+        time.sleep(LATENCIES['content'])
+        return f"Content for: {prompt}"
+
+    def generate_practice_questions(self, topic, difficulty=3, count=5):
+        time.sleep(LATENCIES['practice_questions'])
+        return f"Questions for: {topic}"
+
+    def suggest_related_topics(self, current_topic):
+        time.sleep(LATENCIES['related_topics'])
+        return f"Related to: {current_topic}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5, help='requests to time')
+    args = parser.parse_args()
+    
+    learning_routes.ai_service = StubAIService()
+    app = Flask(__name__)
+    app.register_blueprint(learning_routes.learning_bp, url_prefix='/api/learning')
+    client = app.test_client()
+    
+    timings = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        response = client.post('/api/learning/learn/Algebra', json={'settings': {}})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+    
+    timings.sort()
+    print(f"sum of latencies: {sum(LATENCIES.values()) * 1000:7.1f}ms")
+    print(f"max of latencies: {max(LATENCIES.values()) * 1000:7.1f}ms")
+    print(f"learn_topic p50:  {timings[len(timings) // 2] * 1000:7.1f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Mentaura AI Teacher - math question generator benchmark
+
+Times the old one-question-at-a-time random.choice/random.randint loop
+against services.math_generator's batch generator (NumPy and pure-Python
+paths) for worksheet-sized and load-test-sized batches, and checks that a
+seed reproduces the same worksheet and that batches have no duplicates.
+
+Usage: python benchmarks/bench_math_generator.py [--count 10000] [--level intermediate]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import services.math_generator as math_generator
+from services.math_generator import math_question_batch, capacity
+
+def old_intermediate(count):
+    """The loop the game routes used before, kept here as the baseline"""
+    questions = []
+    for i in range(count):
+        operation = random.choice(['+', '-', '*', '/', 'exponent'])
+        if operation == '+':
+            num1, num2 = random.randint(10, 100), random.randint(10, 100)
+            question, answer = f"Calculate {num1} + {num2}", num1 + num2
+        elif operation == '-':
+            num1, num2 = random.randint(50, 150), random.randint(10, 50)
+            question, answer = f"Calculate {num1} - {num2}", num1 - num2
+        elif operation == '*':
+            num1, num2 = random.randint(5, 20), random.randint(5, 20)
+            question, answer = f"Calculate {num1} × {num2}", num1 * num2
+        elif operation == '/':
+            num2 = random.randint(2, 10)
+            num1 = num2 * random.randint(2, 10)
+            question, answer = f"Calculate {num1} ÷ {num2}", num1 // num2
+        else:
+            base, exponent = random.randint(2, 10), random.randint(2, 3)
+            question, answer = f"Calculate {base}^{exponent} (power)", base ** exponent
+        questions.append({'id': f"math-{i+1}", 'question': question, 'type': 'number', 'answer': str(answer)})
+    return questions
+
+def timed(label, fn, count, repeat=3):
+    best = min(_once(fn) for _ in range(repeat))
+    print(f"{label:<28} {best * 1000:8.1f}ms  {count / best:12,.0f} questions/s")
+
+def _once(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000, help='questions per batch')
+    parser.add_argument('--level', choices=('beginner', 'intermediate'), default='intermediate')
+    args = parser.parse_args()
+
+    unique_count = min(args.count, capacity(args.level))
+    print(f"{args.level}: {capacity(args.level)} distinct questions possible, NumPy "
+          f"{'available' if math_generator.HAS_NUMPY else 'not installed'}")
+
+    if args.level == 'intermediate':
+        timed('old loop (duplicates)', lambda: old_intermediate(args.count), args.count)
+    paths = [('numpy', True), ('python', False)] if math_generator.HAS_NUMPY else [('python', False)]
+    ok = True
+    for name, use_numpy in paths:
+        math_generator.HAS_NUMPY = use_numpy
+        timed(f'{name} batch', lambda: math_question_batch(args.count, args.level, seed=7, unique=False), args.count)
+        timed(f'{name} batch, unique', lambda: math_question_batch(unique_count, args.level, seed=7), unique_count)
+        timed(f'{name} worksheet of 20', lambda: math_question_batch(20, args.level, seed=7), 20, repeat=50)
+
+        worksheet = math_question_batch(unique_count, args.level, seed=7)
+        reproducible = worksheet == math_question_batch(unique_count, args.level, seed=7)
+        distinct = len({q['question'] for q in worksheet}) == len(worksheet)
+        print(f"{'':<28} seeded batch reproducible: {reproducible}, duplicates: {not distinct}")
+        ok = ok and reproducible and distinct
+
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
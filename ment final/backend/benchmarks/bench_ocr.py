@@ -0,0 +1,185 @@
+"""
+Mentaura AI Teacher - image OCR pipeline benchmark
+
+Reads a folder of worksheet photos (or --synthetic generated ones: printed
+questions on an unevenly lit 3000x4000 page, saved as phone-quality JPEGs)
+with the top-level app's services.ocr_pipeline. Compares the old path
+(full-resolution colour decode, Tesseract in the calling thread) with the
+preprocessed one (greyscale, downsampled, binarized), then pushes every
+image through the pool from --clients request threads and reports
+throughput and how long a web thread is stalled meanwhile, and finally
+the latency of repeat uploads served from the result cache. Synthetic
+pages also report word accuracy against the text that was drawn.
+
+Usage: python benchmarks/bench_ocr.py [--images photos/] [--synthetic 12] [--workers 2] [--clients 8]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TOP_LEVEL_DIR = os.path.dirname(BACKEND_DIR)
+# The top-level app has its own services package
+sys.path.insert(0, TOP_LEVEL_DIR)
+
+from services.ocr_pipeline import OcrPipeline, ocr_image, preprocess_image
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+def write_worksheets(directory, count, rng):
+    """Synthetic worksheet photos; returns {filename: the text drawn on it}"""
+    truth = {}
+    for n in range(count):
+        page = np.full((4000, 3000), 225, np.uint8)
+        lines = []
+        for i in range(28):
+            a, b = rng.randint(2, 99), rng.randint(2, 99)
+            line = f"{i + 1}. What is {a} {rng.choice('+-x')} {b} ?"
+            lines.append(line)
+            cv2.putText(page, line, (220, 260 + i * 130), cv2.FONT_HERSHEY_SIMPLEX, 2.4, 30, 5, cv2.LINE_AA)
+        # Light falling off across the page, plus sensor noise
+        page = page * np.linspace(1.0, 0.55, page.shape[1], dtype=np.float32)[None, :]
+        page += np.random.default_rng(n).normal(0, 6, page.shape).astype(np.float32)
+        photo = cv2.cvtColor(np.clip(page, 0, 255).astype(np.uint8), cv2.COLOR_GRAY2BGR)
+        name = f"worksheet{n:03d}.jpg"
+        cv2.imwrite(os.path.join(directory, name), photo, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        truth[name] = ' '.join(lines)
+    return truth
+
+def word_accuracy(text, expected):
+    words = text.split()
+    return sum(1 for word in expected.split() if word in words) / len(expected.split())
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * p), len(samples) - 1)] * 1000
+
+def tesseract_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+def heartbeat(stop, stalls):
+    """A web thread's view: how late does a 10ms timer fire while OCR runs?"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        time.sleep(0.01)
+        sum(range(2000))  # a little pure-Python work, like building a JSON response
+        stalls.append(time.perf_counter() - started - 0.01)
+
+def run_load(pipeline, images, clients):
+    queue = list(images)
+    lock = threading.Lock()
+    def client():
+        while True:
+            with lock:
+                if not queue:
+                    return
+                data = queue.pop()
+            pipeline.extract_text(data)
+
+    stop, stalls = threading.Event(), []
+    beat = threading.Thread(target=heartbeat, args=(stop, stalls), daemon=True)
+    beat.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    beat.join()
+    return elapsed, stalls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', help='folder of worksheet photos (default: generate synthetic ones)')
+    parser.add_argument('--synthetic', type=int, default=12, help='synthetic photos to generate without --images')
+    parser.add_argument('--workers', type=int, default=2, help='OCR worker processes')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent request threads')
+    parser.add_argument('--max-side', type=int, default=1600)
+    args = parser.parse_args()
+
+    root, truth = None, {}
+    directory = args.images
+    if directory is None:
+        root = directory = tempfile.mkdtemp(prefix='mentaura-ocr-')
+        truth = write_worksheets(directory, args.synthetic, random.Random(1))
+    names = sorted(name for name in os.listdir(directory) if name.lower().endswith(EXTENSIONS))
+    images = []
+    for name in names:
+        with open(os.path.join(directory, name), 'rb') as f:
+            images.append(f.read())
+    if not images:
+        print(f"no images in {directory}")
+        return 1
+
+    try:
+        print(f"{len(images)} images, {sum(map(len, images)) / len(images) / 1e6:.1f}MB average")
+        decode_full, decode_prep = [], []
+        for data in images:
+            started = time.perf_counter()
+            cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            decode_full.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            preprocess_image(data, args.max_side)
+            decode_prep.append(time.perf_counter() - started)
+        print(f"decode:       full colour p50={percentile(decode_full, 0.5):.0f}ms, "
+              f"greyscale+downsample+binarize p50={percentile(decode_prep, 0.5):.0f}ms")
+
+        if not tesseract_available():
+            print("tesseract is not installed; skipping the OCR runs")
+            return 0
+
+        for label, preprocess in (('original', False), ('preprocessed', True)):
+            ocr_times, accuracy = [], []
+            for name, data in zip(names, images):
+                text, _, ocr_ms = ocr_image(data, preprocess, args.max_side)
+                ocr_times.append(ocr_ms / 1000)
+                if name in truth:
+                    accuracy.append(word_accuracy(text, truth[name]))
+            line = f"{label + ':':<13} tesseract p50={percentile(ocr_times, 0.5):.0f}ms p99={percentile(ocr_times, 0.99):.0f}ms"
+            if accuracy:
+                line += f", word accuracy {sum(accuracy) / len(accuracy):.0%}"
+            print(line)
+
+        for label, workers in (('in-thread', 0), (f'{args.workers} workers', args.workers)):
+            pipeline = OcrPipeline(workers=workers, max_pending=args.clients, cache_entries=0, max_side=args.max_side)
+            pipeline.start()
+            elapsed, stalls = run_load(pipeline, images, args.clients)
+            pipeline.shutdown()
+            print(f"{label + ':':<13} {len(images) / elapsed:.1f} images/s from {args.clients} clients, "
+                  f"web thread stalled p50={percentile(stalls, 0.5):.1f}ms p99={percentile(stalls, 0.99):.1f}ms")
+
+        pipeline = OcrPipeline(workers=args.workers, max_side=args.max_side)
+        pipeline.start()
+        run_load(pipeline, images, args.clients)
+        repeats = []
+        for data in images:
+            started = time.perf_counter()
+            pipeline.extract_text(data)
+            repeats.append(time.perf_counter() - started)
+        pipeline.shutdown()
+        stats = pipeline.stats()
+        print(f"cache:        repeat uploads p50={percentile(repeats, 0.5):.2f}ms, "
+              f"{stats['hits']} hits / {stats['misses']} OCR runs")
+    finally:
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
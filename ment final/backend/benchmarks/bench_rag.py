@@ -0,0 +1,104 @@
+"""
+Mentaura AI Teacher - document retrieval index benchmark
+
+Writes --docs synthetic course documents to a temporary directory and
+indexes them with services.rag_index, embedding with the local
+FakeEmbedder. Reports the full build time (what re-indexing at every
+startup would cost), how long a server takes to open the memory-mapped
+index, top-k search latency, and the work an incremental re-index does
+after --changed documents are edited and one is deleted.
+
+Usage: python benchmarks/bench_rag.py [--docs 1000] [--paragraphs 40] [--changed 20] [--queries 500]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.rag_index import RagIndex, build_index
+from services.fake_embedding import FakeEmbedder
+
+SYLLABLES = ['ka', 'lo', 'mir', 'vet', 'sun', 'dra', 'pel', 'ix', 'tor', 'ne', 'qua', 'zim', 'ro', 'fen', 'bal', 'cu']
+
+def word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def write_document(path, topic, paragraphs, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(paragraphs):
+            f.write(f"{topic} " + ' '.join(word(rng) for _ in range(rng.randint(20, 45))) + ".\n\n")
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * p), len(samples) - 1)] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=1000, help='documents in the corpus')
+    parser.add_argument('--paragraphs', type=int, default=40, help='paragraphs per document')
+    parser.add_argument('--changed', type=int, default=20, help='documents edited before the incremental run')
+    parser.add_argument('--queries', type=int, default=500, help='searches to time')
+    parser.add_argument('--top-k', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    root = tempfile.mkdtemp(prefix='mentaura-rag-')
+    docs, index_path = os.path.join(root, 'docs'), os.path.join(root, 'index')
+    os.makedirs(docs)
+    topics = [f"{word(rng)} {word(rng)}" for _ in range(args.docs)]
+    for i, topic in enumerate(topics):
+        write_document(os.path.join(docs, f"doc{i:05d}.md"), topic, args.paragraphs, rng)
+
+    embedder = FakeEmbedder()
+    calls = []
+    def embed_batch(texts):
+        calls.append(len(texts))
+        return [embedder.embed(text) for text in texts]
+
+    try:
+        start = time.perf_counter()
+        summary = build_index(docs, index_path, embed_batch, 'fake', log=lambda message: None)
+        build_seconds = time.perf_counter() - start
+        print(f"full build:   {summary['chunks']} chunks from {summary['documents']} documents in {build_seconds:.1f}s "
+              f"({sum(calls)} chunks embedded in {len(calls)} batches)")
+
+        start = time.perf_counter()
+        index = RagIndex(index_path)
+        print(f"open index:   {(time.perf_counter() - start) * 1000:.1f}ms "
+              f"({index.vectors.nbytes / 1e6:.0f}MB of vectors, memory-mapped)")
+
+        asked = [rng.randrange(args.docs) for _ in range(args.queries)]
+        vectors = [embedder.embed(f"what is {topics[i]}") for i in asked]
+        latencies, found = [], 0
+        for i, vector in zip(asked, vectors):
+            started = time.perf_counter()
+            results = index.search(vector, k=args.top_k)
+            latencies.append(time.perf_counter() - started)
+            found += bool(results) and results[0]['source'] == f"doc{i:05d}.md"
+        print(f"search top-{args.top_k}: p50={percentile(latencies, 0.5):.2f}ms p99={percentile(latencies, 0.99):.2f}ms, "
+              f"top result from the asked-about document {found / len(asked):.0%}")
+
+        for i in rng.sample(range(1, args.docs), args.changed):
+            write_document(os.path.join(docs, f"doc{i:05d}.md"), topics[i], args.paragraphs, rng)
+        os.remove(os.path.join(docs, 'doc00000.md'))
+        calls.clear()
+        start = time.perf_counter()
+        summary = build_index(docs, index_path, embed_batch, 'fake', log=lambda message: None)
+        print(f"incremental:  {summary['embedded']} changed, {summary['removed']} removed, {summary['reused']} reused "
+              f"in {time.perf_counter() - start:.2f}s ({sum(calls)} chunks embedded)")
+
+        start = time.perf_counter()
+        index.ready()
+        print(f"reload:       {(time.perf_counter() - start) * 1000:.1f}ms, now {index.stats()['chunks']} chunks")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Mentaura AI Teacher - semantic answer cache benchmark
+
+Fills services.semantic_cache with --entries answered questions about
+synthetic topics, embedded with the local FakeEmbedder. It then asks
+reworded versions of cached questions (should hit the right answer),
+questions about new topics (should miss) and a cached question at
+another difficulty (should miss). Reports hit rates, wrong answers and
+lookup latency (embedding excluded), and compares the IVF search with
+an exact scan of every entry.
+
+Usage: python benchmarks/bench_semantic_cache.py [--entries 100000] [--queries 2000] [--threshold 0.9]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.semantic_cache import SemanticCache
+from services.fake_embedding import FakeEmbedder
+
+SYLLABLES = ['ka', 'lo', 'mir', 'vet', 'sun', 'dra', 'pel', 'ix', 'tor', 'ne', 'qua', 'zim', 'ro', 'fen', 'bal', 'cu']
+ASK = ['what is {}', 'explain {}', 'tell me about {}', 'describe {}']
+REWORD = ["What's {}?", 'explain {}s', 'Can you explain {} please', 'what are {}s', 'WHAT IS  {} ?']
+SETTINGS = {'teaching_style': 'detailed', 'personality': 'friendly', 'difficulty': 'intermediate'}
+
+def make_topics(count, rng):
+    topics = set()
+    while len(topics) < count:
+        word = lambda: ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        topics.add(f"{word()} {word()}")
+    return list(topics)
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * p), len(samples) - 1)] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000, help='cached questions')
+    parser.add_argument('--queries', type=int, default=2000, help='lookups per query kind')
+    parser.add_argument('--threshold', type=float, default=0.9, help='similarity needed to serve a cached answer')
+    parser.add_argument('--nprobe', type=int, default=8, help='coarse lists scanned per lookup')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    topics = make_topics(args.entries + args.queries, rng)
+    cached, novel = topics[:args.entries], topics[args.entries:]
+    embedder = FakeEmbedder()
+    cache = SemanticCache(embedder.embed, threshold=args.threshold, max_entries=args.entries, nprobe=args.nprobe,
+                          memo_entries=args.queries * 4)
+
+    start = time.perf_counter()
+    for topic in cached:
+        cache.set(rng.choice(ASK).format(topic), SETTINGS, f"answer about {topic}")
+    print(f"filled {args.entries} entries in {time.perf_counter() - start:.1f}s "
+          f"({cache.stats()['lists']} IVF lists, {cache.index.vectors.nbytes / 1e6:.0f}MB of vectors)")
+
+    reworded = [(rng.choice(REWORD).format(topic), topic) for topic in rng.sample(cached, args.queries)]
+    fresh = [rng.choice(ASK).format(topic) for topic in novel]
+    # Embed up front so the timings below are lookups only
+    for question, _ in reworded:
+        cache.embedding(question)
+    for question in fresh:
+        cache.embedding(question)
+
+    def run(questions, settings=SETTINGS):
+        answers, latencies = [], []
+        for question in questions:
+            started = time.perf_counter()
+            answers.append(cache.get(question, settings))
+            latencies.append(time.perf_counter() - started)
+        return answers, latencies
+
+    answers, latencies = run([q for q, _ in reworded])
+    hits = sum(a is not None for a in answers)
+    wrong = sum(a is not None and a != f"answer about {t}" for a, (_, t) in zip(answers, reworded))
+    print(f"reworded questions: hit rate {hits / len(reworded):.1%}, wrong answers {wrong}, "
+          f"lookup p50={percentile(latencies, 0.5):.2f}ms p99={percentile(latencies, 0.99):.2f}ms")
+
+    answers, _ = run(fresh)
+    false_hits = sum(a is not None for a in answers)
+    print(f"new topics:         false hits {false_hits}/{len(fresh)}")
+
+    answers, _ = run([q for q, _ in reworded[:200]], dict(SETTINGS, difficulty='beginner'))
+    print(f"other difficulty:   hits {sum(a is not None for a in answers)}/200 (should be 0)")
+
+    # Same lookups scanning every entry, for recall and latency against IVF
+    centroids, cache.index.centroids = cache.index.centroids, None
+    exact, exact_latencies = run([q for q, _ in reworded])
+    cache.index.centroids = centroids
+    ivf, _ = run([q for q, _ in reworded])
+    agree = sum(a == b for a, b in zip(exact, ivf)) / len(exact)
+    print(f"exact scan:         hit rate {sum(a is not None for a in exact) / len(exact):.1%}, "
+          f"p50={percentile(exact_latencies, 0.5):.2f}ms p99={percentile(exact_latencies, 0.99):.2f}ms, "
+          f"IVF agrees on {agree:.1%}")
+    return 0 if wrong == 0 and false_hits == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Mentaura AI Teacher - LLM single-flight benchmark
+
+Simulates a class opening the same course module at once: --students
+threads call query_gemini with the same "Teach me about X at Y level"
+prompt against the local fake model, first with single-flight disabled
+and then enabled. The response cache is turned off so the only thing
+sharing work is the in-flight coalescing. The same burst is then sent
+through query_gemini_async on the shared event loop.
+
+Usage: python benchmarks/bench_single_flight.py [--students 30] [--modules 3]
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Let the whole burst through the provider guard, and never hit the cache
+os.environ.setdefault('GEMINI_REQUESTS_PER_MINUTE', '1000000')
+os.environ.setdefault('PROVIDER_BURST', '100000')
+os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ai_service import AIService
+from services.fake_llm import FakeGeminiModel
+from services.single_flight import SingleFlight
+from services.async_runtime import run_async
+
+def prompt(index, modules):
+    return f"Teach me about module {index % modules} in biology at intermediate level"
+
+def run_threaded(ai_service, students, modules):
+    barrier = threading.Barrier(students)
+
+    def student(index):
+        barrier.wait()  # everyone clicks at the same moment
+        return ai_service.query_gemini(prompt(index, modules))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=students) as pool:
+        answers = list(pool.map(student, range(students)))
+    return answers, time.perf_counter() - start
+
+def run_async_burst(ai_service, students, modules):
+    async def burst():
+        return await asyncio.gather(*(ai_service.query_gemini_async(prompt(i, modules)) for i in range(students)))
+
+    start = time.perf_counter()
+    answers = run_async(burst())
+    return answers, time.perf_counter() - start
+
+def report(label, model, answers, elapsed, modules):
+    consistent = len(set(answers)) == modules
+    print(f"{label:<16} provider calls={model.calls:4d}  wall={elapsed:5.2f}s  "
+          f"distinct answers={len(set(answers))}{'' if consistent else ' (UNEXPECTED)'}")
+    return consistent
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=30, help='concurrent identical requests')
+    parser.add_argument('--modules', type=int, default=3, help='distinct prompts in the burst')
+    args = parser.parse_args()
+
+    ai_service = AIService()
+    ok = True
+    for label, flights, runner in (
+        ('threads, off', None, run_threaded),
+        ('threads, on', SingleFlight('llm'), run_threaded),
+        ('async, on', SingleFlight('llm'), run_async_burst),
+    ):
+        ai_service.gemini_model = FakeGeminiModel(first_chunk_delay=0.2, chunk_delay=0.02)
+        ai_service.flights = flights
+        answers, elapsed = runner(ai_service, args.students, args.modules)
+        ok = report(label, ai_service.gemini_model, answers, elapsed, args.modules) and ok
+        if flights is not None:
+            print(f"{'':<16} {json.dumps(flights.stats())}")
+
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Mentaura AI Teacher - cold start benchmark
+
+Starts a fresh interpreter per round, imports app (which registers every
+blueprint and builds the shared services) and serves one /health request
+through the test client. Providers are stubbed out: no API keys, the fake
+LLM, and unreadable Google credentials, so any time spent here is startup
+work rather than network calls. The server should be ready to accept
+traffic in under a second.
+
+Usage: python benchmarks/bench_startup.py [--rounds 5] [--budget 1.0]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in the child interpreter
+CHILD = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/health')
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'first_request': served - imported,
+    'status': response.status_code
+}))
+"""
+
+STUBBED_ENV = {
+    'MENTAURA_FAKE_LLM': 'true',
+    'OPENAI_API_KEY': '',
+    'GEMINI_API_KEY': '',
+    'ELEVENLABS_API_KEY': '',
+    'GOOGLE_APPLICATION_CREDENTIALS': os.path.join(BACKEND_DIR, 'missing-credentials.json'),
+    'FIREBASE_CREDENTIALS_PATH': os.path.join(BACKEND_DIR, 'missing-credentials.json'),
+    'PROVIDER_HEALTH_PROBES': 'false',
+    'WARM_UP_IMPORTS': 'false',
+    'AUDIO_CACHE_ENABLED': 'false'
+}
+
+def cold_start():
+    env = dict(os.environ, **STUBBED_ENV)
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    # App startup prints banners; the measurement is the last line
+    lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"cold start failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5, help='cold starts to time')
+    parser.add_argument('--budget', type=float, default=1.0, help='target seconds to first response')
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.rounds)]
+    totals = sorted(run['import'] + run['first_request'] for run in runs)
+    imports = sorted(run['import'] for run in runs)
+    p50 = totals[len(totals) // 2]
+
+    print(f"import app p50:        {imports[len(imports) // 2] * 1000:7.1f}ms")
+    print(f"first response p50:    {p50 * 1000:7.1f}ms")
+    print(f"first response max:    {totals[-1] * 1000:7.1f}ms")
+    print(f"budget:                {args.budget * 1000:7.1f}ms ({'ok' if p50 <= args.budget else 'OVER'})")
+    return 0 if p50 <= args.budget else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Mentaura AI Teacher - Streaming benchmark
+
+Compares time-to-first-word of the streaming path against the blocking
+query_gemini call, using the local fake LLM backend so no network or API
+keys are needed.
+
+Usage: python benchmarks/bench_streaming.py [--requests 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Let every concurrent request through the provider guard
+os.environ.setdefault('GEMINI_REQUESTS_PER_MINUTE', '1000000')
+os.environ.setdefault('PROVIDER_BURST', '100000')
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ai_service import AIService
+from services.fake_llm import FakeGeminiModel
+
+PROMPT = "Teach me about Algebra at intermediate level"
+
+def blocking_request(ai_service):
+    start = time.perf_counter()
+    ai_service.query_gemini(PROMPT, use_cache=False)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+def streaming_request(ai_service):
+    start = time.perf_counter()
+    first_chunk = None
+    for _ in ai_service.stream_gemini(PROMPT, use_cache=False):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    return first_chunk, time.perf_counter() - start
+
+def run(label, func, ai_service, requests):
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        results = list(executor.map(lambda _: func(ai_service), range(requests)))
+    first = sorted(r[0] for r in results)
+    total = sorted(r[1] for r in results)
+    print(f"{label:<10} first word p50={first[len(first) // 2] * 1000:7.1f}ms  "
+          f"complete p50={total[len(total) // 2] * 1000:7.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20, help='concurrent requests per mode')
+    args = parser.parse_args()
+    
+    ai_service = AIService()
+    ai_service.gemini_model = FakeGeminiModel()
+    
+    run('blocking', blocking_request, ai_service, args.requests)
+    run('streaming', streaming_request, ai_service, args.requests)
+
+if __name__ == '__main__':
+    main()
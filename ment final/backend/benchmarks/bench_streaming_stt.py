@@ -0,0 +1,115 @@
+"""
+Mentaura AI Teacher - streaming voice recognition check
+
+Replays a WAV file over the voice_stream_* Socket.IO events at real-time
+pace, the way the browser sends microphone frames, with the WAV replay
+stub standing in for Google streaming recognition and the fake LLM
+answering. Reports how many interim transcripts arrived while "speaking"
+and the delay from the last audio frame to the final transcript and to
+the first answer chunk. Without a --wav a tone is generated for the
+transcript given by --transcript.
+
+Usage: python benchmarks/bench_streaming_stt.py [--wav question.wav] [--frame-ms 100] [--rounds 3]
+"""
+
+import os
+import sys
+import math
+import time
+import wave
+import struct
+import tempfile
+import argparse
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def make_wav(path, transcript, seconds, sample_rate=16000):
+    """A mono LINEAR16 tone with the transcript as its .txt sidecar"""
+    samples = (int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate)) for i in range(int(seconds * sample_rate)))
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b''.join(struct.pack('<h', s) for s in samples))
+    with open(os.path.splitext(path)[0] + '.txt', 'w', encoding='utf-8') as f:
+        f.write(transcript)
+
+def stream_once(client, wav_path, frame_ms, request_id, timeout=30):
+    from services.streaming_stt import replay_wav
+
+    client.emit('voice_stream_start', {'requestId': request_id, 'generateSpeech': False})
+    events = []
+    for frame in replay_wav(wav_path, frame_ms=frame_ms):
+        client.emit('voice_stream_chunk', {'requestId': request_id, 'audio': frame})
+        events.extend((time.perf_counter(), e) for e in client.get_received())
+    speech_ended = time.perf_counter()
+    client.emit('voice_stream_end', {'requestId': request_id})
+
+    deadline = speech_ended + timeout
+    while time.perf_counter() < deadline:
+        events.extend((time.perf_counter(), e) for e in client.get_received())
+        if any(e['name'] in ('ai_stream_done', 'ai_stream_error') for _, e in events):
+            break
+        time.sleep(0.005)
+
+    def first(name):
+        return next(((at, e['args'][0]) for at, e in events if e['name'] == name), (None, None))
+
+    partials = [e['args'][0]['text'] for _, e in events if e['name'] == 'voice_partial']
+    transcript_at, transcript = first('voice_transcript')
+    chunk_at, _ = first('ai_stream_chunk')
+    _, error = first('ai_stream_error')
+    return {
+        'partials': partials,
+        'transcript': transcript and transcript['text'],
+        'to_transcript': transcript_at and transcript_at - speech_ended,
+        'to_first_chunk': chunk_at and chunk_at - speech_ended,
+        'error': error and error['error']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--wav', help='LINEAR16 WAV to replay (transcript from a .txt next to it)')
+    parser.add_argument('--transcript', default='what is photosynthesis and why do plants need sunlight')
+    parser.add_argument('--seconds', type=float, default=3.0, help='length of the generated recording')
+    parser.add_argument('--frame-ms', type=int, default=100, help='audio per voice_stream_chunk')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    wav_path = args.wav
+    if not wav_path:
+        wav_path = os.path.join(tempfile.mkdtemp(prefix='mentaura-stt-'), 'question.wav')
+        make_wav(wav_path, args.transcript, args.seconds)
+
+    # Configure the stubs before the app (and its config) is imported
+    os.environ.update({
+        'STT_STUB_WAV': os.path.abspath(wav_path),
+        'MENTAURA_FAKE_LLM': 'true',
+        'PROVIDER_HEALTH_PROBES': 'false',
+        'WARM_UP_IMPORTS': 'false',
+        'RESPONSE_CACHE_ENABLED': 'false'
+    })
+    sys.path.append(BACKEND_DIR)
+    import app as mentaura_app
+    from services.streaming_stt import WavReplayRecognizer
+
+    expected = WavReplayRecognizer(wav_path).transcript
+    client = mentaura_app.socketio.test_client(mentaura_app.app)
+    failures = 0
+    for round_index in range(args.rounds):
+        result = stream_once(client, wav_path, args.frame_ms, f'bench-{round_index}')
+        ok = result['transcript'] == expected and not result['error']
+        failures += not ok
+        to_transcript = f"{result['to_transcript'] * 1000:7.1f}ms" if result['to_transcript'] is not None else '    n/a'
+        to_chunk = f"{result['to_first_chunk'] * 1000:7.1f}ms" if result['to_first_chunk'] is not None else '    n/a'
+        print(f"round {round_index}: partials={len(result['partials']):<3} "
+              f"end of speech -> transcript {to_transcript}  -> first answer chunk {to_chunk}  "
+              f"{'ok' if ok else 'FAILED: ' + str(result['error'] or result['transcript'])}")
+        if round_index == 0 and result['partials']:
+            print(f"  first partial: {result['partials'][0]!r}")
+            print(f"  last partial:  {result['partials'][-1]!r}")
+    client.disconnect()
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
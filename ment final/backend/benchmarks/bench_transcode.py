@@ -0,0 +1,131 @@
+"""
+Mentaura AI Teacher - audio transcoding benchmark
+
+Converts generated voice-length clips (Opus/WebM as browsers record them,
+and WAV) to MP3 and to WAV from --concurrency request threads,
+comparing the old SpeechService.process_audio (temp .wav in, pydub
+decode, export to a second temp file, read back, delete both) with
+services.audio_transcoder, which pipes the bytes through one ffmpeg
+process. Reports throughput and p50/p99 latency for each, and the time to
+the first chunk when the MP3 is streamed. Needs ffmpeg on the PATH; the
+old path also needs pydub.
+
+Usage: python benchmarks/bench_transcode.py [--clips 40] [--seconds 8] [--concurrency 4]
+"""
+
+import os
+import sys
+import time
+import base64
+import argparse
+import tempfile
+import subprocess
+import threading
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.audio_transcoder import AudioTranscoder
+
+def make_clip(seconds, extension, seed):
+    """A voice-length test clip: a wobbling tone over pink noise"""
+    source = (f"sine=frequency={180 + seed % 60}:duration={seconds},vibrato=f=5:d=0.4[tone];"
+              f"anoisesrc=color=pink:amplitude=0.05:duration={seconds}:seed={seed}[noise];"
+              f"[tone][noise]amix=inputs=2")
+    codec = ["-c:a", "libopus", "-b:a", "32k", "-f", "webm"] if extension == 'webm' else ["-f", "wav"]
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", source,
+                             "-ar", "48000", "-ac", "1"] + codec + ["pipe:1"], capture_output=True, check=True)
+    return result.stdout
+
+def legacy_process_audio(audio_data, target_format):
+    """SpeechService.process_audio before the transcoder, minus the base64 decode"""
+    from pydub import AudioSegment
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as input_file:
+        input_filename = input_file.name
+        input_file.write(audio_data)
+    output_filename = input_filename.replace(".wav", f".{target_format}")
+    audio = AudioSegment.from_file(input_filename)
+    audio.export(output_filename, format=target_format)
+    with open(output_filename, "rb") as output_file:
+        processed_audio = output_file.read()
+    os.unlink(input_filename)
+    os.unlink(output_filename)
+    return base64.b64encode(processed_audio).decode("utf-8")
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * p), len(samples) - 1)] * 1000
+
+def run(convert, clips, concurrency):
+    """Convert every clip from `concurrency` threads; returns (elapsed, latencies)"""
+    pending = list(clips)
+    latencies = []
+    lock = threading.Lock()
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                clip = pending.pop()
+            started = time.perf_counter()
+            convert(clip)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clips', type=int, default=40, help='clips per input format')
+    parser.add_argument('--seconds', type=int, default=8, help='length of each clip')
+    parser.add_argument('--concurrency', type=int, default=4, help='request threads (and ffmpeg workers)')
+    args = parser.parse_args()
+
+    try:
+        import pydub  # noqa: F401
+        has_pydub = True
+    except ImportError:
+        has_pydub = False
+        print("pydub is not installed; only timing the transcoder")
+
+    transcoder = AudioTranscoder(workers=args.concurrency)
+    if not transcoder.available():
+        print("ffmpeg is not on the PATH")
+        return 1
+    inputs = {extension: [make_clip(args.seconds, extension, seed) for seed in range(args.clips)]
+              for extension in ('webm', 'wav')}
+
+    print(f"{args.clips} x {args.seconds}s clips per format, {args.concurrency} threads")
+    print(f"{'conversion':<16} {'impl':<11} {'clips/s':>8} {'p50':>8} {'p99':>8}")
+    for extension, clips in inputs.items():
+        for target in ('mp3', 'wav'):
+            label = f"{extension} -> {target}"
+            impls = [('transcoder', lambda clip: base64.b64encode(transcoder.transcode(clip, target)))]
+            # The old code wrote WAV output over its own input and then deleted it twice, so it
+            # always failed for WAV; only MP3 has a baseline
+            if has_pydub and target != 'wav':
+                impls.insert(0, ('pydub+temp', lambda clip: legacy_process_audio(clip, target)))
+            for impl, convert in impls:
+                elapsed, latencies = run(convert, clips, args.concurrency)
+                print(f"{label:<16} {impl:<11} {len(clips) / elapsed:>8.1f} "
+                      f"{percentile(latencies, 0.5):>6.0f}ms {percentile(latencies, 0.99):>6.0f}ms")
+
+    first_chunk, whole = [], []
+    for clip in inputs['webm'][:10]:
+        started = time.perf_counter()
+        for index, _ in enumerate(transcoder.stream(clip, 'mp3')):
+            if index == 0:
+                first_chunk.append(time.perf_counter() - started)
+        whole.append(time.perf_counter() - started)
+    print(f"streamed webm -> mp3: first chunk p50={percentile(first_chunk, 0.5):.0f}ms, "
+          f"complete p50={percentile(whole, 0.5):.0f}ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Mentaura AI Teacher - Pipelined TTS benchmark
+
+Measures time-to-first-audio for answers of increasing length, comparing
+one whole-answer synthesis call against the sentence-chunked pipeline.
+Synthesis is stubbed with a latency proportional to the text length.
+
+Usage: python benchmarks/bench_tts_pipeline.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.speech_service import SpeechService
+
+SENTENCE = "Photosynthesis turns light, water and carbon dioxide into sugar and oxygen. "
+
+class StubSpeechService(SpeechService):
+    """SpeechService whose synthesis costs 50ms plus 2ms per character"""
+    async def synthesize_speech(self, text, voice_settings=None):
+        await asyncio.sleep(0.05 + len(text) * 0.002)
+        return b"\x00\x00\x00", None
+
+async def whole_answer(service, text):
+    start = time.perf_counter()
+    await service.text_to_speech(text)
+    return time.perf_counter() - start
+
+async def pipelined(service, text):
+    start = time.perf_counter()
+    async for _ in service.text_to_speech_pipeline(text):
+        return time.perf_counter() - start
+
+def main():
+    service = StubSpeechService()
+    print(f"{'sentences':>9}  {'whole':>9}  {'pipeline':>9}")
+    for sentences in (1, 5, 20, 50):
+        text = SENTENCE * sentences
+        whole = asyncio.run(whole_answer(service, text))
+        first = asyncio.run(pipelined(service, text))
+        print(f"{sentences:>9}  {whole * 1000:>7.0f}ms  {first * 1000:>7.0f}ms")
+
+if __name__ == '__main__':
+    main()
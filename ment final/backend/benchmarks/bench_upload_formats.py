@@ -0,0 +1,104 @@
+"""
+Mentaura AI Teacher - base64 JSON vs binary upload benchmark
+
+Compares the two ways media reaches the server: base64 inside a JSON body
+and raw bytes in a multipart/form-data file part. For each payload it
+reports the bytes on the wire and the server CPU spent turning the
+request into usable bytes (body parse plus b64decode where needed), via
+the same read_media_request helper the routes use. The response side
+compares base64 MP3 in JSON with a raw audio/mpeg body.
+
+Usage: python benchmarks/bench_upload_formats.py [--rounds 50]
+"""
+
+import io
+import os
+import sys
+import time
+import base64
+import argparse
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, request, jsonify, Response
+from werkzeug.test import EnvironBuilder
+from utils import read_media_request
+
+PAYLOADS = {
+    'voice 5s (16kHz PCM)': ('audio', 5 * 16000 * 2, 'audio/wav'),
+    'voice 30s (16kHz PCM)': ('audio', 30 * 16000 * 2, 'audio/wav'),
+    'photo 1MB (JPEG)': ('image', 1024 * 1024, 'image/jpeg'),
+}
+ANSWER_MP3_BYTES = 30 * 32000 // 8  # 30s of speech at 32kbps
+
+app = Flask(__name__)
+cpu_samples = []
+
+@app.route('/upload/<field>', methods=['POST'])
+def upload(field):
+    start = time.process_time()
+    _, media, _, _ = read_media_request(request, field)
+    if isinstance(media, str):
+        media = base64.b64decode(media)
+    cpu_samples.append(time.process_time() - start)
+    return jsonify({'bytes': len(media)})
+
+def wire_size(**kwargs):
+    environ = EnvironBuilder(method='POST', **kwargs).get_environ()
+    return int(environ.get('CONTENT_LENGTH') or 0)
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def measure(client, path, rounds, **kwargs):
+    del cpu_samples[:]
+    for _ in range(rounds):
+        # Multipart streams are consumed, so rebuild the body every round
+        body = {k: v() if callable(v) else v for k, v in kwargs.items()}
+        response = client.post(path, **body)
+        assert response.status_code == 200, response.data
+    return median(cpu_samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50, help='requests per format')
+    args = parser.parse_args()
+    client = app.test_client()
+
+    print(f"{'request':<24}{'format':<11}{'wire bytes':>12}{'server cpu':>12}")
+    for label, (field, size, mime_type) in PAYLOADS.items():
+        media = os.urandom(size)
+        encoded = base64.b64encode(media).decode('ascii')
+        path = f'/upload/{field}'
+
+        json_body = {field: encoded, 'uid': 'bench'}
+        multipart = lambda: {field: (io.BytesIO(media), f'upload.{mime_type.split("/")[1]}', mime_type), 'uid': 'bench'}
+
+        json_wire = wire_size(json=json_body)
+        multipart_wire = wire_size(data=multipart())
+        json_cpu = measure(client, path, args.rounds, json=json_body)
+        multipart_cpu = measure(client, path, args.rounds, data=multipart)
+
+        print(f"{label:<24}{'json+b64':<11}{json_wire:>12,}{json_cpu * 1e6:>10.0f}us")
+        print(f"{'':<24}{'multipart':<11}{multipart_wire:>12,}{multipart_cpu * 1e6:>10.0f}us")
+
+    # Response side: 30s spoken answer
+    audio = os.urandom(ANSWER_MP3_BYTES)
+    with app.test_request_context():
+        start = time.process_time()
+        for _ in range(args.rounds):
+            json_response = jsonify({'audio': base64.b64encode(audio).decode('utf-8')}).get_data()
+        json_cpu = (time.process_time() - start) / args.rounds
+        start = time.process_time()
+        for _ in range(args.rounds):
+            raw_response = Response(audio, mimetype='audio/mpeg').get_data()
+        raw_cpu = (time.process_time() - start) / args.rounds
+
+    print()
+    print(f"{'response (30s answer)':<24}{'json+b64':<11}{len(json_response):>12,}{json_cpu * 1e6:>10.0f}us")
+    print(f"{'':<24}{'audio/mpeg':<11}{len(raw_response):>12,}{raw_cpu * 1e6:>10.0f}us")
+
+if __name__ == '__main__':
+    main()
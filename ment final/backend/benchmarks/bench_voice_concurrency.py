@@ -0,0 +1,107 @@
+"""
+Mentaura AI Teacher - concurrent voice request check
+
+Fires many simultaneous voice uploads at the top-level app's
+/process_input and /api/process_voice routes through a stub speech
+recognizer. Each upload carries its own utterance, and the stub "hears"
+whatever bytes it is handed after a random delay, so any shared state
+between requests (such as a fixed temp file) shows up as a request
+getting someone else's transcript. Also checks that no audio files are
+left in the working directory.
+
+Usage: python benchmarks/bench_voice_concurrency.py [--requests 200] [--workers 32]
+"""
+
+import os
+import sys
+import time
+import base64
+import random
+import struct
+import argparse
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+TOP_LEVEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Keep start-up quiet and offline before the app module is imported
+os.environ.setdefault('PROVIDER_HEALTH_PROBES', 'false')
+os.environ.setdefault('WARM_UP_IMPORTS', 'false')
+sys.path.insert(0, TOP_LEVEL_DIR)
+
+import app as mentaura_app
+
+def make_wav(utterance):
+    """A tiny LINEAR16 WAV whose payload is the utterance text"""
+    payload = utterance.encode('utf-8')
+    header = b'RIFF' + struct.pack('<I', 36 + len(payload)) + b'WAVEfmt '
+    header += struct.pack('<IHHIIHH', 16, 1, 1, 16000, 32000, 2, 16)
+    return header + b'data' + struct.pack('<I', len(payload)) + payload
+
+class StubSpeechClient:
+    """Recognizes the utterance embedded in make_wav() audio"""
+    def recognize(self, config, audio):
+        content = bytes(audio.content)
+        time.sleep(random.uniform(0.005, 0.03))  # let requests overlap
+        transcript = content[44:].decode('utf-8')
+        alternative = SimpleNamespace(transcript=transcript)
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+
+def install_stubs():
+    stub_speech = SimpleNamespace(
+        RecognitionAudio=lambda content: SimpleNamespace(content=content),
+        RecognitionConfig=lambda **kwargs: SimpleNamespace(**kwargs)
+    )
+    stub_speech.RecognitionConfig.AudioEncoding = SimpleNamespace(LINEAR16='LINEAR16')
+
+    # Hold the init lock so a background init can't replace the stub client
+    with mentaura_app.speech_clients_lock:
+        mentaura_app.speech = stub_speech
+        mentaura_app.speech_client = StubSpeechClient()
+        mentaura_app.speech_clients_ready = True
+
+    # Echo the transcript instead of calling an LLM or TTS
+    mentaura_app.model = None
+    mentaura_app.handle_text_input = lambda text: mentaura_app.jsonify({'text': text})
+    mentaura_app.generate_ai_response = lambda text, user_id, context=None: f"answer to {text}"
+    mentaura_app.generate_speech = lambda text: {'use_client_tts': True, 'text': text}
+    mentaura_app.generate_structured_notes = lambda text, topic: None
+
+def send(client, index):
+    utterance = f"question number {index}"
+    audio = base64.b64encode(make_wav(utterance)).decode('ascii')
+    if index % 2:
+        response = client.post('/process_input', json={'voice': audio})
+        heard = response.get_json().get('text')
+    else:
+        response = client.post('/api/process_voice', json={'audio': audio, 'userId': f'user-{index}'})
+        heard = response.get_json().get('transcribed')
+    return utterance, heard
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='voice requests to send')
+    parser.add_argument('--workers', type=int, default=32, help='requests in flight at once')
+    args = parser.parse_args()
+
+    install_stubs()
+    before = set(os.listdir('.'))
+    client = mentaura_app.app.test_client()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda i: send(client, i), range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    mismatched = [(sent, heard) for sent, heard in results if sent != heard]
+    leftovers = sorted(name for name in set(os.listdir('.')) - before if name.endswith('.wav'))
+
+    print(f"requests:       {len(results)} ({args.workers} concurrent) in {elapsed * 1000:.0f}ms")
+    print(f"mismatched:     {len(mismatched)}")
+    print(f"leftover files: {', '.join(leftovers) or 'none'}")
+    for sent, heard in mismatched[:5]:
+        print(f"  sent {sent!r}, got {heard!r}")
+    return 1 if mismatched or leftovers else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
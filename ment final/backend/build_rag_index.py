@@ -0,0 +1,76 @@
+"""
+Mentaura AI Teacher - Document Index Builder
+
+Chunks the course documents under DOCUMENTS_PATH (text, Markdown and,
+when pypdf is installed, PDF), embeds the chunks in batches and writes
+the retrieval index to RAG_INDEX_PATH. The AI service memory-maps the
+index and adds the most relevant excerpts to model prompts.
+
+Runs are incremental: only new and changed files are embedded, deleted
+files are dropped, and a server that is already running picks up the
+new index on its next question.
+
+Usage:
+    python build_rag_index.py                   # index new and changed documents
+    python build_rag_index.py --rebuild         # re-embed everything
+    python build_rag_index.py --docs notes/ --index /tmp/notes_index
+    python build_rag_index.py --dry-run         # list what would be embedded
+"""
+
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import ResourceConfig
+from services.rag_index import build_index, scan_documents, _read_manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the document retrieval index")
+    parser.add_argument('--docs', default=ResourceConfig.DOCUMENTS_PATH, help="Documents to index")
+    parser.add_argument('--index', default=ResourceConfig.RAG_INDEX_PATH, help="Where to write the index")
+    parser.add_argument('--chunk-chars', type=int, default=ResourceConfig.RAG_CHUNK_CHARS)
+    parser.add_argument('--chunk-overlap', type=int, default=ResourceConfig.RAG_CHUNK_OVERLAP)
+    parser.add_argument('--batch', type=int, default=64, help="Chunks per embedding request")
+    parser.add_argument('--rebuild', action='store_true', help="Re-embed documents that haven't changed")
+    parser.add_argument('--dry-run', action='store_true', help="Only list new, changed and removed documents")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        indexed = (_read_manifest(args.index) or {}).get('files', {})
+        current = scan_documents(args.docs)
+        for rel, (mtime_ns, size) in sorted(current.items()):
+            entry = indexed.get(rel)
+            if args.rebuild or not entry:
+                print(f"  new      {rel}")
+            elif (entry['mtime_ns'], entry['size']) != (mtime_ns, size):
+                print(f"  changed  {rel}")
+        for rel in sorted(set(indexed) - set(current)):
+            print(f"  removed  {rel}")
+        return 0
+
+    from services.ai_service import setup_ai_models
+    ai_service = setup_ai_models()
+
+    start = time.time()
+    try:
+        summary = build_index(
+            args.docs, args.index, ai_service.generate_embeddings, ai_service.embedding_model,
+            chunk_chars=args.chunk_chars, chunk_overlap=args.chunk_overlap,
+            batch_size=args.batch, rebuild=args.rebuild
+        )
+    except RuntimeError as e:
+        print(f"Error building document index: {e}; the previous index is unchanged")
+        return 1
+
+    print(f"{summary['documents']} documents: {summary['embedded']} embedded, {summary['reused']} unchanged, "
+          f"{summary['removed']} removed; {summary['chunks']} chunks in {args.index} "
+          f"({'updated' if summary['changed'] else 'up to date'}, {time.time() - start:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -23,6 +23,20 @@ class APIConfig:
 class ResourceConfig:
     DOCUMENTS_PATH = os.environ.get('DOCUMENTS_PATH', 'resources/documents')
     MODELS_PATH = os.environ.get('MODELS_PATH', 'resources/models')
+    # Courses, topics and games; shipped with the backend
+    CATALOGUE_PATH = os.environ.get(
+        'CATALOGUE_PATH',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'catalogue.json')
+    )
+    CATALOGUE_MAX_AGE = int(os.environ.get('CATALOGUE_MAX_AGE', 300))  # seconds browsers/CDNs may reuse a response
+    # Retrieval over DOCUMENTS_PATH; the index is built by build_rag_index.py
+    RAG_ENABLED = os.environ.get('RAG_ENABLED', 'True').lower() in ('true', '1', 't')
+    RAG_INDEX_PATH = os.environ.get('RAG_INDEX_PATH', 'resources/rag_index')
+    RAG_TOP_K = int(os.environ.get('RAG_TOP_K', 4))
+    RAG_MIN_SCORE = float(os.environ.get('RAG_MIN_SCORE', 0.78))  # cosine similarity a chunk needs to be used
+    RAG_MAX_CONTEXT_CHARS = int(os.environ.get('RAG_MAX_CONTEXT_CHARS', 4000))
+    RAG_CHUNK_CHARS = int(os.environ.get('RAG_CHUNK_CHARS', 1200))
+    RAG_CHUNK_OVERLAP = int(os.environ.get('RAG_CHUNK_OVERLAP', 200))
 
 class AppConfig:
     DEBUG = os.environ.get('DEBUG', 'True').lower() in ('true', '1', 't')
@@ -31,6 +45,7 @@ class AppConfig:
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 3600))  # 1 hour
+    WARM_UP_IMPORTS = os.environ.get('WARM_UP_IMPORTS', 'True').lower() in ('true', '1', 't')  # load speech SDKs in the background after startup
 
 class AIConfig:
     DEFAULT_SETTINGS = {
@@ -50,6 +65,75 @@ class SpeechConfig:
         "speaking_rate": 1.0,
         "pitch": 0.0
     }
+    TTS_PIPELINE_CONCURRENCY = int(os.environ.get('TTS_PIPELINE_CONCURRENCY', 4))
+    TTS_SEGMENT_MAX_CHARS = int(os.environ.get('TTS_SEGMENT_MAX_CHARS', 300))
+    # Streaming recognition (voice_stream_* socket events)
+    STT_SAMPLE_RATE = int(os.environ.get('STT_SAMPLE_RATE', 16000))
+    STT_STREAM_IDLE_TIMEOUT = float(os.environ.get('STT_STREAM_IDLE_TIMEOUT', 10))
+    STT_STREAM_MAX_SECONDS = int(os.environ.get('STT_STREAM_MAX_SECONDS', 120))
+    # Replay this WAV through a local stub recognizer instead of Google
+    STT_STUB_WAV = os.environ.get('STT_STUB_WAV')
+    # Audio format conversion (services/audio_transcoder.py)
+    FFMPEG_PATH = os.environ.get('FFMPEG_PATH', 'ffmpeg')
+    TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', 4))  # concurrent ffmpeg processes
+    TRANSCODE_TIMEOUT = float(os.environ.get('TRANSCODE_TIMEOUT', 30))
+
+class LLMConfig:
+    FAKE_LLM = os.environ.get('MENTAURA_FAKE_LLM', 'False').lower() in ('true', '1', 't')
+    FAKE_LLM_FIRST_CHUNK_DELAY = float(os.environ.get('FAKE_LLM_FIRST_CHUNK_DELAY', 0.2))
+    FAKE_LLM_CHUNK_DELAY = float(os.environ.get('FAKE_LLM_CHUNK_DELAY', 0.05))
+    FANOUT_WORKERS = int(os.environ.get('LLM_FANOUT_WORKERS', 8))
+    CALL_TIMEOUT = float(os.environ.get('LLM_CALL_TIMEOUT', 60))
+    SINGLE_FLIGHT_ENABLED = os.environ.get('LLM_SINGLE_FLIGHT', 'True').lower() in ('true', '1', 't')  # share identical in-flight prompts
+
+class CacheConfig:
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() in ('true', '1', 't')
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 86400))  # 1 day
+    RESPONSE_CACHE_DB_PATH = os.environ.get('RESPONSE_CACHE_DB_PATH', '')  # Empty disables the SQLite tier
+    AUDIO_CACHE_ENABLED = os.environ.get('AUDIO_CACHE_ENABLED', 'True').lower() in ('true', '1', 't')
+    AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', 'audio_cache')
+    AUDIO_CACHE_MAX_BYTES = int(os.environ.get('AUDIO_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+    BOOK_SEARCH_TTL = int(os.environ.get('BOOK_SEARCH_TTL', 3600))
+    BOOK_SEARCH_STALE_TTL = int(os.environ.get('BOOK_SEARCH_STALE_TTL', 86400))  # served when Open Library is failing
+    BOOK_SEARCH_MAX_ENTRIES = int(os.environ.get('BOOK_SEARCH_MAX_ENTRIES', 2000))
+    SEMANTIC_CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE_ENABLED', 'False').lower() in ('true', '1', 't')  # costs one embedding call per uncached question
+    SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', 0.93))  # cosine similarity needed to reuse an answer
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', 20000))
+    SEMANTIC_CACHE_TTL = int(os.environ.get('SEMANTIC_CACHE_TTL', 86400))
+
+class ProviderConfig:
+    GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 60))
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', 60))
+    TTS_REQUESTS_PER_MINUTE = int(os.environ.get('TTS_REQUESTS_PER_MINUTE', 300))
+    BURST = int(os.environ.get('PROVIDER_BURST', 10))
+    FAILURE_THRESHOLD = int(os.environ.get('PROVIDER_FAILURE_THRESHOLD', 5))
+    RECOVERY_TIMEOUT = float(os.environ.get('PROVIDER_RECOVERY_TIMEOUT', 30))  # seconds the circuit stays open
+    HEALTH_PROBES_ENABLED = os.environ.get('PROVIDER_HEALTH_PROBES', 'True').lower() in ('true', '1', 't')
+    HEALTH_PROBE_INTERVAL = int(os.environ.get('PROVIDER_HEALTH_PROBE_INTERVAL', 300))  # seconds, 0 probes once
+
+class StorageConfig:
+    USER_DATA_DIR = os.environ.get('USER_DATA_DIR', 'user_data')
+    EVENT_LOG_FSYNC_INTERVAL = float(os.environ.get('EVENT_LOG_FSYNC_INTERVAL', 0.05))  # seconds between batched fsyncs
+    EVENT_LOG_COMPACT_EVERY = int(os.environ.get('EVENT_LOG_COMPACT_EVERY', 200))  # events before folding into the snapshot
+    PROGRESS_DB_PATH = os.environ.get('PROGRESS_DB_PATH', os.path.join(USER_DATA_DIR, 'progress.db'))
+    QUESTION_BANK_ENABLED = os.environ.get('QUESTION_BANK_ENABLED', 'True').lower() in ('true', '1', 't')
+    QUESTION_BANK_DB_PATH = os.environ.get('QUESTION_BANK_DB_PATH', os.path.join(USER_DATA_DIR, 'question_bank.db'))  # filled by pregenerate_questions.py
+
+class HttpConfig:
+    # Pooled keep-alive sessions for outbound provider calls (services/http_pool.py)
+    POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))  # connections kept per host
+    CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+    READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 60))
+    RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', 0.5))
+    OPENLIBRARY_READ_TIMEOUT = float(os.environ.get('OPENLIBRARY_READ_TIMEOUT', 10))
+    OPENLIBRARY_URL = os.environ.get('OPENLIBRARY_URL', 'https://openlibrary.org')
+
+class AsyncConfig:
+    HTTP_POOL_SIZE = int(os.environ.get('ASYNC_HTTP_POOL_SIZE', 100))  # open connections across all providers
+    HTTP_TIMEOUT = float(os.environ.get('ASYNC_HTTP_TIMEOUT', 30))
+    BLOCKING_THREADS = int(os.environ.get('ASYNC_BLOCKING_THREADS', 64))  # threads for SDKs without async clients
 
 class GameConfig:
     MAX_QUESTIONS = int(os.environ.get('MAX_GAME_QUESTIONS', 20))
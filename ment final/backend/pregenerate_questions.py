@@ -0,0 +1,196 @@
+"""
+Mentaura AI Teacher - Question Bank Pre-generation
+
+Walks the course catalogue (every course topic and subtopic, and every
+learning topic and subtopic) at each difficulty level, generates practice
+questions and math challenge sets with bounded concurrency, validates
+them and stores them in the question bank. The AI service and game
+routes read the bank before calling a model, so these common requests
+become a local lookup.
+
+Sets already in the bank are skipped unless --refresh is given, so an
+interrupted run can simply be started again.
+
+Usage:
+    python pregenerate_questions.py                        # whole catalogue
+    python pregenerate_questions.py --course math101 --concurrency 2
+    python pregenerate_questions.py --kind math --refresh
+    python pregenerate_questions.py --dry-run              # list what would be generated
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config import ResourceConfig, StorageConfig
+from services.provider_guard import TokenBucket
+from services.question_bank import DIFFICULTIES, QuestionBank, normalize_subject, validate_practice_text
+
+# The math challenge's default topic, plus anything mathematical in the catalogue
+MATH_DEFAULT_TOPIC = 'general math'
+MATH_COURSE_IDS = ('math101',)
+MATH_TOPIC_IDS = ('math',)
+
+
+def learning_subjects(data, course_ids=None):
+    """Subjects in the form learn_topic passes to generate_practice_questions"""
+    subjects = []
+    for course_id, course in data.get('courseDetails', {}).items():
+        if course_ids and course_id not in course_ids:
+            continue
+        for topic in course.get('topics', []):
+            subjects.append(topic['title'])
+            subjects.extend(f"{subtopic} in {topic['title']}" for subtopic in topic.get('subtopics', []))
+    if not course_ids:
+        for topic in data.get('topics', []):
+            subjects.append(topic['title'])
+            subjects.extend(f"{subtopic} in {topic['title']}" for subtopic in topic.get('subtopics', []))
+
+    # Course and learning topics overlap ("Algebra", "Calculus", ...)
+    unique = {}
+    for subject in subjects:
+        unique.setdefault(normalize_subject(subject), subject)
+    return list(unique.values())
+
+
+def math_topics(data, course_ids=None):
+    """Topics the math challenge is likely to be asked about"""
+    topics = [MATH_DEFAULT_TOPIC]
+    for course_id in MATH_COURSE_IDS:
+        if course_ids and course_id not in course_ids:
+            continue
+        for topic in data.get('courseDetails', {}).get(course_id, {}).get('topics', []):
+            topics.append(topic['title'])
+            topics.extend(topic.get('subtopics', []))
+    for topic in data.get('topics', []):
+        if topic.get('id') in MATH_TOPIC_IDS and not course_ids:
+            topics.extend(topic.get('subtopics', []))
+
+    unique = {}
+    for topic in topics:
+        unique.setdefault(normalize_subject(topic), topic)
+    return list(unique.values())
+
+
+def build_jobs(args, bank):
+    with open(ResourceConfig.CATALOGUE_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    subjects = learning_subjects(data, args.course)
+
+    jobs = []
+    if args.kind in ('all', 'practice'):
+        for subject in subjects:
+            for difficulty in args.difficulty:
+                jobs.append(('practice', subject, difficulty, args.count))
+    if args.kind in ('all', 'math'):
+        # The game only asks the model for advanced questions
+        for topic in math_topics(data, args.course):
+            jobs.append(('math', topic, 'advanced', args.math_count))
+
+    if not args.refresh:
+        jobs = [job for job in jobs if not bank.has(job[0], job[1], job[2])]
+    return jobs
+
+
+class ProviderPacer:
+    """Holds model calls back to the rate the provider guard admits them
+
+    The AI service turns a guard rejection into a "try again" reply, which
+    would fail validation and use up a retry, so every call first takes a
+    token from a bucket refilled at the guard's own rate and waits out an
+    open circuit.
+    """
+    def __init__(self, guard):
+        self.guard = guard
+        self.bucket = TokenBucket(guard.bucket.rate, guard.bucket.capacity)
+
+    def wait(self):
+        while True:
+            delay = self.guard.breaker.retry_after()
+            if not delay and self.bucket.try_acquire():
+                return
+            time.sleep(max(delay, self.bucket.retry_after(), 0.05))
+
+
+def generate(ai_service, pacer, kind, subject, difficulty, count, retries):
+    """Generate and validate one question set, retrying unusable output; returns the payload or None"""
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(2 ** attempt)
+        pacer.wait()
+        if kind == 'practice':
+            payload = validate_practice_text(ai_service.generate_practice_questions(
+                subject, difficulty, count, use_bank=False, use_cache=attempt == 0
+            ))
+        else:
+            payload = ai_service.generate_math_questions(
+                subject, count, level=difficulty, use_bank=False, use_cache=attempt == 0
+            )
+        if payload:
+            return payload
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate practice and math question banks")
+    parser.add_argument('--kind', choices=('all', 'practice', 'math'), default='all')
+    parser.add_argument('--course', action='append', help="Course ID to cover (repeatable, default: whole catalogue)")
+    parser.add_argument('--difficulty', action='append', choices=DIFFICULTIES,
+                        help="Difficulty for practice questions (repeatable, default: all)")
+    parser.add_argument('--count', type=int, default=5, help="Practice questions per set (what the routes ask for)")
+    parser.add_argument('--math-count', type=int, default=10, help="Math questions per set; smaller requests are sliced")
+    parser.add_argument('--concurrency', type=int, default=4, help="Model calls in flight at once")
+    parser.add_argument('--retries', type=int, default=2, help="Extra attempts for output that fails validation")
+    parser.add_argument('--refresh', action='store_true', help="Regenerate sets that are already in the bank")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the sets that would be generated")
+    args = parser.parse_args()
+    args.difficulty = args.difficulty or list(DIFFICULTIES)
+
+    bank = QuestionBank(StorageConfig.QUESTION_BANK_DB_PATH)
+    jobs = build_jobs(args, bank)
+    print(f"{len(jobs)} question sets to generate into {StorageConfig.QUESTION_BANK_DB_PATH}")
+    if args.dry_run:
+        for kind, subject, difficulty, count in jobs:
+            print(f"  {kind:<8} {difficulty:<12} {count:3d}  {subject}")
+        return 0
+    if not jobs:
+        return 0
+
+    from services.ai_service import gemini_guard, openai_guard, setup_ai_models
+    ai_service = setup_ai_models()
+    pacer = ProviderPacer(gemini_guard if ai_service.gemini_model else openai_guard)
+
+    stored = failed = 0
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = {
+            pool.submit(generate, ai_service, pacer, kind, subject, difficulty, count, args.retries):
+                (kind, subject, difficulty, count)
+            for kind, subject, difficulty, count in jobs
+        }
+        for future in as_completed(futures):
+            kind, subject, difficulty, count = futures[future]
+            try:
+                payload = future.result()
+            except Exception as e:
+                print(f"Error generating {kind} for {subject!r} ({difficulty}): {e}")
+                payload = None
+            if payload and bank.put(kind, subject, difficulty, count, payload):
+                stored += 1
+            else:
+                failed += 1
+                print(f"  failed: {kind} {difficulty} {subject!r}")
+            done = stored + failed
+            if done % 10 == 0 or done == len(jobs):
+                print(f"{done}/{len(jobs)} done ({stored} stored, {failed} failed, {time.time() - start:.0f}s)")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 import os
 import sys
 import json
@@ -11,141 +11,174 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Import service modules
 from services.ai_service import setup_ai_models
-from services.speech_service import setup_speech_services
+from services.speech_service import setup_speech_services, transcription_failed
+from services.async_runtime import run_async
 from services.auth_service import get_user_profile, store_user_learning_data
+from utils import read_media_request
 
-# Initialize AI models
+# Shared AI service (created once, by whichever module imports first)
 ai_service = setup_ai_models()
 
-# Initialize speech services
+# Shared speech service
 speech_service = setup_speech_services()
 
 # Create a Blueprint for AI routes
 ai_bp = Blueprint('ai', __name__)
 
+# Built by hand rather than with url_for: speech_payload runs on the shared
+# event loop, outside any Flask request context
+AUDIO_PATH = '/api/ai/audio/'
+
+async def speech_payload(text, settings, binary):
+    """Synthesize text for a response body
+    
+    Binary (multipart) clients get an audioUrl they can fetch as raw MP3;
+    JSON clients get base64 audio inline, as before.
+    """
+    audio, cache_key = await speech_service.synthesize_speech(text, voice_settings=settings)
+    if not audio:
+        return {}
+    if binary and cache_key:
+        return {'audioUrl': AUDIO_PATH + cache_key}
+    return {'audio': base64.b64encode(audio).decode('utf-8')}
+
+@ai_bp.route('/audio/<key>', methods=['GET'])
+def get_audio(key):
+    """Serve synthesized speech as raw MP3 from the audio cache"""
+    audio = speech_service.get_cached_audio(key) if len(key) == 64 else None
+    if audio is None:
+        return jsonify({'error': 'Audio not found'}), 404
+    response = Response(audio, mimetype='audio/mpeg')
+    # Keys are content hashes of the synthesis inputs, so the bytes never change
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+async def user_settings_for(user_id, settings):
+    """Fall back to the user's saved preferences when a request has no settings"""
+    if user_id and not settings:
+        user_profile = await asyncio.to_thread(get_user_profile, user_id)
+        if user_profile and 'preferences' in user_profile:
+            return user_profile['preferences']
+    return settings
+
+async def answer_text(data):
+    """Shared body of POST /process-text for the Flask view and the ASGI app
+    
+    Returns (body, status). Model and TTS calls are awaited on the shared
+    event loop; Firestore lookups and history writes run in its thread pool.
+    """
+    if not data or 'text' not in data:
+        return {'error': 'Text input is required'}, 400
+    
+    text_input = data['text']
+    user_id = data.get('uid')
+    settings = await user_settings_for(user_id, data.get('settings'))
+    
+    # Generate AI response
+    response_text = await ai_service.query_gemini_async(
+        text_input,
+        user_settings=settings,
+        use_cache=not data.get('noCache', False),
+        semantic=True
+    )
+    
+    # Generate speech if requested
+    audio_response = None
+    if data.get('generateSpeech'):
+        audio_response = await speech_service.text_to_speech(response_text, voice_settings=settings)
+    
+    # Store interaction in user history if user_id is provided
+    if user_id:
+        await asyncio.to_thread(store_user_learning_data, user_id, {
+            'timestamp': datetime.now().isoformat(),
+            'userInput': text_input,
+            'aiResponse': response_text,
+            'topic': extract_topic(text_input, response_text),
+            'type': 'text'
+        })
+    
+    response = {
+        'text': response_text
+    }
+    
+    if audio_response:
+        response['audio'] = audio_response
+    
+    return response, 200
+
+async def answer_voice(data, audio_input, binary=False):
+    """Shared body of POST /process-voice; returns (body, status)"""
+    if not audio_input:
+        return {'error': 'Audio input is required'}, 400
+    
+    user_id = data.get('uid')
+    settings = await user_settings_for(user_id, data.get('settings'))
+    
+    # Convert speech to text
+    text_input = await speech_service.speech_to_text(audio_input)
+    
+    if transcription_failed(text_input):
+        return {'error': 'Failed to transcribe audio'}, 400
+    
+    # Generate AI response, then the speech response
+    response_text = await ai_service.query_gemini_async(text_input, user_settings=settings, semantic=True)
+    audio_response = await speech_payload(response_text, settings, binary)
+    
+    # Store interaction in user history if user_id is provided
+    if user_id:
+        await asyncio.to_thread(store_user_learning_data, user_id, {
+            'timestamp': datetime.now().isoformat(),
+            'userInput': text_input,
+            'aiResponse': response_text,
+            'topic': extract_topic(text_input, response_text),
+            'type': 'voice'
+        })
+    
+    response = {
+        'text': response_text,
+        'transcribed': text_input,
+        'audio': None
+    }
+    response.update(audio_response)
+    
+    return response, 200
+
 @ai_bp.route('/process-text', methods=['POST'])
 def process_text():
     """Process user's text message and generate AI response"""
     try:
-        data = request.json
-        
-        if not data or 'text' not in data:
-            return jsonify({'error': 'Text input is required'}), 400
-        
-        text_input = data['text']
-        user_id = data.get('uid')
-        context = data.get('context', '')
-        settings = data.get('settings')
-        
-        # Get user settings if available
-        if user_id and not settings:
-            user_profile = get_user_profile(user_id)
-            if user_profile and 'preferences' in user_profile:
-                settings = user_profile['preferences']
-        
-        # Generate AI response
-        response_text = ai_service.query_gemini(text_input, user_settings=settings)
-        
-        # Generate speech if requested
-        audio_response = None
-        if 'generateSpeech' in data and data['generateSpeech']:
-            audio_response = asyncio.run(speech_service.text_to_speech(response_text, voice_settings=settings))
-        
-        # Store interaction in user history if user_id is provided
-        if user_id:
-            # Extract topic from conversation
-            topic = extract_topic(text_input, response_text)
-            
-            # Store interaction in history
-            interaction_data = {
-                'timestamp': datetime.now().isoformat(),
-                'userInput': text_input,
-                'aiResponse': response_text,
-                'topic': topic,
-                'type': 'text'
-            }
-            
-            store_user_learning_data(user_id, interaction_data)
-        
-        # Return response
-        response = {
-            'text': response_text
-        }
-        
-        if audio_response:
-            response['audio'] = audio_response
-        
-        return jsonify(response)
-        
+        body, status = run_async(answer_text(request.json))
+        return jsonify(body), status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/process-voice', methods=['POST'])
-async def process_voice():
-    """Process user's voice input and generate AI response with voice"""
+def process_voice():
+    """Process user's voice input and generate AI response with voice
+    
+    Accepts JSON with base64 audio, or multipart/form-data with an 'audio'
+    file part (uid and settings as form fields).
+    """
     try:
-        data = request.json
-        
-        if not data or 'audio' not in data:
-            return jsonify({'error': 'Audio input is required'}), 400
-        
-        audio_input = data['audio']
-        user_id = data.get('uid')
-        settings = data.get('settings')
-        
-        # Get user settings if available
-        if user_id and not settings:
-            user_profile = get_user_profile(user_id)
-            if user_profile and 'preferences' in user_profile:
-                settings = user_profile['preferences']
-        
-        # Convert speech to text
-        text_input = await speech_service.speech_to_text(audio_input)
-        
-        if not text_input or text_input.startswith('Failed to convert'):
-            return jsonify({'error': 'Failed to transcribe audio'}), 400
-        
-        # Generate AI response
-        response_text = ai_service.query_gemini(text_input, user_settings=settings)
-        
-        # Generate speech response
-        audio_response = await speech_service.text_to_speech(response_text, voice_settings=settings)
-        
-        # Store interaction in user history if user_id is provided
-        if user_id:
-            # Extract topic from conversation
-            topic = extract_topic(text_input, response_text)
-            
-            # Store interaction in history
-            interaction_data = {
-                'timestamp': datetime.now().isoformat(),
-                'userInput': text_input,
-                'aiResponse': response_text,
-                'topic': topic,
-                'type': 'voice'
-            }
-            
-            store_user_learning_data(user_id, interaction_data)
-        
-        return jsonify({
-            'text': response_text,
-            'transcribed': text_input,
-            'audio': audio_response
-        })
-        
+        data, audio_input, _, binary = read_media_request(request, 'audio')
+        body, status = run_async(answer_voice(data, audio_input, binary))
+        return jsonify(body), status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/process-image', methods=['POST'])
 def process_image():
-    """Process user's image input and generate AI response"""
+    """Process user's image input and generate AI response
+    
+    Accepts JSON with a base64 image, or multipart/form-data with an
+    'image' file part (text, uid and settings as form fields).
+    """
     try:
-        data = request.json
+        data, image_input, image_mime_type, binary = read_media_request(request, 'image')
         
-        if not data or 'image' not in data:
+        if not image_input:
             return jsonify({'error': 'Image input is required'}), 400
         
-        image_input = data['image']
         text_input = data.get('text', 'What is shown in this image?')
         user_id = data.get('uid')
         settings = data.get('settings')
@@ -157,12 +190,14 @@ def process_image():
                 settings = user_profile['preferences']
         
         # Generate AI response
-        response_text = ai_service.query_gemini(text_input, image=image_input, user_settings=settings)
+        response_text = ai_service.query_gemini(
+            text_input, image=image_input, user_settings=settings, image_mime_type=image_mime_type, semantic=True
+        )
         
-        # Generate speech if requested
-        audio_response = None
-        if 'generateSpeech' in data and data['generateSpeech']:
-            audio_response = asyncio.run(speech_service.text_to_speech(response_text, voice_settings=settings))
+        # Generate speech if requested (form fields arrive as strings)
+        audio_response = {}
+        if str(data.get('generateSpeech', '')).lower() in ('true', '1'):
+            audio_response = run_async(speech_payload(response_text, settings, binary))
         
         # Store interaction in user history if user_id is provided
         if user_id:
@@ -185,9 +220,7 @@ def process_image():
         response = {
             'text': response_text
         }
-        
-        if audio_response:
-            response['audio'] = audio_response
+        response.update(audio_response)
         
         return jsonify(response)
         
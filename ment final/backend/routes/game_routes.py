@@ -11,87 +11,33 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Import service modules
 from services.ai_service import setup_ai_models
 from services.auth_service import get_user_profile, store_user_learning_data
+from services.catalogue import get_catalogue
+from services.math_generator import math_question_batch, capacity
+from config import ResourceConfig
+from utils import precompiled_response
 
-# Initialize AI models
+# Shared AI service (created once, by whichever module imports first)
 ai_service = setup_ai_models()
 
+# Game list, serialized once at startup
+catalogue = get_catalogue()
+
 # Create a Blueprint for game routes
 game_bp = Blueprint('games', __name__)
 
 @game_bp.route('/list', methods=['GET'])
 def list_games():
-    """Get list of available educational games"""
+    """Get list of available educational games, optionally filtered by ?category="""
     try:
-        # For now, we'll return a hardcoded list of games
-        # In a real application, this would be fetched from a database
-        games = [
-            {
-                'id': 'math-challenge',
-                'title': 'Math Challenge',
-                'description': 'Test your math skills with fun puzzles',
-                'image': 'https://source.unsplash.com/random/300x200/?math',
-                'category': 'mathematics',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'word-wizard',
-                'title': 'Word Wizard',
-                'description': 'Expand your vocabulary through play',
-                'image': 'https://source.unsplash.com/random/300x200/?words',
-                'category': 'language',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'science-explorer',
-                'title': 'Science Explorer',
-                'description': 'Discover scientific concepts through interactive experiments',
-                'image': 'https://source.unsplash.com/random/300x200/?science',
-                'category': 'science',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'knowledge-quiz',
-                'title': 'Knowledge Quiz',
-                'description': 'Test your knowledge across various subjects',
-                'image': 'https://source.unsplash.com/random/300x200/?quiz',
-                'category': 'general',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'code-master',
-                'title': 'Code Master',
-                'description': 'Solve programming challenges and learn to code',
-                'image': 'https://source.unsplash.com/random/300x200/?programming',
-                'category': 'programming',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'memory-master',
-                'title': 'Memory Master',
-                'description': 'Boost cognitive skills with memory and pattern exercises',
-                'image': 'https://source.unsplash.com/random/300x200/?brain',
-                'category': 'cognitive',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'history-quest',
-                'title': 'History Quest',
-                'description': 'Explore historical events through interactive scenarios',
-                'image': 'https://source.unsplash.com/random/300x200/?history',
-                'category': 'history',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            },
-            {
-                'id': 'language-lab',
-                'title': 'Language Lab',
-                'description': 'Learn new languages through interactive exercises',
-                'image': 'https://source.unsplash.com/random/300x200/?language',
-                'category': 'languages',
-                'difficulty_levels': ['beginner', 'intermediate', 'advanced']
-            }
-        ]
+        category = request.args.get('category')
+        if category:
+            entry = catalogue.games_by_category.get(category)
+            if entry is None:
+                return jsonify({'games': []})
+        else:
+            entry = catalogue.games
         
-        return jsonify({'games': games})
+        return precompiled_response(entry, request, ResourceConfig.CATALOGUE_MAX_AGE)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -105,14 +51,18 @@ def math_challenge():
         count = data.get('count', 5)
         topic = data.get('topic', 'general math')
         user_id = data.get('uid')
+        # The same seed always gives the same worksheet
+        seed = data.get('seed')
+        if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+            return jsonify({'error': 'seed must be a non-negative integer'}), 400
         
         # Generate math questions based on difficulty and topic
         if difficulty == 'beginner':
-            questions = generate_beginner_math_questions(count, topic)
+            questions = generate_beginner_math_questions(count, topic, seed)
         elif difficulty == 'advanced':
             questions = generate_advanced_math_questions(count, topic)
         else:  # intermediate
-            questions = generate_intermediate_math_questions(count, topic)
+            questions = generate_intermediate_math_questions(count, topic, seed)
         
         # Store game session in user history if user_id is provided
         if user_id:
@@ -370,125 +320,21 @@ def memory_master():
         return jsonify({'error': str(e)}), 500
 
 # Helper functions for math challenge
-def generate_beginner_math_questions(count, topic):
-    """Generate beginner-level math questions"""
-    questions = []
-    
-    # Generate addition, subtraction, and multiplication questions
-    operations = ['+', '-', '*']
-    
-    for i in range(count):
-        operation = random.choice(operations)
-        num1 = random.randint(1, 20)
-        num2 = random.randint(1, 10)
-        
-        if operation == '+':
-            question = f"What is {num1} + {num2}?"
-            answer = num1 + num2
-        elif operation == '-':
-            # Ensure positive result for beginners
-            if num1 < num2:
-                num1, num2 = num2, num1
-            question = f"What is {num1} - {num2}?"
-            answer = num1 - num2
-        else:  # multiplication
-            question = f"What is {num1} × {num2}?"
-            answer = num1 * num2
-        
-        questions.append({
-            'id': f"math-{i+1}",
-            'question': question,
-            'type': 'number',
-            'answer': str(answer)
-        })
-    
-    return questions
+def generate_beginner_math_questions(count, topic, seed=None):
+    """Generate beginner-level math questions (addition, subtraction, multiplication)"""
+    return math_question_batch(min(count, capacity('beginner')), 'beginner', seed=seed)
 
-def generate_intermediate_math_questions(count, topic):
-    """Generate intermediate-level math questions"""
-    questions = []
-    
-    # Generate more complex operations including division and exponents
-    operations = ['+', '-', '*', '/', 'exponent']
-    
-    for i in range(count):
-        operation = random.choice(operations)
-        
-        if operation == '+':
-            num1 = random.randint(10, 100)
-            num2 = random.randint(10, 100)
-            question = f"Calculate {num1} + {num2}"
-            answer = num1 + num2
-        elif operation == '-':
-            num1 = random.randint(50, 150)
-            num2 = random.randint(10, 50)
-            question = f"Calculate {num1} - {num2}"
-            answer = num1 - num2
-        elif operation == '*':
-            num1 = random.randint(5, 20)
-            num2 = random.randint(5, 20)
-            question = f"Calculate {num1} × {num2}"
-            answer = num1 * num2
-        elif operation == '/':
-            # Ensure clean division for intermediate level
-            num2 = random.randint(2, 10)
-            num1 = num2 * random.randint(2, 10)
-            question = f"Calculate {num1} ÷ {num2}"
-            answer = num1 // num2
-        else:  # exponent
-            base = random.randint(2, 10)
-            exponent = random.randint(2, 3)
-            question = f"Calculate {base}^{exponent} (power)"
-            answer = base ** exponent
-        
-        questions.append({
-            'id': f"math-{i+1}",
-            'question': question,
-            'type': 'number',
-            'answer': str(answer)
-        })
-    
-    return questions
+def generate_intermediate_math_questions(count, topic, seed=None):
+    """Generate intermediate-level math questions, including division and exponents"""
+    return math_question_batch(min(count, capacity('intermediate')), 'intermediate', seed=seed)
 
 def generate_advanced_math_questions(count, topic):
     """Generate advanced-level math questions using AI"""
-    questions = []
+    # Pre-generated sets are served from the question bank without a model call
+    questions = ai_service.generate_math_questions(topic, count, level='advanced')
     
-    # Use AI to generate advanced math questions based on topic
-    prompt = f"""Generate {count} advanced-level math questions about {topic}.
-    For each question, provide:
-    1. A clear and concise question
-    2. The correct answer (must be a numerical value)
-    
-    Example format:
-    [
-      {{
-        "id": "math-1",
-        "question": "Calculate the derivative of f(x) = x^3 + 2x^2 - 4x + 7 at x = 2",
-        "type": "number",
-        "answer": "22"
-      }}
-    ]"""
-    
-    try:
-        response = ai_service.query_gemini(prompt)
-        
-        # Try to parse the response as JSON
-        try:
-            parsed_questions = json.loads(response)
-            
-            if isinstance(parsed_questions, list) and len(parsed_questions) > 0:
-                questions = parsed_questions
-            else:
-                # Fallback to manually generated questions
-                questions = generate_intermediate_math_questions(count, topic)
-                
-        except json.JSONDecodeError:
-            # Fallback to manually generated questions
-            questions = generate_intermediate_math_questions(count, topic)
-            
-    except Exception as e:
-        print(f"Error generating math questions: {e}")
+    if not questions:
+        # Fallback to manually generated questions
         questions = generate_intermediate_math_questions(count, topic)
     
     return questions
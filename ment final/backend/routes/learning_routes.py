@@ -4,7 +4,7 @@ import sys
 import json
 from datetime import datetime
 import asyncio
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,13 +12,43 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Import service modules
 from services.ai_service import setup_ai_models
 from services.auth_service import (
-    get_user_profile, store_user_learning_data, get_user_learning_history,
-    get_user_learning_data
+    get_user_profile, store_user_learning_data,
+    get_user_learning_data, save_user_learning_data, get_user_progress
 )
+from config import LLMConfig, HttpConfig, CacheConfig, ResourceConfig
+from utils import fan_out, precompiled_response
+from services.http_pool import get_session
+from services.book_search import BookSearch, SearchUnavailable
+from services.catalogue import get_catalogue
 
-# Initialize AI models
+# Shared AI service (created once, by whichever module imports first)
 ai_service = setup_ai_models()
 
+# Bounded pool for running independent LLM generations side by side
+llm_executor = ThreadPoolExecutor(max_workers=LLMConfig.FANOUT_WORKERS, thread_name_prefix='llm-fanout')
+
+# Keep-alive connections to the Open Library search API
+openlibrary_http = get_session(
+    'openlibrary',
+    pool_size=HttpConfig.POOL_SIZE,
+    connect_timeout=HttpConfig.CONNECT_TIMEOUT,
+    read_timeout=HttpConfig.OPENLIBRARY_READ_TIMEOUT,
+    retries=HttpConfig.RETRIES,
+    backoff=HttpConfig.RETRY_BACKOFF
+)
+
+# Cached, coalesced book search on top of that session
+book_search = BookSearch(
+    openlibrary_http,
+    base_url=HttpConfig.OPENLIBRARY_URL,
+    ttl=CacheConfig.BOOK_SEARCH_TTL,
+    max_entries=CacheConfig.BOOK_SEARCH_MAX_ENTRIES,
+    stale_ttl=CacheConfig.BOOK_SEARCH_STALE_TTL
+)
+
+# Courses and topics, serialized once at startup
+catalogue = get_catalogue()
+
 # Create a Blueprint for learning routes
 learning_bp = Blueprint('learning', __name__)
 
@@ -26,69 +56,7 @@ learning_bp = Blueprint('learning', __name__)
 def get_courses():
     """Get available courses"""
     try:
-        # For now, we'll return a hardcoded list of courses
-        # In a real application, this would be fetched from a database
-        courses = [
-            {
-                'id': 'cs101',
-                'title': 'Computer Science Fundamentals',
-                'description': 'An introduction to basic computer science concepts',
-                'image': 'https://source.unsplash.com/random/300x200/?computer',
-                'topics': [
-                    'Introduction to Programming',
-                    'Data Structures',
-                    'Algorithms',
-                    'Computer Architecture'
-                ],
-                'difficulty': 'beginner',
-                'duration': '8 weeks'
-            },
-            {
-                'id': 'math101',
-                'title': 'Mathematics Fundamentals',
-                'description': 'Learn essential mathematical concepts',
-                'image': 'https://source.unsplash.com/random/300x200/?math',
-                'topics': [
-                    'Algebra',
-                    'Geometry',
-                    'Calculus',
-                    'Statistics'
-                ],
-                'difficulty': 'intermediate',
-                'duration': '10 weeks'
-            },
-            {
-                'id': 'phys101',
-                'title': 'Physics Fundamentals',
-                'description': 'Explore the laws of nature and physics principles',
-                'image': 'https://source.unsplash.com/random/300x200/?physics',
-                'topics': [
-                    'Mechanics',
-                    'Thermodynamics',
-                    'Electromagnetism',
-                    'Modern Physics'
-                ],
-                'difficulty': 'intermediate',
-                'duration': '12 weeks'
-            },
-            {
-                'id': 'webdev',
-                'title': 'Full Stack Web Development',
-                'description': 'Build modern web applications from scratch',
-                'image': 'https://source.unsplash.com/random/300x200/?website',
-                'topics': [
-                    'HTML & CSS',
-                    'JavaScript',
-                    'React',
-                    'Node.js',
-                    'Databases'
-                ],
-                'difficulty': 'intermediate',
-                'duration': '16 weeks'
-            }
-        ]
-        
-        return jsonify({'courses': courses})
+        return precompiled_response(catalogue.courses, request, ResourceConfig.CATALOGUE_MAX_AGE)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -97,116 +65,11 @@ def get_courses():
 def get_course(course_id):
     """Get course details by ID"""
     try:
-        # For now, we'll return hardcoded course details
-        # In a real application, this would be fetched from a database based on course_id
-        
-        courses = {
-            'cs101': {
-                'id': 'cs101',
-                'title': 'Computer Science Fundamentals',
-                'description': 'An introduction to basic computer science concepts',
-                'image': 'https://source.unsplash.com/random/300x200/?computer',
-                'topics': [
-                    {
-                        'id': 'cs101-intro',
-                        'title': 'Introduction to Programming',
-                        'subtopics': [
-                            'What is Programming?',
-                            'Programming Languages',
-                            'Basic Syntax and Variables',
-                            'Control Structures'
-                        ]
-                    },
-                    {
-                        'id': 'cs101-data',
-                        'title': 'Data Structures',
-                        'subtopics': [
-                            'Arrays and Lists',
-                            'Stacks and Queues',
-                            'Trees and Graphs',
-                            'Hash Tables'
-                        ]
-                    },
-                    {
-                        'id': 'cs101-algo',
-                        'title': 'Algorithms',
-                        'subtopics': [
-                            'Sorting Algorithms',
-                            'Searching Algorithms',
-                            'Recursion',
-                            'Complexity Analysis'
-                        ]
-                    },
-                    {
-                        'id': 'cs101-arch',
-                        'title': 'Computer Architecture',
-                        'subtopics': [
-                            'CPU and Memory',
-                            'Input/Output Systems',
-                            'Operating Systems',
-                            'Networking Basics'
-                        ]
-                    }
-                ],
-                'difficulty': 'beginner',
-                'duration': '8 weeks'
-            },
-            'math101': {
-                'id': 'math101',
-                'title': 'Mathematics Fundamentals',
-                'description': 'Learn essential mathematical concepts',
-                'image': 'https://source.unsplash.com/random/300x200/?math',
-                'topics': [
-                    {
-                        'id': 'math101-algebra',
-                        'title': 'Algebra',
-                        'subtopics': [
-                            'Equations and Inequalities',
-                            'Functions and Graphs',
-                            'Polynomials',
-                            'Systems of Equations'
-                        ]
-                    },
-                    {
-                        'id': 'math101-geo',
-                        'title': 'Geometry',
-                        'subtopics': [
-                            'Euclidean Geometry',
-                            'Triangles and Circles',
-                            'Coordinate Geometry',
-                            'Transformations'
-                        ]
-                    },
-                    {
-                        'id': 'math101-calc',
-                        'title': 'Calculus',
-                        'subtopics': [
-                            'Limits and Continuity',
-                            'Derivatives',
-                            'Integrals',
-                            'Applications of Calculus'
-                        ]
-                    },
-                    {
-                        'id': 'math101-stats',
-                        'title': 'Statistics',
-                        'subtopics': [
-                            'Descriptive Statistics',
-                            'Probability',
-                            'Distributions',
-                            'Hypothesis Testing'
-                        ]
-                    }
-                ],
-                'difficulty': 'intermediate',
-                'duration': '10 weeks'
-            }
-        }
-        
-        if course_id not in courses:
+        entry = catalogue.course_by_id.get(course_id)
+        if entry is None:
             return jsonify({'error': 'Course not found'}), 404
         
-        return jsonify({'course': courses[course_id]})
+        return precompiled_response(entry, request, ResourceConfig.CATALOGUE_MAX_AGE)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -215,78 +78,20 @@ def get_course(course_id):
 def get_topics():
     """Get all available learning topics"""
     try:
-        # For now, we'll return a hardcoded list of topics
-        # In a real application, this would be fetched from a database
-        topics = [
-            {
-                'id': 'prog',
-                'title': 'Programming',
-                'description': 'Learn various programming languages and concepts',
-                'subtopics': [
-                    'Python Programming',
-                    'JavaScript',
-                    'Java Programming',
-                    'C++ Programming',
-                    'Functional Programming',
-                    'Object-Oriented Programming'
-                ]
-            },
-            {
-                'id': 'math',
-                'title': 'Mathematics',
-                'description': 'Explore the world of numbers and mathematical concepts',
-                'subtopics': [
-                    'Algebra',
-                    'Calculus',
-                    'Geometry',
-                    'Statistics',
-                    'Discrete Mathematics',
-                    'Linear Algebra'
-                ]
-            },
-            {
-                'id': 'science',
-                'title': 'Science',
-                'description': 'Discover scientific principles and phenomena',
-                'subtopics': [
-                    'Physics',
-                    'Chemistry',
-                    'Biology',
-                    'Astronomy',
-                    'Environmental Science',
-                    'Earth Science'
-                ]
-            },
-            {
-                'id': 'webdev',
-                'title': 'Web Development',
-                'description': 'Build websites and web applications',
-                'subtopics': [
-                    'HTML & CSS',
-                    'JavaScript',
-                    'React',
-                    'Angular',
-                    'Vue.js',
-                    'Backend Development',
-                    'Database Design'
-                ]
-            },
-            {
-                'id': 'ai',
-                'title': 'Artificial Intelligence',
-                'description': 'Learn about AI and machine learning',
-                'subtopics': [
-                    'Machine Learning',
-                    'Deep Learning',
-                    'Natural Language Processing',
-                    'Computer Vision',
-                    'Reinforcement Learning',
-                    'AI Ethics'
-                ]
-            }
-        ]
+        return precompiled_response(catalogue.topics, request, ResourceConfig.CATALOGUE_MAX_AGE)
         
-        return jsonify({'topics': topics})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@learning_bp.route('/topic/<topic_id>', methods=['GET'])
+def get_topic(topic_id):
+    """Get a single learning topic by ID"""
+    try:
+        entry = catalogue.topic_by_id.get(topic_id)
+        if entry is None:
+            return jsonify({'error': 'Topic not found'}), 404
+        
+        return precompiled_response(entry, request, ResourceConfig.CATALOGUE_MAX_AGE)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -313,22 +118,24 @@ def learn_topic(topic):
             if user_profile and 'preferences' in user_profile:
                 settings = user_profile['preferences']
         
-        # Generate learning content
-        content = ai_service.query_gemini(query, user_settings=settings)
+        # Content, practice questions and related topics don't depend on each
+        # other, so generate them concurrently and return whatever succeeds
+        subject = topic if not subtopic else f"{subtopic} in {topic}"
+        results, errors = fan_out(llm_executor, {
+            'content': lambda: ai_service.query_gemini(query, user_settings=settings),
+            'practice_questions': lambda: ai_service.generate_practice_questions(subject, difficulty),
+            'related_topics': lambda: ai_service.suggest_related_topics(subject)
+        }, timeout=LLMConfig.CALL_TIMEOUT)
         
-        # Generate practice questions
-        practice_questions = ai_service.generate_practice_questions(
-            topic if not subtopic else f"{subtopic} in {topic}", 
-            difficulty
-        )
+        if not results:
+            return jsonify({'error': 'Failed to generate learning content', 'errors': errors}), 502
         
-        # Suggest related topics
-        related_topics = ai_service.suggest_related_topics(
-            topic if not subtopic else f"{subtopic} in {topic}"
-        )
+        content = results.get('content')
+        practice_questions = results.get('practice_questions')
+        related_topics = results.get('related_topics')
         
         # Store learning session in user history if user_id is provided
-        if user_id:
+        if user_id and content:
             learning_data = {
                 'timestamp': datetime.now().isoformat(),
                 'topic': topic,
@@ -340,11 +147,16 @@ def learn_topic(topic):
             
             store_user_learning_data(user_id, learning_data)
         
-        return jsonify({
+        response = {
             'content': content,
             'practice_questions': practice_questions,
             'related_topics': related_topics
-        })
+        }
+        
+        if errors:
+            response['errors'] = errors
+        
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -358,44 +170,8 @@ def get_learning_progress():
         if not user_id:
             return jsonify({'error': 'User ID is required'}), 400
         
-        # Get user's learning history
-        learning_history = get_user_learning_history(user_id)
-        
-        # Process history to calculate progress
-        # This is a simplified implementation, in a real application you would
-        # have a more sophisticated algorithm to calculate progress
-        
-        topics = {}
-        for entry in learning_history:
-            if entry.get('type') == 'learning-session':
-                topic = entry.get('topic')
-                if topic and topic not in topics:
-                    topics[topic] = {
-                        'sessions': 1,
-                        'last_activity': entry.get('timestamp')
-                    }
-                elif topic:
-                    topics[topic]['sessions'] += 1
-                    # Update last activity if newer
-                    if entry.get('timestamp') > topics[topic]['last_activity']:
-                        topics[topic]['last_activity'] = entry.get('timestamp')
-        
-        # Convert to list of progress objects
-        progress = []
-        for topic, data in topics.items():
-            # Calculate completion percentage (simplified)
-            # In a real application, you would need a more sophisticated algorithm
-            completion = min(100, data['sessions'] * 10)  # 10% per session, max 100%
-            
-            progress.append({
-                'topic': topic,
-                'completion': completion,
-                'last_activity': data['last_activity'],
-                'sessions': data['sessions']
-            })
-        
-        # Sort by last activity, most recent first
-        progress.sort(key=lambda x: x['last_activity'], reverse=True)
+        # Aggregates are kept up to date as sessions are recorded
+        progress = get_user_progress(user_id)
         
         return jsonify({'progress': progress})
         
@@ -560,34 +336,14 @@ def search_books():
     
     try:
         query = request.args.get('q', '')
-        if not query:
+        if not query.strip():
             return jsonify({'error': 'Search query is required'}), 400
-            
-        # Make request to Open Library API
-        response = requests.get(
-            f'https://openlibrary.org/search.json',
-            params={
-                'q': query,
-                'fields': 'title,author_name,cover_i,first_publish_year,key',
-                'limit': 10
-            }
-        )
         
-        if response.status_code != 200:
+        # Served from cache when possible; identical in-flight searches share one upstream request
+        try:
+            books = book_search.search(query)
+        except SearchUnavailable:
             return jsonify({'error': 'Failed to search books'}), 500
-            
-        data = response.json()
-        books = []
-        
-        for doc in data.get('docs', []):
-            book = {
-                'id': doc.get('key', '').replace('/works/', ''),
-                'title': doc.get('title', ''),
-                'author': doc.get('author_name', ['Unknown'])[0],
-                'year': doc.get('first_publish_year', ''),
-                'coverUrl': f"https://covers.openlibrary.org/b/id/{doc.get('cover_i', '')}-M.jpg" if doc.get('cover_i') else None
-            }
-            books.append(book)
         
         response = jsonify({'books': books})
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:8000')
@@ -635,7 +391,7 @@ def remove_from_library():
             return jsonify({'error': 'Invalid item type'}), 400
             
         # Save the updated data
-        store_user_learning_data(user_id, learning_data)
+        save_user_learning_data(user_id, learning_data)
         
         response = jsonify({'message': f'{item_type} removed successfully'})
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:8000')
@@ -1,8 +1,23 @@
 import os
-import openai
 import base64
-import requests
+import asyncio
+import threading
 from dotenv import load_dotenv
+from config import LLMConfig, CacheConfig, ProviderConfig, HttpConfig, ResourceConfig
+from services.fake_llm import FakeGeminiModel
+from services.fake_embedding import FakeEmbedder
+from services.cache_service import ResponseCache
+from services.semantic_cache import SemanticCache
+from services.provider_guard import get_guard, ProviderUnavailable
+from services.http_pool import get_session
+from services.single_flight import SingleFlight
+from services.question_bank import get_question_bank, validate_math_questions
+from services.rag_index import get_rag_index
+from services.lazy_import import lazy_import
+from utils import parse_json_safe
+
+# The openai package is the slowest import at startup; it loads with the first client
+openai = lazy_import("openai")
 
 # Load environment variables
 load_dotenv()
@@ -14,11 +29,69 @@ except ImportError:
     print("Google Generative AI library not installed, Gemini features will be disabled")
     genai = None
 
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# Shared across every AIService instance so all callers draw from one budget
+gemini_guard = get_guard(
+    "gemini",
+    rate=ProviderConfig.GEMINI_REQUESTS_PER_MINUTE / 60.0,
+    capacity=ProviderConfig.BURST,
+    failure_threshold=ProviderConfig.FAILURE_THRESHOLD,
+    recovery_timeout=ProviderConfig.RECOVERY_TIMEOUT
+)
+openai_guard = get_guard(
+    "openai",
+    rate=ProviderConfig.OPENAI_REQUESTS_PER_MINUTE / 60.0,
+    capacity=ProviderConfig.BURST,
+    failure_threshold=ProviderConfig.FAILURE_THRESHOLD,
+    recovery_timeout=ProviderConfig.RECOVERY_TIMEOUT
+)
+
+# Keep-alive connections for raw REST calls to OpenAI
+openai_http = get_session(
+    "openai",
+    pool_size=HttpConfig.POOL_SIZE,
+    connect_timeout=HttpConfig.CONNECT_TIMEOUT,
+    read_timeout=HttpConfig.READ_TIMEOUT,
+    retries=HttpConfig.RETRIES,
+    backoff=HttpConfig.RETRY_BACKOFF
+)
+
 class AIService:
     def __init__(self):
         # AI model instances
         self.gemini_model = None
-        self.rag_engine = None
+        # Course documents indexed offline by build_rag_index.py
+        self.rag_engine = get_rag_index()
+        
+        # The fake backend embeds locally so retrieval and the semantic cache work offline
+        self.fake_embedder = FakeEmbedder() if LLMConfig.FAKE_LLM else None
+        self.embedding_model = "fake" if LLMConfig.FAKE_LLM else EMBEDDING_MODEL
+        
+        # Cache of completed responses, shared by every prompt-based method
+        self.response_cache = None
+        if CacheConfig.RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=CacheConfig.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl=CacheConfig.RESPONSE_CACHE_TTL,
+                db_path=CacheConfig.RESPONSE_CACHE_DB_PATH or None
+            )
+        
+        # Identical prompts already being generated are shared, not re-sent
+        self.flights = SingleFlight("llm") if LLMConfig.SINGLE_FLIGHT_ENABLED else None
+        
+        # Question sets pre-generated offline by pregenerate_questions.py
+        self.question_bank = get_question_bank()
+        
+        # Answers to earlier questions that mean the same thing (student questions only)
+        self.semantic_cache = None
+        if CacheConfig.SEMANTIC_CACHE_ENABLED:
+            self.semantic_cache = SemanticCache(
+                self.generate_embedding,
+                threshold=CacheConfig.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=CacheConfig.SEMANTIC_CACHE_MAX_ENTRIES,
+                ttl=CacheConfig.SEMANTIC_CACHE_TTL
+            )
         
         # User customization settings
         self.default_settings = {
@@ -30,23 +103,51 @@ class AIService:
             "pitch": 1.0
         }
         
-        # Initialize OpenAI client with the new API (v1.x)
+        # OpenAI clients (API v1.x) are created on first use
+        self.openai_api_key = os.environ.get("OPENAI_API_KEY")
+        if not self.openai_api_key:
+            print("OpenAI API key not found")
+        self._openai_clients = None
+        self._openai_lock = threading.Lock()
+    
+    @property
+    def openai_client(self):
+        return self._get_openai_clients()[0]
+    
+    @property
+    def async_openai_client(self):
+        """Used by the *_async methods on the shared event loop"""
+        return self._get_openai_clients()[1]
+    
+    def _get_openai_clients(self):
+        if self._openai_clients is None:
+            with self._openai_lock:
+                if self._openai_clients is None:
+                    self._openai_clients = self._create_openai_clients()
+        return self._openai_clients
+    
+    def _create_openai_clients(self):
+        if not self.openai_api_key:
+            return None, None
         try:
-            # Import the OpenAI class directly for the new API (v1.x)
-            from openai import OpenAI
-            self.openai_api_key = os.environ.get("OPENAI_API_KEY")
-            if self.openai_api_key:
-                self.openai_client = OpenAI(api_key=self.openai_api_key)
-                print("Using OpenAI API v1.x")
-            else:
-                print("OpenAI API key not found")
-                self.openai_client = None
+            clients = (openai.OpenAI(api_key=self.openai_api_key), openai.AsyncOpenAI(api_key=self.openai_api_key))
+            print("Using OpenAI API v1.x")
+            return clients
         except Exception as e:
             print(f"Error initializing OpenAI: {e}")
-            self.openai_client = None
+            return None, None
     
     def setup_gemini(self):
         """Set up Google Gemini Pro model"""
+        if LLMConfig.FAKE_LLM:
+            # Local stand-in so streaming and routes can be exercised offline
+            self.gemini_model = FakeGeminiModel(
+                first_chunk_delay=LLMConfig.FAKE_LLM_FIRST_CHUNK_DELAY,
+                chunk_delay=LLMConfig.FAKE_LLM_CHUNK_DELAY
+            )
+            print("Using fake LLM backend")
+            return self.gemini_model
+        
         if genai is None:
             print("Gemini features are disabled: library not installed")
             return None
@@ -64,128 +165,554 @@ class AIService:
             print(f"Error setting up Gemini: {e}")
             return None
     
-    def query_gemini(self, prompt, image=None, user_settings=None):
-        """Query Gemini model with text and optional image"""
+    def probe_gemini(self):
+        """Health probe: look up the configured model without generating anything"""
+        if self.gemini_model is None:
+            return False
+        if isinstance(self.gemini_model, FakeGeminiModel):
+            return True
+        name = self._gemini_model_name()
+        genai.get_model(name if name.startswith("models/") else f"models/{name}")
+        return True
+    
+    def probe_openai(self):
+        """Health probe: cheapest authenticated call, listing models"""
+        if self.openai_client is None:
+            return False
+        self.openai_client.models.list()
+        return True
+    
+    def query_gemini(self, prompt, image=None, user_settings=None, use_cache=True, image_mime_type=None,
+                     semantic=False):
+        """Query Gemini model with text and an optional image (raw bytes or base64)
+        
+        semantic=True also serves the cached answer to an earlier question
+        that means the same thing and grounds the answer in the course
+        documents; only pass it for a student's own question.
+        """
         if self.gemini_model is None:
-            return self.query_openai(prompt, user_settings)
+            return self.query_openai(prompt, user_settings, use_cache=use_cache, semantic=semantic)
+        
+        # Image prompts are effectively unique, so only text prompts are cached
+        # or coalesced
+        grounded = self._grounded(semantic)
+        cache_key = None
+        remember = None
+        if use_cache and not image:
+            cache_key = self._cache_key(self._gemini_model_name(), prompt, user_settings, grounded)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            remember = self._semantic_request(prompt, user_settings, semantic, grounded)
+            if remember is not None:
+                answer = self._semantic_get(remember)
+                if answer is not None:
+                    return answer
             
+            flight_key = self._flight_key(self._gemini_model_name(), prompt, user_settings, grounded)
+            if flight_key is not None:
+                return self.flights.do(flight_key, self._generate_gemini, prompt, image, user_settings, use_cache,
+                                       image_mime_type, cache_key, remember, grounded)
+        
+        return self._generate_gemini(prompt, image, user_settings, use_cache, image_mime_type, cache_key, remember,
+                                     grounded)
+    
+    def _generate_gemini(self, prompt, image, user_settings, use_cache, image_mime_type, cache_key, remember=None,
+                         grounded=False):
+        # A call that just finished may have filled the cache after our lookup
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Apply user settings to prompt
-            settings = user_settings or self.default_settings
-            
-            # Adjust prompt based on teaching style and personality
-            prompt_prefix = ""
-            if settings["teaching_style"] == "detailed":
-                prompt_prefix += "Provide a detailed explanation with examples. "
-            elif settings["teaching_style"] == "concise":
-                prompt_prefix += "Provide a concise explanation focusing on key points. "
-            elif settings["teaching_style"] == "interactive":
-                prompt_prefix += "Explain this interactively with questions and answers. "
-            elif settings["teaching_style"] == "socratic":
-                prompt_prefix += "Use the Socratic method to guide through this concept. "
-            
-            if settings["personality"] == "friendly":
-                prompt_prefix += "Be friendly and encouraging. "
-            elif settings["personality"] == "formal":
-                prompt_prefix += "Maintain a formal and professional tone. "
-            elif settings["personality"] == "humorous":
-                prompt_prefix += "Be playful and use appropriate humor. "
-            elif settings["personality"] == "motivational":
-                prompt_prefix += "Be motivational and inspiring. "
-            
-            # Add difficulty level
-            difficulty_guide = f"Explain at {settings['difficulty']} level. "
-            
-            # Combine all elements
-            enhanced_prompt = f"{prompt_prefix}{difficulty_guide}{prompt}"
+            enhanced_prompt = self._enhance_prompt(self._with_context(prompt) if grounded else prompt, user_settings)
             
             # Process response based on input type
             if image:
-                # Decode base64 image and create multimodal prompt
-                image_bytes = base64.b64decode(image)
-                response = self.gemini_model.generate_content([enhanced_prompt, image_bytes])
+                # Multimodal prompt: text plus the image blob
+                response = gemini_guard.call(
+                    self.gemini_model.generate_content,
+                    [enhanced_prompt, self._image_part(image, image_mime_type)]
+                )
             else:
-                response = self.gemini_model.generate_content(enhanced_prompt)
+                response = gemini_guard.call(self.gemini_model.generate_content, enhanced_prompt)
             
+            self._cache_set(cache_key, response.text)
+            self._semantic_set(remember, response.text)
             return response.text
         except Exception as e:
             print(f"Error querying Gemini: {e}")
             # Fallback to OpenAI
-            return self.query_openai(prompt, user_settings)
+            return self.query_openai(prompt, user_settings, use_cache=use_cache,
+                                     semantic=grounded or remember is not None)
     
-    def query_openai(self, prompt, user_settings=None):
+    def query_openai(self, prompt, user_settings=None, use_cache=True, semantic=False):
         """Query OpenAI as a fallback"""
         try:
-            # Apply user settings to prompt
-            settings = user_settings or self.default_settings
-            
-            # Create system prompt based on settings
-            system_prompt = ""
-            if settings["teaching_style"] == "detailed":
-                system_prompt += "You provide detailed explanations with examples. "
-            elif settings["teaching_style"] == "concise":
-                system_prompt += "You provide concise explanations focusing on key points. "
-            elif settings["teaching_style"] == "interactive":
-                system_prompt += "You explain concepts interactively with questions and answers. "
-            elif settings["teaching_style"] == "socratic":
-                system_prompt += "You use the Socratic method to guide through concepts. "
-            
-            if settings["personality"] == "friendly":
-                system_prompt += "Your tone is friendly and encouraging. "
-            elif settings["personality"] == "formal":
-                system_prompt += "Your tone is formal and professional. "
-            elif settings["personality"] == "humorous":
-                system_prompt += "Your tone is playful and you use appropriate humor. "
-            elif settings["personality"] == "motivational":
-                system_prompt += "Your tone is motivational and inspiring. "
-            
-            system_prompt += f"You explain concepts at {settings['difficulty']} level."
+            system_prompt = self._build_system_prompt(user_settings)
             
             # Call OpenAI API using the client
             if not self.openai_client:
                 return "OpenAI service is not available. Please check your API key configuration."
+            
+            grounded = self._grounded(semantic)
+            cache_key = self._cache_key("openai", prompt, user_settings, grounded) if use_cache else None
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            remember = self._semantic_request(prompt, user_settings, semantic and use_cache, grounded)
+            if remember is not None:
+                answer = self._semantic_get(remember)
+                if answer is not None:
+                    return answer
+            
+            flight_key = self._flight_key("openai", prompt, user_settings, grounded) if use_cache else None
+            if flight_key is not None:
+                return self.flights.do(flight_key, self._generate_openai, system_prompt, prompt, cache_key, remember,
+                                       grounded)
+            return self._generate_openai(system_prompt, prompt, cache_key, remember, grounded)
                 
+        except ProviderUnavailable as e:
+            print(f"Error querying OpenAI: {e}")
+            return self._busy_message(e)
+        except Exception as e:
+            print(f"Error querying OpenAI: {e}")
+            return f"I'm having trouble processing that request. {str(e)}"
+    
+    def _generate_openai(self, system_prompt, prompt, cache_key, remember=None, grounded=False):
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            user_content = self._with_context(prompt) if grounded else prompt
             try:
-                response = self.openai_client.chat.completions.create(
+                response = openai_guard.call(self.openai_client.chat.completions.create,
                     model="gpt-4",
                     messages=[
                         {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
+                        {"role": "user", "content": user_content}
                     ],
                     temperature=0.7
                 )
                 
+                self._cache_set(cache_key, response.choices[0].message.content)
+                self._semantic_set(remember, response.choices[0].message.content)
                 return response.choices[0].message.content
+            except ProviderUnavailable:
+                raise
             except Exception as e:
                 # Try with GPT 3.5 if GPT 4 fails
                 print(f"Error with GPT-4, falling back to GPT-3.5: {e}")
                 
-                response = self.openai_client.chat.completions.create(
+                response = openai_guard.call(self.openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
+                        {"role": "user", "content": user_content}
                     ],
                     temperature=0.7
                 )
                 
+                self._cache_set(cache_key, response.choices[0].message.content)
+                self._semantic_set(remember, response.choices[0].message.content)
                 return response.choices[0].message.content
                 
+        except ProviderUnavailable as e:
+            print(f"Error querying OpenAI: {e}")
+            return self._busy_message(e)
+        except Exception as e:
+            print(f"Error querying OpenAI: {e}")
+            return f"I'm having trouble processing that request. {str(e)}"
+    
+    async def query_gemini_async(self, prompt, image=None, user_settings=None, use_cache=True, image_mime_type=None,
+                                 semantic=False):
+        """Async counterpart of query_gemini; holds no thread while the model is generating"""
+        if self.gemini_model is None:
+            return await self.query_openai_async(prompt, user_settings, use_cache=use_cache, semantic=semantic)
+        
+        grounded = self._grounded(semantic)
+        cache_key = None
+        remember = None
+        if use_cache and not image:
+            cache_key = self._cache_key(self._gemini_model_name(), prompt, user_settings, grounded)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Embedding is a blocking provider call, so it runs in the loop's thread pool
+            remember = self._semantic_request(prompt, user_settings, semantic, grounded)
+            if remember is not None:
+                answer = await asyncio.to_thread(self._semantic_get, remember)
+                if answer is not None:
+                    return answer
+            
+            flight_key = self._flight_key(self._gemini_model_name(), prompt, user_settings, grounded)
+            if flight_key is not None:
+                return await self.flights.do_async(flight_key, self._generate_gemini_async, prompt, image,
+                                                   user_settings, use_cache, image_mime_type, cache_key, remember,
+                                                   grounded)
+        
+        return await self._generate_gemini_async(prompt, image, user_settings, use_cache, image_mime_type, cache_key,
+                                                 remember, grounded)
+    
+    async def _generate_gemini_async(self, prompt, image, user_settings, use_cache, image_mime_type, cache_key,
+                                     remember=None, grounded=False):
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            # Retrieval embeds the question, a blocking call, so it runs in the loop's thread pool
+            question = await asyncio.to_thread(self._with_context, prompt) if grounded else prompt
+            enhanced_prompt = self._enhance_prompt(question, user_settings)
+            contents = [enhanced_prompt, self._image_part(image, image_mime_type)] if image else enhanced_prompt
+            response = await gemini_guard.call_async(self.gemini_model.generate_content_async, contents)
+            
+            self._cache_set(cache_key, response.text)
+            if remember is not None:
+                await asyncio.to_thread(self._semantic_set, remember, response.text)
+            return response.text
+        except Exception as e:
+            print(f"Error querying Gemini: {e}")
+            return await self.query_openai_async(prompt, user_settings, use_cache=use_cache,
+                                                 semantic=grounded or remember is not None)
+    
+    async def query_openai_async(self, prompt, user_settings=None, use_cache=True, semantic=False):
+        """Async counterpart of query_openai"""
+        if not self.async_openai_client:
+            return "OpenAI service is not available. Please check your API key configuration."
+        
+        grounded = self._grounded(semantic)
+        cache_key = self._cache_key("openai", prompt, user_settings, grounded) if use_cache else None
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        remember = self._semantic_request(prompt, user_settings, semantic and use_cache, grounded)
+        if remember is not None:
+            answer = await asyncio.to_thread(self._semantic_get, remember)
+            if answer is not None:
+                return answer
+        
+        messages = [
+            {"role": "system", "content": self._build_system_prompt(user_settings)},
+            {"role": "user", "content": await asyncio.to_thread(self._with_context, prompt) if grounded else prompt}
+        ]
+        flight_key = self._flight_key("openai", prompt, user_settings, grounded) if use_cache else None
+        if flight_key is not None:
+            return await self.flights.do_async(flight_key, self._generate_openai_async, messages, cache_key, remember)
+        return await self._generate_openai_async(messages, cache_key, remember)
+    
+    async def _generate_openai_async(self, messages, cache_key, remember=None):
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            try:
+                response = await openai_guard.call_async(self.async_openai_client.chat.completions.create,
+                    model="gpt-4", messages=messages, temperature=0.7
+                )
+            except ProviderUnavailable:
+                raise
+            except Exception as e:
+                # Try with GPT 3.5 if GPT 4 fails
+                print(f"Error with GPT-4, falling back to GPT-3.5: {e}")
+                response = await openai_guard.call_async(self.async_openai_client.chat.completions.create,
+                    model="gpt-3.5-turbo", messages=messages, temperature=0.7
+                )
+            
+            self._cache_set(cache_key, response.choices[0].message.content)
+            if remember is not None:
+                await asyncio.to_thread(self._semantic_set, remember, response.choices[0].message.content)
+            return response.choices[0].message.content
+        except ProviderUnavailable as e:
+            print(f"Error querying OpenAI: {e}")
+            return self._busy_message(e)
         except Exception as e:
             print(f"Error querying OpenAI: {e}")
             return f"I'm having trouble processing that request. {str(e)}"
     
+    def stream_gemini(self, prompt, image=None, user_settings=None, use_cache=True, image_mime_type=None,
+                      semantic=False):
+        """Stream a Gemini response as text chunks, falling back to OpenAI"""
+        if self.gemini_model is None:
+            yield from self.stream_openai(prompt, user_settings, use_cache=use_cache, semantic=semantic)
+            return
+        
+        grounded = self._grounded(semantic)
+        cache_key = None
+        remember = None
+        if use_cache and not image:
+            cache_key = self._cache_key(self._gemini_model_name(), prompt, user_settings, grounded)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+            
+            remember = self._semantic_request(prompt, user_settings, semantic, grounded)
+            if remember is not None:
+                answer = self._semantic_get(remember)
+                if answer is not None:
+                    yield answer
+                    return
+        
+        chunks = []
+        try:
+            enhanced_prompt = self._enhance_prompt(self._with_context(prompt) if grounded else prompt, user_settings)
+            
+            if image:
+                response = gemini_guard.call_stream(
+                    self.gemini_model.generate_content,
+                    [enhanced_prompt, self._image_part(image, image_mime_type)],
+                    stream=True
+                )
+            else:
+                response = gemini_guard.call_stream(self.gemini_model.generate_content, enhanced_prompt, stream=True)
+            
+            for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    chunks.append(text)
+                    yield text
+            
+            self._cache_set(cache_key, "".join(chunks))
+            self._semantic_set(remember, "".join(chunks))
+        except Exception as e:
+            print(f"Error streaming from Gemini: {e}")
+            # Only fall back if nothing reached the client yet, otherwise the
+            # answer would be stitched together from two different models
+            if not chunks:
+                yield from self.stream_openai(prompt, user_settings, use_cache=use_cache,
+                                              semantic=grounded or remember is not None)
+    
+    def stream_openai(self, prompt, user_settings=None, use_cache=True, semantic=False):
+        """Stream an OpenAI response as text chunks"""
+        if not self.openai_client:
+            yield "OpenAI service is not available. Please check your API key configuration."
+            return
+        
+        grounded = self._grounded(semantic)
+        cache_key = self._cache_key("openai", prompt, user_settings, grounded) if use_cache else None
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        remember = self._semantic_request(prompt, user_settings, semantic and use_cache, grounded)
+        if remember is not None:
+            answer = self._semantic_get(remember)
+            if answer is not None:
+                yield answer
+                return
+        
+        try:
+            system_prompt = self._build_system_prompt(user_settings)
+            stream = openai_guard.call_stream(self.openai_client.chat.completions.create,
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": self._with_context(prompt) if grounded else prompt}
+                ],
+                temperature=0.7,
+                stream=True
+            )
+            
+            chunks = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    chunks.append(text)
+                    yield text
+            
+            self._cache_set(cache_key, "".join(chunks))
+            self._semantic_set(remember, "".join(chunks))
+        except ProviderUnavailable as e:
+            print(f"Error streaming from OpenAI: {e}")
+            yield self._busy_message(e)
+        except Exception as e:
+            print(f"Error streaming from OpenAI: {e}")
+            yield f"I'm having trouble processing that request. {str(e)}"
+    
+    def _busy_message(self, error):
+        return f"I'm getting a lot of questions right now. Please try again in {int(error.retry_after) + 1} seconds."
+    
+    def _image_part(self, image, mime_type=None):
+        """Build a Gemini image part from uploaded bytes or a base64 string"""
+        if isinstance(image, str):
+            image = base64.b64decode(image)
+        return {"mime_type": mime_type or "image/jpeg", "data": bytes(image)}
+    
+    def _gemini_model_name(self):
+        return getattr(self.gemini_model, "model_name", "gemini")
+    
+    def _cache_key(self, model, prompt, user_settings=None, grounded=False):
+        if self.response_cache is None:
+            return None
+        return self.response_cache.make_key(model, prompt, user_settings or self.default_settings,
+                                            self._index_version(grounded))
+    
+    def _flight_key(self, model, prompt, user_settings=None, grounded=False):
+        # Same identity as the response cache, so only interchangeable answers are shared
+        if self.flights is None:
+            return None
+        return ResponseCache.make_key(model, prompt, user_settings or self.default_settings,
+                                      self._index_version(grounded))
+    
+    def _cache_get(self, cache_key):
+        if cache_key is None:
+            return None
+        return self.response_cache.get(cache_key)
+    
+    def _cache_set(self, cache_key, text):
+        # Empty completions are never worth replaying
+        if cache_key is None or not text:
+            return
+        self.response_cache.set(cache_key, text)
+    
+    def _semantic_request(self, prompt, user_settings, semantic, grounded=False):
+        # What _semantic_get/_semantic_set work on, or None when the semantic cache doesn't apply;
+        # answers are only shared between questions grounded in the same document index version
+        if not semantic or self.semantic_cache is None:
+            return None
+        return (prompt, user_settings or self.default_settings, self._index_version(grounded))
+    
+    def _semantic_get(self, remember):
+        return self.semantic_cache.get(*remember)
+    
+    def _semantic_set(self, remember, text):
+        if remember is None or not text:
+            return
+        prompt, settings, index_version = remember
+        self.semantic_cache.set(prompt, settings, text, index_version)
+    
+    def _grounded(self, semantic):
+        # Only a student's own question is answered from the course documents;
+        # template prompts (practice questions, JSON generators) skip the embedding call
+        return semantic and self.rag_engine is not None and self.rag_engine.ready()
+    
+    def _index_version(self, grounded):
+        # Part of the cache key for grounded answers, so a rebuilt index isn't answered from stale ones
+        return self.rag_engine.version if grounded else None
+    
+    def _retrieve_context(self, prompt):
+        """Excerpts from the indexed course documents relevant to prompt, or an empty string"""
+        index = self.rag_engine
+        if index is None or not index.ready():
+            return ""
+        if index.embedder != self.embedding_model:
+            print(f"Document index was built with {index.embedder}, not {self.embedding_model}; rebuild it")
+            return ""
+        
+        # A student question was usually just embedded for the semantic cache
+        vector = self.semantic_cache.embedding(prompt) if self.semantic_cache else self.generate_embedding(prompt)
+        if vector is None:
+            return ""
+        
+        excerpts = []
+        used = 0
+        for chunk in index.search(vector, k=ResourceConfig.RAG_TOP_K, min_score=ResourceConfig.RAG_MIN_SCORE):
+            if used + len(chunk["text"]) > ResourceConfig.RAG_MAX_CONTEXT_CHARS and excerpts:
+                break
+            excerpts.append(f"[{chunk['source']}]\n{chunk['text']}")
+            used += len(chunk["text"])
+        return "\n\n".join(excerpts)
+    
+    def _with_context(self, prompt):
+        """prompt preceded by relevant course document excerpts, when there are any"""
+        context = self._retrieve_context(prompt)
+        if not context:
+            return prompt
+        return (f"Use these excerpts from the course materials where they help:\n\n{context}\n\n"
+                f"Question: {prompt}")
+    
+    def _get_context_for_prompt(self, prompt):
+        """System prompt for generate_chat_response, with relevant course document excerpts"""
+        system_prompt = "You are Mentaura, a friendly AI tutor."
+        context = self._retrieve_context(prompt)
+        if context:
+            system_prompt += f" Use these excerpts from the course materials where they help:\n\n{context}"
+        return system_prompt
+    
+    def _enhance_prompt(self, prompt, user_settings=None):
+        """Prefix a Gemini prompt with the user's teaching style, personality and difficulty"""
+        settings = user_settings or self.default_settings
+        
+        # Adjust prompt based on teaching style and personality
+        prompt_prefix = ""
+        if settings["teaching_style"] == "detailed":
+            prompt_prefix += "Provide a detailed explanation with examples. "
+        elif settings["teaching_style"] == "concise":
+            prompt_prefix += "Provide a concise explanation focusing on key points. "
+        elif settings["teaching_style"] == "interactive":
+            prompt_prefix += "Explain this interactively with questions and answers. "
+        elif settings["teaching_style"] == "socratic":
+            prompt_prefix += "Use the Socratic method to guide through this concept. "
+        
+        if settings["personality"] == "friendly":
+            prompt_prefix += "Be friendly and encouraging. "
+        elif settings["personality"] == "formal":
+            prompt_prefix += "Maintain a formal and professional tone. "
+        elif settings["personality"] == "humorous":
+            prompt_prefix += "Be playful and use appropriate humor. "
+        elif settings["personality"] == "motivational":
+            prompt_prefix += "Be motivational and inspiring. "
+        
+        # Add difficulty level
+        difficulty_guide = f"Explain at {settings['difficulty']} level. "
+        
+        # Combine all elements
+        return f"{prompt_prefix}{difficulty_guide}{prompt}"
+    
+    def _build_system_prompt(self, user_settings=None):
+        """Build the OpenAI system prompt from the user's settings"""
+        settings = user_settings or self.default_settings
+        
+        system_prompt = ""
+        if settings["teaching_style"] == "detailed":
+            system_prompt += "You provide detailed explanations with examples. "
+        elif settings["teaching_style"] == "concise":
+            system_prompt += "You provide concise explanations focusing on key points. "
+        elif settings["teaching_style"] == "interactive":
+            system_prompt += "You explain concepts interactively with questions and answers. "
+        elif settings["teaching_style"] == "socratic":
+            system_prompt += "You use the Socratic method to guide through concepts. "
+        
+        if settings["personality"] == "friendly":
+            system_prompt += "Your tone is friendly and encouraging. "
+        elif settings["personality"] == "formal":
+            system_prompt += "Your tone is formal and professional. "
+        elif settings["personality"] == "humorous":
+            system_prompt += "Your tone is playful and you use appropriate humor. "
+        elif settings["personality"] == "motivational":
+            system_prompt += "Your tone is motivational and inspiring. "
+        
+        system_prompt += f"You explain concepts at {settings['difficulty']} level."
+        return system_prompt
+    
     def generate_embedding(self, text):
         """Generate embedding for text"""
+        vectors = self.generate_embeddings([text])
+        return vectors[0] if vectors else None
+    
+    def generate_embeddings(self, texts):
+        """Embed a batch of texts in one request; None on failure"""
+        if self.fake_embedder is not None:
+            return [self.fake_embedder.embed(text) for text in texts]
         try:
             if not self.openai_client:
                 return None
                 
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
+            response = openai_guard.call(self.openai_client.embeddings.create,
+                model=EMBEDDING_MODEL,
+                input=texts
             )
-            return response.data[0].embedding
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
         except Exception as e:
             print(f"Error generating embedding: {e}")
             return None
@@ -196,7 +723,7 @@ class AIService:
             if not self.openai_client:
                 return {"success": False, "error": "OpenAI service is not available"}
                 
-            response = self.openai_client.images.generate(
+            response = openai_guard.call(self.openai_client.images.generate,
                 prompt=prompt,
                 model="dall-e-3",
                 n=n,
@@ -219,7 +746,7 @@ class AIService:
             if not self.openai_client:
                 return "OpenAI service is not available for text summarization."
                 
-            response = self.openai_client.chat.completions.create(
+            response = openai_guard.call(self.openai_client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Summarize the following text concisely:"},
@@ -233,9 +760,14 @@ class AIService:
             print(f"Error summarizing text: {e}")
             return None
     
-    def generate_practice_questions(self, topic, difficulty=3, count=5):
-        """Generate practice questions for a topic"""
+    def generate_practice_questions(self, topic, difficulty=3, count=5, use_bank=True, use_cache=True):
+        """Generate practice questions for a topic, from the question bank if it has them"""
         try:
+            if use_bank and self.question_bank is not None:
+                banked = self.question_bank.get("practice", topic, difficulty, count)
+                if banked is not None:
+                    return banked
+            
             prompt = f"""Generate {count} practice questions about {topic} at difficulty level {difficulty}/5. 
             For each question, provide:
             1. The question
@@ -244,15 +776,49 @@ class AIService:
             4. A brief explanation of why it's correct"""
             
             if self.gemini_model:
-                response = self.query_gemini(prompt)
+                response = self.query_gemini(prompt, use_cache=use_cache)
             else:
-                response = self.query_openai(prompt)
+                response = self.query_openai(prompt, use_cache=use_cache)
                 
             return response
         except Exception as e:
             print(f"Error generating practice questions: {e}")
             return f"I couldn't generate practice questions. {str(e)}"
     
+    def generate_math_questions(self, topic, count=5, level="advanced", use_bank=True, use_cache=True):
+        """Generate math questions with numerical answers as a list, or None if the model's output is unusable"""
+        if use_bank and self.question_bank is not None:
+            banked = self.question_bank.get("math", topic, level, count)
+            if banked is not None:
+                return banked
+        
+        prompt = f"""Generate {count} {level}-level math questions about {topic}.
+    For each question, provide:
+    1. A clear and concise question
+    2. The correct answer (must be a numerical value)
+    
+    Example format:
+    [
+      {{
+        "id": "math-1",
+        "question": "Calculate the derivative of f(x) = x^3 + 2x^2 - 4x + 7 at x = 2",
+        "type": "number",
+        "answer": "22"
+      }}
+    ]"""
+        
+        try:
+            if self.gemini_model:
+                response = self.query_gemini(prompt, use_cache=use_cache)
+            else:
+                response = self.query_openai(prompt, use_cache=use_cache)
+            
+            # Models often wrap the JSON in prose or a code fence
+            return validate_math_questions(parse_json_safe(response), count)
+        except Exception as e:
+            print(f"Error generating math questions: {e}")
+            return None
+    
     def evaluate_answer(self, question, user_answer, correct_answer=None):
         """Evaluate a user's answer to a question"""
         try:
@@ -396,7 +962,7 @@ class AIService:
     def generate_response(self, message, context=None):
         try:
             if self.openai_client is not None:
-                response = self.openai_client.chat.completions.create(
+                response = openai_guard.call(self.openai_client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": self.system_prompt},
@@ -408,7 +974,7 @@ class AIService:
                 return response.choices[0].message.content
             else:
                 # Fallback to direct API request
-                response = requests.post(
+                response = openai_http.post(
                     "https://api.openai.com/v1/chat/completions",
                     headers={
                         "Content-Type": "application/json",
@@ -442,7 +1008,7 @@ class AIService:
                 return "OpenAI service is not available for text analysis."
                 
             prompt = f"Analyze the following text for {analysis_type}:\n\n{text}"
-            response = self.openai_client.chat.completions.create(
+            response = openai_guard.call(self.openai_client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -463,7 +1029,7 @@ class AIService:
                 system_prompt = self._get_context_for_prompt(prompt)
             
             # Call OpenAI API using the client
-            response = self.openai_client.chat.completions.create(
+            response = openai_guard.call(self.openai_client.chat.completions.create,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -509,6 +1075,6 @@ def generate_ai_response(message, user_id=None, context=None):
         _ai_service = setup_ai_models()
         
     if _ai_service.gemini_model:
-        return _ai_service.query_gemini(message)
+        return _ai_service.query_gemini(message, semantic=True)
     else:
-        return _ai_service.query_openai(message)
\ No newline at end of file
+        return _ai_service.query_openai(message, semantic=True)
\ No newline at end of file
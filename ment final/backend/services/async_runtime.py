@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import AsyncConfig, HttpConfig
+from services.lazy_import import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+
+_loop = None
+_loop_thread = None
+_attached = False
+_external = False
+_attached_event = threading.Event()
+_lock = threading.Lock()
+_http_session = None
+_counts = {"submitted": 0, "in_flight": 0, "peak_in_flight": 0}
+_http_counts = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+_counts_lock = threading.Lock()
+
+
+def _configure(loop):
+    # Blocking SDK calls (Google Cloud, Firestore) go through to_thread;
+    # size that pool explicitly instead of the small per-CPU default
+    loop.set_default_executor(ThreadPoolExecutor(
+        max_workers=AsyncConfig.BLOCKING_THREADS, thread_name_prefix="async-blocking"
+    ))
+
+
+def expect_external_loop():
+    """Declare that an ASGI server will attach() its loop
+
+    Called by the ASGI entry point before the app is imported, so work
+    started during import (cache pre-warming) waits for the server's loop
+    instead of starting a private one.
+    """
+    global _external
+    _external = True
+
+
+def attach(loop):
+    """Use an already running loop (the ASGI server's) as the shared loop
+
+    Must be called from that loop, typically in the ASGI lifespan startup.
+    """
+    global _loop, _attached
+    with _lock:
+        if _loop is not None and _loop is not loop:
+            raise RuntimeError("async runtime already started on another loop")
+        _configure(loop)
+        _loop = loop
+        _attached = True
+    _attached_event.set()
+
+
+def get_loop():
+    """Return the worker's long-lived event loop, starting it on first use"""
+    global _loop, _loop_thread
+    if _loop is None and _external:
+        if not _attached_event.wait(AsyncConfig.HTTP_TIMEOUT):
+            raise RuntimeError("ASGI server has not attached its event loop")
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _configure(loop)
+                _loop_thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+                _loop_thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_async(coro, timeout=None):
+    """Run a coroutine on the shared loop from synchronous (Flask/Socket.IO) code
+
+    Replaces asyncio.run(), which built and tore down a loop (and any
+    pooled connections) on every call.
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_async() called from the event loop; await the coroutine instead")
+
+    future = asyncio.run_coroutine_threadsafe(_track(coro), loop)
+    return future.result(timeout)
+
+
+async def _track(coro):
+    with _counts_lock:
+        _counts["submitted"] += 1
+        _counts["in_flight"] += 1
+        _counts["peak_in_flight"] = max(_counts["peak_in_flight"], _counts["in_flight"])
+    try:
+        return await coro
+    finally:
+        with _counts_lock:
+            _counts["in_flight"] -= 1
+
+
+async def http_session():
+    """Return the pooled aiohttp session bound to the shared loop"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=AsyncConfig.HTTP_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=AsyncConfig.HTTP_TIMEOUT, sock_connect=HttpConfig.CONNECT_TIMEOUT),
+            trace_configs=[_connection_trace()]
+        )
+    return _http_session
+
+
+def _connection_trace():
+    """Count requests and whether each one opened or reused a connection"""
+    def counter(key):
+        async def count(session, context, params):
+            _http_counts[key] += 1
+        return count
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(counter("requests"))
+    trace.on_connection_create_end.append(counter("connections_opened"))
+    trace.on_connection_reuseconn.append(counter("connections_reused"))
+    return trace
+
+
+async def aclose():
+    """Close pooled connections; called on ASGI shutdown"""
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+def runtime_stats():
+    with _counts_lock:
+        stats = dict(_counts)
+    stats["loop"] = "asgi" if _attached else ("thread" if _loop is not None else "not started")
+    stats["http_pool_size"] = AsyncConfig.HTTP_POOL_SIZE
+    # Only touched from the loop thread, so no lock is needed
+    stats["http"] = dict(_http_counts)
+    return stats
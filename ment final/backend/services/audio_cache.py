@@ -0,0 +1,129 @@
+import os
+import time
+import hashlib
+import threading
+
+
+class AudioCache:
+    """Content-addressed store of synthesized audio blobs on disk
+
+    Each entry is one file named after the hash of everything that affects
+    the audio (text, voice, rate, pitch, provider). The directory is kept
+    under max_bytes by evicting the least recently used files.
+    """
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, extension="mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._index = {}  # key -> [size, last_access]
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "bytes_saved": 0}
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice, rate, pitch, provider):
+        """Hash the synthesis inputs into a cache key"""
+        material = "\n".join(str(part) for part in (provider, voice, rate, pitch, text))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached audio bytes for key, or None on a miss"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            entry[1] = time.time()
+
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except OSError:
+            # File vanished underneath us (manual cleanup, another worker's eviction)
+            with self._lock:
+                self._drop(key)
+                self._stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["bytes_saved"] += len(audio)
+        return audio
+
+    def put(self, key, audio):
+        """Store audio bytes under key and evict old entries if over budget"""
+        if not audio or len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(audio)
+            # Atomic rename so readers never see a half-written file
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error writing audio cache entry: {e}")
+            return
+
+        with self._lock:
+            self._drop(key)
+            self._index[key] = [len(audio), time.time()]
+            self._total_bytes += len(audio)
+            self._stats["writes"] += 1
+            self._evict()
+
+    def get_or_create(self, key, synthesize):
+        """Return cached audio, calling synthesize() to fill the cache on a miss"""
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize()
+            if audio:
+                self.put(key, audio)
+        return audio
+
+    def stats(self):
+        """Return hit ratio, bytes saved and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._index)
+            stats["total_bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def _load_index(self):
+        suffix = f".{self.extension}"
+        for name in os.listdir(self.directory):
+            if not name.endswith(suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            self._index[name[:-len(suffix)]] = [stat.st_size, stat.st_mtime]
+            self._total_bytes += stat.st_size
+        self._evict()
+
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[0]
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._drop(key)
+            self._stats["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
@@ -0,0 +1,265 @@
+import io
+import os
+import time
+import wave
+import shutil
+import struct
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from config import SpeechConfig
+
+# ffmpeg output options per target format; anything else is passed as -f <format>
+FORMAT_ARGS = {
+    "mp3": ["-f", "mp3"],
+    "wav": ["-f", "wav"],
+    "ogg": ["-f", "ogg"],
+    "webm": ["-f", "webm"],
+    "flac": ["-f", "flac"],
+    "aac": ["-f", "adts"],
+    # Plain MP4 seeks back to write its index at the end; fragmented MP4 can go down a pipe
+    "m4a": ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov"],
+    "mp4": ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov"],
+    # Raw LINEAR16, what Google Speech-to-Text takes
+    "pcm": ["-f", "s16le", "-acodec", "pcm_s16le"],
+}
+
+
+def fix_wav_header(data):
+    """Fill in the RIFF and data chunk sizes ffmpeg leaves unset when writing WAV to a pipe"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return data
+    fixed = bytearray(data)
+    struct.pack_into("<I", fixed, 4, len(fixed) - 8)
+    pos = 12
+    while pos + 8 <= len(fixed):
+        chunk_id = bytes(fixed[pos:pos + 4])
+        if chunk_id == b"data":
+            struct.pack_into("<I", fixed, pos + 4, len(fixed) - pos - 8)
+            break
+        size = struct.unpack_from("<I", fixed, pos + 4)[0]
+        pos += 8 + size + (size & 1)
+    return bytes(fixed)
+
+
+def _is_mp4(data):
+    # MP4/M4A (Safari and iOS recordings) usually keep their index after the
+    # audio, which ffmpeg can't seek back to in a pipe once the file outgrows
+    # its probe buffer; those are read from a temporary file instead
+    return data[4:8] == b"ftyp"
+
+
+def _write_temp_input(data):
+    with tempfile.NamedTemporaryFile(suffix=".m4a", delete=False) as input_file:
+        input_file.write(data)
+    return input_file.name
+
+
+def _read_pcm_wav(data):
+    """(sample_rate, channels, 16-bit frames) of a plain PCM WAV, or None for anything else"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                return None
+            return wav.getframerate(), wav.getnchannels(), wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+
+class AudioTranscoder:
+    """Converts audio between formats by piping it through ffmpeg
+
+    Input goes in on ffmpeg's stdin and the result comes back on stdout, so
+    a conversion is one process and (MP4 input aside) no temporary files.
+    Conversions run in a pool of `workers` threads, which also caps how
+    many ffmpeg processes run at once; the threads only wait on pipes,
+    ffmpeg does the work.
+    16-bit PCM WAV that only needs its container changed (to WAV or raw
+    PCM at the same rate and channel count) is handled in-process without
+    starting ffmpeg at all.
+    """
+    def __init__(self, ffmpeg="ffmpeg", workers=4, timeout=30):
+        self.ffmpeg = ffmpeg
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcode")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._stats = {"conversions": 0, "streams": 0, "in_process": 0, "errors": 0,
+                       "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+
+    def available(self):
+        return shutil.which(self.ffmpeg) is not None
+
+    def transcode(self, audio_data, target_format="mp3", sample_rate=None, channels=None):
+        """Return audio_data converted to target_format (optionally resampled/remixed)
+
+        Raises RuntimeError when ffmpeg fails or isn't installed and
+        subprocess.TimeoutExpired when it runs longer than timeout seconds.
+        """
+        converted = self._convert_in_process(audio_data, target_format, sample_rate, channels)
+        if converted is not None:
+            return converted
+        return self._executor.submit(self._run, audio_data, target_format, sample_rate, channels).result()
+
+    def stream(self, audio_data, target_format="mp3", sample_rate=None, channels=None, chunk_size=16384):
+        """Yield the converted audio in chunks as ffmpeg produces them
+
+        The first bytes can be sent before the whole input is converted.
+        Streamed WAV keeps ffmpeg's open-ended header (sizes of 0xFFFFFFFF),
+        which browsers and ffmpeg accept; use transcode() for a complete
+        file. Closing the generator early stops ffmpeg.
+        """
+        converted = self._convert_in_process(audio_data, target_format, sample_rate, channels)
+        if converted is not None:
+            for start in range(0, len(converted), chunk_size):
+                yield converted[start:start + chunk_size]
+            return
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RuntimeError(f"no ffmpeg slot free after {self.timeout}s")
+        started = time.perf_counter()
+        process = None
+        input_path = None
+        sent = 0
+        try:
+            if not self.available():
+                raise RuntimeError(f"{self.ffmpeg} not found")
+            if _is_mp4(audio_data):
+                input_path = _write_temp_input(audio_data)
+            process = subprocess.Popen(self._command(input_path or "pipe:0", target_format, sample_rate, channels),
+                                       stdin=subprocess.DEVNULL if input_path else subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if input_path is None:
+                # Feed stdin from another thread so a full stdout pipe can't deadlock us
+                threading.Thread(target=self._feed, args=(process, audio_data), name="transcode-feed",
+                                 daemon=True).start()
+            while True:
+                chunk = process.stdout.read1(chunk_size)
+                if not chunk:
+                    break
+                sent += len(chunk)
+                yield chunk
+                if time.perf_counter() - started > self.timeout:
+                    raise subprocess.TimeoutExpired(process.args, self.timeout)
+            if process.wait(timeout=self.timeout) != 0 or not sent:
+                raise RuntimeError(f"ffmpeg failed: {process.stderr.read().decode('utf-8', 'replace').strip()}")
+            self._record("streams", len(audio_data), sent, started)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            if process is not None:
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+                process.stderr.close()
+            if input_path is not None:
+                os.unlink(input_path)
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        runs = stats["conversions"] + stats["streams"] + stats["in_process"]
+        seconds = stats.pop("seconds")
+        stats["avg_ms"] = round(seconds / runs * 1000, 1) if runs else None
+        stats["workers"] = self.workers
+        stats["ffmpeg"] = self.available()
+        return stats
+
+    def _command(self, source, target_format, sample_rate, channels):
+        command = [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-i", source, "-vn"]
+        if sample_rate:
+            command += ["-ar", str(sample_rate)]
+        if channels:
+            command += ["-ac", str(channels)]
+        return command + FORMAT_ARGS.get(target_format, ["-f", target_format]) + ["pipe:1"]
+
+    def _run(self, audio_data, target_format, sample_rate, channels):
+        started = time.perf_counter()
+        with self._slots:
+            try:
+                if not self.available():
+                    raise RuntimeError(f"{self.ffmpeg} not found")
+                result = subprocess.run(self._command("pipe:0", target_format, sample_rate, channels),
+                                        input=audio_data, capture_output=True, timeout=self.timeout)
+                if (result.returncode != 0 or not result.stdout) and _is_mp4(audio_data):
+                    result = self._run_from_file(audio_data, target_format, sample_rate, channels)
+                # A demuxing error part way through can still exit 0
+                if result.returncode != 0 or not result.stdout:
+                    raise RuntimeError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+        output = fix_wav_header(result.stdout) if target_format == "wav" else result.stdout
+        self._record("conversions", len(audio_data), len(output), started)
+        return output
+
+    def _run_from_file(self, audio_data, target_format, sample_rate, channels):
+        input_path = _write_temp_input(audio_data)
+        try:
+            return subprocess.run(self._command(input_path, target_format, sample_rate, channels),
+                                  capture_output=True, timeout=self.timeout)
+        finally:
+            os.unlink(input_path)
+
+    def _convert_in_process(self, audio_data, target_format, sample_rate, channels):
+        if target_format not in ("wav", "pcm"):
+            return None
+        wav = _read_pcm_wav(audio_data)
+        if wav is None or (sample_rate and sample_rate != wav[0]) or (channels and channels != wav[1]):
+            return None
+        started = time.perf_counter()
+        if target_format == "pcm":
+            output = wav[2]
+        else:
+            output = io.BytesIO()
+            with wave.open(output, "wb") as out:
+                out.setnchannels(wav[1])
+                out.setsampwidth(2)
+                out.setframerate(wav[0])
+                out.writeframes(wav[2])
+            output = output.getvalue()
+        self._record("in_process", len(audio_data), len(output), started)
+        return output
+
+    def _feed(self, process, audio_data):
+        try:
+            process.stdin.write(audio_data)
+        except (BrokenPipeError, ValueError, OSError):
+            # ffmpeg exited early (bad input) or the stream was closed; the reader reports it
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def _record(self, kind, bytes_in, bytes_out, started):
+        with self._lock:
+            self._stats[kind] += 1
+            self._stats["bytes_in"] += bytes_in
+            self._stats["bytes_out"] += bytes_out
+            self._stats["seconds"] += time.perf_counter() - started
+
+
+# Create a singleton instance
+_transcoder = None
+
+def get_transcoder():
+    """The shared AudioTranscoder, created on first use"""
+    global _transcoder
+    if _transcoder is None:
+        _transcoder = AudioTranscoder(
+            SpeechConfig.FFMPEG_PATH,
+            workers=SpeechConfig.TRANSCODE_WORKERS,
+            timeout=SpeechConfig.TRANSCODE_TIMEOUT
+        )
+    return _transcoder
@@ -1,7 +1,22 @@
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, auth
 import os
 import json
+from config import StorageConfig
+from services.event_log import UserEventLog
+from services.progress_service import ProgressStore
+from services.lazy_import import lazy_import
+
+# Firestore pulls in the Google Cloud client stack; load it with the first client
+firestore = lazy_import("firebase_admin.firestore")
+
+# One log per process so appends for a user share a lock and flusher
+learning_log = UserEventLog(
+    StorageConfig.USER_DATA_DIR,
+    fsync_interval=StorageConfig.EVENT_LOG_FSYNC_INTERVAL,
+    compact_every=StorageConfig.EVENT_LOG_COMPACT_EVERY
+)
+progress_store = ProgressStore(StorageConfig.PROGRESS_DB_PATH)
 
 def init_firebase():
     """Initialize Firebase Admin SDK and return Firestore client"""
@@ -73,46 +88,58 @@ def get_user_profile(uid):
         return None
 
 def get_user_learning_data(user_id):
-    """Get user's learning data from storage"""
+    """Get user's learning data: library lists plus interaction history"""
     try:
-        # For now, we'll use a simple file-based storage
-        # In a real application, this would be a database
-        data_file = f'user_data/{user_id}_learning.json'
-        
-        if os.path.exists(data_file):
-            with open(data_file, 'r') as f:
-                return json.load(f)
-        else:
-            # Return default structure if no data exists
-            return {
-                'books': [],
-                'courses': []
-            }
+        return learning_log.read(user_id)
     except Exception as e:
         print(f"Error getting user learning data: {str(e)}")
         return None
 
 def store_user_learning_data(user_id, data):
-    """Store user's learning data"""
+    """Append one interaction record to the user's learning log"""
     try:
-        # Create user_data directory if it doesn't exist
-        os.makedirs('user_data', exist_ok=True)
-        
-        # Save data to file
-        data_file = f'user_data/{user_id}_learning.json'
-        with open(data_file, 'w') as f:
-            json.dump(data, f)
+        learning_log.append(user_id, data)
+        progress_store.record(user_id, data)
         return True
     except Exception as e:
         print(f"Error storing user learning data: {str(e)}")
         return False
 
-def get_user_learning_history(uid):
-    """Get user learning history from Firestore"""
+def save_user_learning_data(user_id, data):
+    """Replace the user's library lists (books, courses) in one durable write"""
+    try:
+        # History is append-only; writing back a copy read earlier would
+        # drop records appended by concurrent requests in the meantime
+        library = {key: value for key, value in data.items() if key != 'history'}
+        return learning_log.append(user_id, library, op='replace', sync=True)
+    except Exception as e:
+        print(f"Error saving user learning data: {str(e)}")
+        return False
+
+def get_user_learning_history(uid, limit=50):
+    """Get user learning history from Firestore (limit=None for all of it)"""
     try:
         db = firestore.client()
-        learning_docs = db.collection('users').document(uid).collection('learning').order_by('timestamp', direction='desc').limit(50).stream()
+        query = db.collection('users').document(uid).collection('learning').order_by('timestamp', direction='desc')
+        if limit is not None:
+            query = query.limit(limit)
+        learning_docs = query.stream()
         return [doc.to_dict() for doc in learning_docs]
     except Exception as e:
         print(f"Error getting learning history: {e}")
-        return [] 
\ No newline at end of file
+        return [] 
+
+def get_user_progress(uid):
+    """Get per-topic progress aggregates for a user"""
+    try:
+        return progress_store.get(uid)
+    except Exception as e:
+        print(f"Error getting user progress: {e}")
+        return []
+
+def rebuild_user_progress(uid, include_firestore=True):
+    """Recompute a user's progress aggregates from their stored history"""
+    records = list(learning_log.read(uid).get('history', []))
+    if include_firestore:
+        records.extend(get_user_learning_history(uid, limit=None))
+    return progress_store.rebuild(uid, records)
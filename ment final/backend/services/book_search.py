@@ -0,0 +1,132 @@
+import time
+import threading
+from collections import OrderedDict
+
+COVER_URL = "https://covers.openlibrary.org/b/id/{}-M.jpg"
+SEARCH_FIELDS = "title,author_name,cover_i,first_publish_year,key"
+
+
+def normalize_query(query):
+    """Collapse whitespace and case so "Harry  Potter" and "harry potter" share an entry"""
+    return " ".join(str(query).split()).lower()
+
+
+def shape_book(doc):
+    """Trim an Open Library search doc to what the library page shows, cover URL included"""
+    cover_id = doc.get("cover_i")
+    return {
+        "id": doc.get("key", "").replace("/works/", ""),
+        "title": doc.get("title", ""),
+        "author": (doc.get("author_name") or ["Unknown"])[0],
+        "year": doc.get("first_publish_year", ""),
+        "coverUrl": COVER_URL.format(cover_id) if cover_id else None
+    }
+
+
+class SearchUnavailable(Exception):
+    """Open Library failed and nothing usable is cached for the query"""
+
+
+class _Flight:
+    """One upstream request that concurrent identical searches wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BookSearch:
+    """Open Library search with a TTL cache and single-flight upstream requests
+
+    Results are cached under the normalized query with the books already
+    shaped (cover URLs included), so a hit is one dict lookup. Concurrent
+    misses for the same query share one upstream request. If Open Library
+    errors or throttles us, an expired entry up to stale_ttl seconds old
+    is served instead.
+    """
+    def __init__(self, session, base_url="https://openlibrary.org", ttl=3600, max_entries=2000,
+                 stale_ttl=86400, limit=10):
+        self.session = session
+        self.search_url = base_url.rstrip("/") + "/search.json"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.limit = limit
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "upstream_errors": 0, "evictions": 0}
+
+    def search(self, query):
+        """Return the shaped books for query; raises SearchUnavailable"""
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            books = self._fetch(key)
+            self._store(key, books)
+            flight.result = books
+        except Exception as e:
+            with self._lock:
+                self._stats["upstream_errors"] += 1
+            print(f"Error searching Open Library for {key!r}: {e}")
+            if entry is not None and entry[1] + self.stale_ttl > now:
+                with self._lock:
+                    self._stats["stale"] += 1
+                flight.result = entry[0]
+            else:
+                flight.error = SearchUnavailable(str(e))
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+    def _fetch(self, query):
+        response = self.session.get(self.search_url, params={
+            "q": query,
+            "fields": SEARCH_FIELDS,
+            "limit": self.limit
+        })
+        if response.status_code != 200:
+            raise SearchUnavailable(f"Open Library returned {response.status_code}")
+        return [shape_book(doc) for doc in response.json().get("docs", [])]
+
+    def _store(self, key, books):
+        with self._lock:
+            self._entries[key] = (books, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Only these settings change the prompt text, so voice/speed/pitch
+# differences shouldn't split the cache
+PROMPT_SETTINGS_KEYS = ("teaching_style", "personality", "difficulty")
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and case so trivially different prompts share a key"""
+    return " ".join(str(prompt).split()).lower()
+
+
+class ResponseCache:
+    """Content-addressed cache for LLM responses
+
+    Entries live in an in-memory LRU tier and, if db_path is given, in a
+    SQLite tier that survives restarts and is shared between workers.
+    Both tiers expire entries after ttl seconds.
+    """
+    def __init__(self, max_entries=1000, ttl=86400, db_path=None, max_disk_entries=20000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expired": 0
+        }
+
+        if db_path:
+            self._init_db()
+
+    @staticmethod
+    def make_key(model, prompt, user_settings=None, index_version=None):
+        """Build the cache key for a (model, prompt, settings) triple
+
+        index_version is the document index version the prompt was answered
+        from, so answers aren't replayed once the course documents change.
+        """
+        settings = {k: (user_settings or {}).get(k) for k in PROMPT_SETTINGS_KEYS}
+        settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+        material = f"{model}\n{settings_hash}\n{normalize_prompt(prompt)}"
+        if index_version:
+            material += f"\n{index_version}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                value, expires_at = self._db_get(key, now)
+                if value is not None:
+                    # Promote so the next lookup is served from memory
+                    self._memory_set(key, value, expires_at)
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return value
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store value under key in every tier"""
+        if value is None:
+            return
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._memory_set(key, value, expires_at)
+            if self._db is not None:
+                self._db_set(key, value, expires_at)
+            self._stats["sets"] += 1
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+            stats["disk_enabled"] = self._db is not None
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _memory_set(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _init_db(self):
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._db.commit()
+        except Exception as e:
+            print(f"Error opening response cache database: {e}")
+            self._db = None
+
+    def _db_get(self, key, now):
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats["expired"] += 1
+                return None, None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0], row[1]
+        except Exception as e:
+            print(f"Error reading response cache database: {e}")
+            return None, None
+
+    def _db_set(self, key, value, expires_at):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time())
+            )
+            # Trim the least recently used rows once the table outgrows its budget
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_disk_entries:
+                removed = self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_disk_entries,)
+                ).rowcount
+                self._stats["evictions"] += removed
+            self._db.commit()
+        except Exception as e:
+            print(f"Error writing response cache database: {e}")
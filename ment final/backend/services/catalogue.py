@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+from email.utils import format_datetime
+from types import MappingProxyType
+from datetime import datetime, timezone
+from config import ResourceConfig
+
+
+class StaticJSON:
+    """A response body serialized once, with the validators needed for 304s"""
+    __slots__ = ("body", "etag", "last_modified", "headers")
+
+    def __init__(self, payload, last_modified):
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.last_modified = last_modified
+        # Header values are fixed too, so format them once
+        self.headers = {
+            "ETag": f'"{self.etag}"',
+            "Last-Modified": format_datetime(last_modified, usegmt=True)
+        }
+
+
+class Catalogue:
+    """Courses, topics and games loaded once from a JSON data file
+
+    Every response the catalogue endpoints can return is serialized up
+    front and indexed by course id, topic id and game category, so a
+    request is a dict lookup plus headers. The indexes are read-only.
+    """
+    def __init__(self, path):
+        self.path = path
+        data = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            modified = datetime.fromtimestamp(int(os.path.getmtime(path)), tz=timezone.utc)
+        except Exception as e:
+            print(f"Error loading catalogue from {path}: {e}")
+            modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+        courses = data.get("courses", [])
+        topics = data.get("topics", [])
+        games = data.get("games", [])
+
+        self.courses = StaticJSON({"courses": courses}, modified)
+        self.topics = StaticJSON({"topics": topics}, modified)
+        self.games = StaticJSON({"games": games}, modified)
+        self.course_by_id = MappingProxyType({
+            course_id: StaticJSON({"course": course}, modified)
+            for course_id, course in data.get("courseDetails", {}).items()
+        })
+        self.topic_by_id = MappingProxyType({
+            topic["id"]: StaticJSON({"topic": topic}, modified) for topic in topics
+        })
+        categories = {}
+        for game in games:
+            categories.setdefault(game.get("category"), []).append(game)
+        self.games_by_category = MappingProxyType({
+            category: StaticJSON({"games": members}, modified) for category, members in categories.items()
+        })
+
+
+# Create a singleton instance
+_catalogue = None
+
+def get_catalogue():
+    """Load the catalogue on first use and share it between route modules"""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = Catalogue(ResourceConfig.CATALOGUE_PATH)
+    return _catalogue
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+def empty_learning_data():
+    """Default learning document for a user with no history"""
+    return {
+        'books': [],
+        'courses': [],
+        'history': []
+    }
+
+
+def apply_event(state, event):
+    """Fold one logged event into a learning document"""
+    op = event.get('op')
+    if op == 'record':
+        state.setdefault('history', []).append(event['data'])
+    elif op == 'replace':
+        history = state.get('history', [])
+        state.clear()
+        state.update(empty_learning_data())
+        state.update(event['data'])
+        # Whole-document writes come from library edits, which know nothing
+        # about interaction history, so keep it unless they replaced it
+        if 'history' not in event['data']:
+            state['history'] = history
+    return state
+
+
+class UserEventLog:
+    """Append-only per-user learning log with background fsync and compaction
+
+    Every write appends one JSON line to user_data/{uid}_events.jsonl, so a
+    write costs O(record) no matter how long the history is, and concurrent
+    writers for the same user can't overwrite each other. A background
+    thread fsyncs dirty logs in batches and folds long logs into the
+    user_data/{uid}_learning.json snapshot.
+    """
+    def __init__(self, directory='user_data', fsync_interval=0.05, compact_every=200):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._dirty = set()
+        self._pending = {}  # user_id -> events appended since the last compaction
+        self._state_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stats = {'appends': 0, 'fsyncs': 0, 'compactions': 0}
+        self._flusher = None
+
+    def append(self, user_id, data, op='record', sync=False):
+        """Append an event for user_id; sync=True waits for it to hit the disk"""
+        line = json.dumps({'op': op, 'ts': time.time(), 'data': data}, default=str) + '\n'
+        path = self._log_path(user_id)
+        os.makedirs(self.directory, exist_ok=True)
+
+        with self._user_lock(user_id):
+            with open(path, 'a', encoding='utf-8') as f:
+                self._flock(f)
+                f.write(line)
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+
+        with self._state_lock:
+            self._stats['appends'] += 1
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+            if not sync:
+                self._dirty.add(user_id)
+        self._ensure_flusher()
+        if self._pending[user_id] >= self.compact_every:
+            self._wakeup.set()
+        return True
+
+    def read(self, user_id):
+        """Return the user's learning document: snapshot plus any newer events"""
+        with self._user_lock(user_id):
+            try:
+                log = open(self._log_path(user_id), 'r', encoding='utf-8')
+            except FileNotFoundError:
+                # Compaction never removes the log, so there is nothing newer to fold in
+                return self._read_snapshot(user_id)
+            with log:
+                # Shared lock across both reads so another worker can't compact
+                # (rewrite the snapshot, truncate the log) in between
+                self._flock(log, shared=True)
+                state = self._read_snapshot(user_id)
+                for event in self._parse_lines(log.read()):
+                    apply_event(state, event)
+        return state
+
+    def compact(self, user_id):
+        """Fold the event log into the snapshot and truncate the log"""
+        path = self._log_path(user_id)
+        with self._user_lock(user_id):
+            if not os.path.exists(path):
+                return False
+            with open(path, 'r+', encoding='utf-8') as log:
+                # Hold the file lock across read + truncate so another worker
+                # can't append an event in between and lose it
+                self._flock(log)
+                events = self._parse_lines(log.read())
+                if not events:
+                    return False
+                state = self._read_snapshot(user_id)
+                for event in events:
+                    apply_event(state, event)
+                self._write_snapshot(user_id, state)
+                log.seek(0)
+                log.truncate()
+                log.flush()
+                os.fsync(log.fileno())
+
+        with self._state_lock:
+            self._pending.pop(user_id, None)
+            self._stats['compactions'] += 1
+        return True
+
+    def flush(self):
+        """fsync every log written since the last flush"""
+        with self._state_lock:
+            dirty, self._dirty = self._dirty, set()
+        for user_id in dirty:
+            try:
+                fd = os.open(self._log_path(user_id), os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"Error syncing learning log for {user_id}: {e}")
+        if dirty:
+            with self._state_lock:
+                self._stats['fsyncs'] += 1
+
+    def stats(self):
+        with self._state_lock:
+            stats = dict(self._stats)
+            stats['dirty_users'] = len(self._dirty)
+        return stats
+
+    def _run_flusher(self):
+        while True:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                with self._state_lock:
+                    due = [uid for uid, count in self._pending.items() if count >= self.compact_every]
+                for user_id in due:
+                    self.compact(user_id)
+            except Exception as e:
+                print(f"Error in learning log flusher: {e}")
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._state_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run_flusher, name='learning-log-flusher', daemon=True)
+                self._flusher.start()
+
+    def _user_lock(self, user_id):
+        with self._locks_guard:
+            if user_id not in self._locks:
+                self._locks[user_id] = threading.RLock()
+            return self._locks[user_id]
+
+    def _flock(self, f, shared=False):
+        # Released automatically when the file is closed
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+    def _log_path(self, user_id):
+        return os.path.join(self.directory, f'{user_id}_events.jsonl')
+
+    def _snapshot_path(self, user_id):
+        return os.path.join(self.directory, f'{user_id}_learning.json')
+
+    def _parse_lines(self, text):
+        events = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact
+                print("Skipping corrupt learning log line")
+        return events
+
+    def _read_snapshot(self, user_id):
+        state = empty_learning_data()
+        try:
+            with open(self._snapshot_path(user_id), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return state
+        except json.JSONDecodeError as e:
+            print(f"Error reading learning snapshot for {user_id}: {e}")
+            return state
+
+        if isinstance(snapshot, dict) and ('books' in snapshot or 'courses' in snapshot or 'history' in snapshot):
+            state.update(snapshot)
+        elif snapshot:
+            # Legacy file that was clobbered by a single interaction record
+            state['history'].append(snapshot)
+        return state
+
+    def _write_snapshot(self, user_id, state):
+        path = self._snapshot_path(user_id)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
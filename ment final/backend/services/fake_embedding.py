@@ -0,0 +1,60 @@
+import re
+import hashlib
+
+from services.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Question words and fillers that don't change what is being asked about
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "what", "whats", "s", "explain", "describe", "tell", "me",
+    "about", "please", "can", "you", "how", "does", "do", "of", "to", "in", "and", "define", "mean",
+    "meaning", "by", "i", "want", "know", "understand"
+}
+
+
+class FakeEmbedder:
+    """Local stand-in for an embedding model
+
+    A hashed bag of content words: question words and fillers are dropped,
+    plurals are trimmed, and adjacent words are also joined, so "what is a
+    dataset?" and "Explain datasets please" embed identically while "what
+    is a data set" only partly overlaps them. Each word also contributes
+    its character trigrams at a low weight, for small misspellings. Deterministic and offline, for
+    benchmarks and MENTAURA_FAKE_LLM runs; it knows nothing about meaning,
+    so paraphrases that use different words score low.
+    """
+    def __init__(self, dim=384, trigram_weight=0.15):
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+        self.calls = 0
+        self._buckets = {}
+
+    def embed(self, text):
+        self.calls += 1
+        words = [self._stem(w) for w in re.findall(r"[a-z0-9]+", str(text).lower().replace("'", ""))]
+        words = [w for w in words if w not in STOPWORDS]
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        features = words + [a + b for a, b in zip(words, words[1:])]
+        for word in features:
+            index, sign = self._bucket(word)
+            vector[index] += sign
+            for i in range(len(word) - 2):
+                index, sign = self._bucket("#" + word[i:i + 3])
+                vector[index] += sign * self.trigram_weight
+        norm = np.linalg.norm(vector)
+        return (vector / norm).tolist() if norm else vector.tolist()
+
+    def _stem(self, word):
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            return word[:-1]
+        return word
+
+    def _bucket(self, feature):
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            bucket = self._buckets[feature] = (value % self.dim, 1.0 if value >> 63 else -1.0)
+        return bucket
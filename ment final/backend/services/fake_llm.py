@@ -0,0 +1,85 @@
+import time
+import asyncio
+import hashlib
+
+
+class FakeResponse:
+    """Mimics the parts of a Gemini response object that the services use"""
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Local stand-in for genai.GenerativeModel that emits chunks on a timer
+
+    Lets the streaming path and the routes be exercised without network
+    access or API keys. Responses are deterministic for a given prompt.
+    """
+    model_name = "fake-gemini"
+
+    def __init__(self, first_chunk_delay=0.2, chunk_delay=0.05, words_per_chunk=3, sentences=6):
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.words_per_chunk = words_per_chunk
+        self.sentences = sentences
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False):
+        """Return a complete response, or an iterator of chunks if stream=True"""
+        self.calls += 1
+        prompt = contents[0] if isinstance(contents, list) else contents
+        text = self._compose(prompt)
+
+        if stream:
+            return self._stream(text)
+
+        # A blocking call costs the same as receiving every chunk
+        chunk_count = len(self._split(text))
+        time.sleep(self.first_chunk_delay + self.chunk_delay * max(chunk_count - 1, 0))
+        return FakeResponse(text)
+
+    async def generate_content_async(self, contents, stream=False):
+        """Async counterpart of generate_content; waits without holding a thread"""
+        self.calls += 1
+        prompt = contents[0] if isinstance(contents, list) else contents
+        text = self._compose(prompt)
+
+        if stream:
+            return self._stream_async(text)
+
+        chunk_count = len(self._split(text))
+        await asyncio.sleep(self.first_chunk_delay + self.chunk_delay * max(chunk_count - 1, 0))
+        return FakeResponse(text)
+
+    async def _stream_async(self, text):
+        await asyncio.sleep(self.first_chunk_delay)
+        for index, chunk in enumerate(self._split(text)):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+            yield FakeResponse(chunk)
+
+    def _stream(self, text):
+        time.sleep(self.first_chunk_delay)
+        for index, chunk in enumerate(self._split(text)):
+            if index:
+                time.sleep(self.chunk_delay)
+            yield FakeResponse(chunk)
+
+    def _split(self, text):
+        words = text.split(" ")
+        chunks = []
+        for i in range(0, len(words), self.words_per_chunk):
+            chunk = " ".join(words[i:i + self.words_per_chunk])
+            # Keep the separating space so the joined chunks equal the full text
+            if i + self.words_per_chunk < len(words):
+                chunk += " "
+            chunks.append(chunk)
+        return chunks
+
+    def _compose(self, prompt):
+        topic = " ".join(str(prompt).split()[-8:]).rstrip(".?!")
+        digest = hashlib.sha1(str(prompt).encode("utf-8")).hexdigest()[:8]
+        sentences = [f"Let me explain {topic}."]
+        for i in range(1, self.sentences):
+            sentences.append(f"This is an important point number {i} about the topic (ref {digest}).")
+        return " ".join(sentences)
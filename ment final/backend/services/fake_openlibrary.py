@@ -0,0 +1,86 @@
+import json
+import time
+import hashlib
+import threading
+import http.server
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeOpenLibrary:
+    """Local stand-in for openlibrary.org/search.json
+
+    Serves deterministic results for any query after a fixed latency and
+    counts the requests it receives, so caching and coalescing can be
+    checked offline. Point OPENLIBRARY_URL at base_url to use it in place
+    of the real service. Set status to 429 or 503 to simulate throttling
+    or an outage.
+    """
+    def __init__(self, latency=0.05, status=200):
+        self.latency = latency
+        self.status = status
+        self.requests = 0
+        self.queries = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query).get("q", [""])[0]
+                limit = int(parse_qs(url.query).get("limit", ["10"])[0])
+                fake.record(query)
+                time.sleep(fake.latency)
+
+                status = fake.status if url.path == "/search.json" else 404
+                body = json.dumps(fake.results(query, limit) if status == 200 else {"error": status}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-openlibrary", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def record(self, query):
+        with self._lock:
+            self.requests += 1
+            self.queries[query] = self.queries.get(query, 0) + 1
+
+    def results(self, query, limit=10):
+        digest = int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:8], 16)
+        docs = []
+        for i in range(limit):
+            doc = {
+                "key": f"/works/OL{digest + i}W",
+                "title": f"{query.title()} Volume {i + 1}",
+                "author_name": [f"Author {(digest + i) % 97}"],
+                "first_publish_year": 1950 + (digest + i) % 70
+            }
+            # Some real results have no cover
+            if i % 3:
+                doc["cover_i"] = digest % 1000000 + i
+            docs.append(doc)
+        return {"numFound": limit, "docs": docs}
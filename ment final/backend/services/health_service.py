@@ -0,0 +1,89 @@
+import time
+import threading
+
+UNKNOWN = "unknown"
+OK = "ok"
+ERROR = "error"
+
+
+class ProviderHealth:
+    """Background health probes for external providers
+
+    Probes never run at import time or in a request thread. start() launches
+    a daemon thread that checks every registered provider once, then again
+    every interval seconds; status() and ready() only read the last result.
+    """
+    def __init__(self, interval=300):
+        self.interval = interval
+        self._probes = {}
+        self._results = {}
+        self._required = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def register(self, name, probe, required=False):
+        """Add a probe; required providers gate readiness (any one of them being ok is enough)"""
+        with self._lock:
+            self._probes[name] = probe
+            self._results[name] = {"status": UNKNOWN, "checked_at": None, "latency_ms": None, "error": None}
+            if required:
+                self._required.add(name)
+
+    def start(self):
+        """Start probing in the background; safe to call more than once"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="provider-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def probe_all(self):
+        """Run every probe once, sequentially, and record the results"""
+        with self._lock:
+            probes = list(self._probes.items())
+        for name, probe in probes:
+            self._probe(name, probe)
+
+    def status(self):
+        """Return the last result for every provider"""
+        with self._lock:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def ready(self):
+        """True once at least one required provider has passed its probe"""
+        with self._lock:
+            if not self._required:
+                return True
+            return any(self._results[name]["status"] == OK for name in self._required)
+
+    def _probe(self, name, probe):
+        started = time.monotonic()
+        try:
+            healthy = probe()
+            status = OK if healthy is not False else ERROR
+            error = None if status == OK else "unavailable"
+        except Exception as e:
+            status = ERROR
+            error = str(e)
+        result = {
+            "status": status,
+            "checked_at": time.time(),
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "error": error
+        }
+        with self._lock:
+            self._results[name] = result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                print(f"Error probing providers: {e}")
+            if not self.interval:
+                break
+            self._stop.wait(self.interval)
@@ -0,0 +1,89 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PooledSession:
+    """Keep-alive HTTP session for one provider
+
+    Every call reuses connections from a bounded pool and gets a
+    (connect, read) timeout unless the caller passes its own. Failed
+    connection attempts are retried with backoff for any method, since the
+    request never left. Read errors and 502/503/504 responses are only
+    retried for idempotent methods (GET, HEAD, ...), so a POST to a paid
+    API is never sent twice.
+    """
+    def __init__(self, name, pool_size=10, connect_timeout=3.05, read_timeout=30, retries=2, backoff=0.5):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._counts = {"requests": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        self._count("requests")
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Requests vs TCP/TLS connections opened; reuse is the share that skipped a handshake"""
+        with self._lock:
+            stats = dict(self._counts)
+        opened = attempts = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                attempts += pool.num_requests
+        stats["connections_opened"] = opened
+        # urllib3 counts every attempt, including retries
+        stats["retries"] = max(0, attempts - stats["requests"])
+        stats["reuse_ratio"] = round(1 - opened / attempts, 3) if attempts else None
+        return stats
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name, **kwargs):
+    """Return the process-wide session for a provider, creating it on first use"""
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = PooledSession(name, **kwargs)
+        return _sessions[name]
+
+
+def http_stats():
+    """Return connection reuse for every provider session, for health/metrics endpoints"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    return {session.name: session.stats() for session in sessions}
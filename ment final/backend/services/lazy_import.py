@@ -0,0 +1,73 @@
+import time
+import importlib
+import threading
+
+_modules = {}
+_modules_lock = threading.Lock()
+_load_times = {}
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    Lets heavy optional libraries (OpenCV, Tesseract, Google Cloud speech,
+    pydub, Edge TTS) stay out of worker start-up and resident memory until
+    a request actually needs them.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import the real module (once) and return it"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _load_times[self._name] = round((time.perf_counter() - started) * 1000, 1)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the shared lazy proxy for module name"""
+    with _modules_lock:
+        if name not in _modules:
+            _modules[name] = LazyModule(name)
+        return _modules[name]
+
+
+def warm_up(names, delay=0.0):
+    """Import modules in a background thread so the first request doesn't pay for it"""
+    def run():
+        if delay:
+            time.sleep(delay)
+        for name in names:
+            try:
+                lazy_import(name).load()
+            except ImportError as e:
+                print(f"Warm-up import of {name} failed: {e}")
+
+    thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_stats():
+    """Return which lazy modules are loaded and how long each import took (ms)"""
+    with _modules_lock:
+        names = list(_modules)
+    return {name: _load_times.get(name) for name in names}
@@ -0,0 +1,146 @@
+import random
+import importlib.util
+from functools import lru_cache
+
+from services.lazy_import import lazy_import
+
+# Loaded on the first batch; the pure-Python path covers installs without it
+np = lazy_import("numpy")
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+ADD, SUB, MUL, DIV, POW = range(5)
+
+# Per level: (kind, template, left operand range, right operand range, keep left >= right)
+# For DIV the ranges are (quotient, divisor), so every division comes out even.
+LEVELS = {
+    "beginner": [
+        (ADD, "What is {} + {}?", (1, 20), (1, 10), False),
+        (SUB, "What is {} - {}?", (1, 20), (1, 10), True),
+        (MUL, "What is {} × {}?", (1, 20), (1, 10), False),
+    ],
+    "intermediate": [
+        (ADD, "Calculate {} + {}", (10, 100), (10, 100), False),
+        (SUB, "Calculate {} - {}", (50, 150), (10, 50), False),
+        (MUL, "Calculate {} × {}", (5, 20), (5, 20), False),
+        (DIV, "Calculate {} ÷ {}", (2, 10), (2, 10), False),
+        (POW, "Calculate {}^{} (power)", (2, 10), (2, 3), False),
+    ],
+}
+
+
+def _shown(kind, a, b, swap):
+    """The operands as printed and the answer, for one sampled (a, b)"""
+    if swap and a < b:
+        a, b = b, a
+    if kind == DIV:
+        return a * b, b, a
+    answer = {ADD: a + b, SUB: a - b, MUL: a * b, POW: a ** b}[kind]
+    return a, b, answer
+
+
+@lru_cache(maxsize=None)
+def capacity(level):
+    """How many distinct questions a level can produce"""
+    distinct = set()
+    for op, (kind, _, (a_lo, a_hi), (b_lo, b_hi), swap) in enumerate(LEVELS[level]):
+        for a in range(a_lo, a_hi + 1):
+            for b in range(b_lo, b_hi + 1):
+                distinct.add((op,) + _shown(kind, a, b, swap)[:2])
+    return len(distinct)
+
+
+def math_question_batch(count, level="beginner", seed=None, unique=True):
+    """Generate count distinct arithmetic questions in one go
+
+    Operators are drawn uniformly and operands uniformly from the level's
+    ranges, as the game has always done. The same seed gives the same
+    worksheet. With unique (the default) no question appears twice in a
+    batch, so count can't exceed capacity(level); load tests that need
+    more can turn it off. Uses NumPy when installed, which produces tens of
+    thousands of questions per second; without it an equivalent Python
+    loop is used (same rules, different sequence for a given seed).
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown math level: {level}")
+    if unique and count > capacity(level):
+        raise ValueError(f"Only {capacity(level)} distinct {level} questions exist, {count} requested")
+    if count <= 0:
+        return []
+
+    if HAS_NUMPY:
+        ops, left, right, answers = _sample_numpy(count, LEVELS[level], seed, unique)
+    else:
+        ops, left, right, answers = _sample_python(count, LEVELS[level], seed, unique)
+
+    templates = [spec[1] for spec in LEVELS[level]]
+    return [
+        {
+            'id': f"math-{i + 1}",
+            'question': templates[op].format(a, b),
+            'type': 'number',
+            'answer': str(answer)
+        }
+        for i, (op, a, b, answer) in enumerate(zip(ops, left, right, answers))
+    ]
+
+
+def _sample_numpy(count, specs, seed, unique):
+    rng = np.random.default_rng(seed)
+    kinds = np.array([spec[0] for spec in specs])
+    a_lo, a_hi = np.array([spec[2] for spec in specs]).T
+    b_lo, b_hi = np.array([spec[3] for spec in specs]).T
+    swaps = np.array([spec[4] for spec in specs])
+
+    ops = left = right = answers = np.empty(0, dtype=np.int64)
+    size = count + count // 4 + 16 if unique else count
+    while len(ops) < count:
+        op = rng.integers(0, len(specs), size=size)
+        a = rng.integers(a_lo[op], a_hi[op] + 1)
+        b = rng.integers(b_lo[op], b_hi[op] + 1)
+
+        swap = swaps[op] & (a < b)
+        a, b = np.where(swap, b, a), np.where(swap, a, b)
+        kind = kinds[op]
+        shown = np.where(kind == DIV, a * b, a)
+        answer = np.select(
+            [kind == ADD, kind == SUB, kind == MUL, kind == DIV],
+            [a + b, a - b, a * b, a],
+            # Exponent 1 elsewhere so the unused powers can't overflow
+            default=a ** np.where(kind == POW, b, 1)
+        )
+
+        ops = np.concatenate([ops, op])
+        left = np.concatenate([left, shown])
+        right = np.concatenate([right, b])
+        answers = np.concatenate([answers, answer])
+        if not unique:
+            break
+
+        # Keep the first occurrence of each question, in the order drawn
+        keys = (ops << 42) | (left << 21) | right
+        _, first = np.unique(keys, return_index=True)
+        first.sort()
+        ops, left, right, answers = ops[first], left[first], right[first], answers[first]
+        # Later rounds mostly redraw questions already seen
+        size = max(size, 4 * (count - len(ops)))
+
+    return ops[:count].tolist(), left[:count].tolist(), right[:count].tolist(), answers[:count].tolist()
+
+
+def _sample_python(count, specs, seed, unique):
+    rng = random.Random(seed)
+    seen = set()
+    ops, left, right, answers = [], [], [], []
+    while len(ops) < count:
+        op = rng.randrange(len(specs))
+        kind, _, (a_lo, a_hi), (b_lo, b_hi), swap = specs[op]
+        a, b, answer = _shown(kind, rng.randint(a_lo, a_hi), rng.randint(b_lo, b_hi), swap)
+        if unique:
+            if (op, a, b) in seen:
+                continue
+            seen.add((op, a, b))
+        ops.append(op)
+        left.append(a)
+        right.append(b)
+        answers.append(answer)
+    return ops, left, right, answers
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+
+# Record types that count towards a topic's progress
+SESSION_TYPES = {
+    'learning-session': 'sessions',
+    'game-session': 'game_sessions'
+}
+
+
+def completion_for(sessions, reported=None):
+    """Completion percentage: 10% per session, or the reported value if higher"""
+    completion = min(100, sessions * 10)
+    if reported is not None:
+        completion = max(completion, min(100, int(round(reported))))
+    return completion
+
+
+def _reported_progress(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressStore:
+    """Per-user, per-topic progress counters kept up to date as records arrive
+
+    Each learning/game session or progress update bumps one row in a SQLite
+    table, so reading a user's progress is a single indexed query instead of
+    re-aggregating their history.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = None
+        self._init_db()
+
+    def record(self, user_id, record):
+        """Fold one learning record into the user's aggregates"""
+        if self._db is None or not isinstance(record, dict):
+            return False
+        topic = record.get('topic')
+        record_type = record.get('type')
+        if not topic or (record_type not in SESSION_TYPES and record_type != 'progress-update'):
+            return False
+
+        column = SESSION_TYPES.get(record_type)
+        reported = _reported_progress(record.get('progress')) if record_type == 'progress-update' else None
+        try:
+            with self._lock:
+                self._upsert(user_id, topic, column, record.get('timestamp'), reported)
+                self._db.commit()
+            return True
+        except Exception as e:
+            print(f"Error updating progress aggregates: {e}")
+            return False
+
+    def get(self, user_id):
+        """Return the user's progress, most recent activity first"""
+        if self._db is None:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT topic, sessions, game_sessions, last_activity, reported "
+                "FROM progress WHERE user_id = ? ORDER BY last_activity DESC",
+                (user_id,)
+            ).fetchall()
+
+        progress = []
+        for topic, sessions, game_sessions, last_activity, reported in rows:
+            # Topics only seen in games or progress updates weren't listed before
+            if not sessions and reported is None:
+                continue
+            progress.append({
+                'topic': topic,
+                'completion': completion_for(sessions, reported),
+                'last_activity': last_activity,
+                'sessions': sessions,
+                'game_sessions': game_sessions
+            })
+        return progress
+
+    def rebuild(self, user_id, records):
+        """Replace the user's aggregates with ones computed from records"""
+        if self._db is None:
+            return 0
+        count = 0
+        with self._lock:
+            try:
+                self._db.execute("DELETE FROM progress WHERE user_id = ?", (user_id,))
+                for record in records:
+                    if not isinstance(record, dict) or not record.get('topic'):
+                        continue
+                    record_type = record.get('type')
+                    if record_type in SESSION_TYPES:
+                        self._upsert(user_id, record['topic'], SESSION_TYPES[record_type], record.get('timestamp'), None)
+                    elif record_type == 'progress-update':
+                        self._upsert(user_id, record['topic'], None, record.get('timestamp'),
+                                     _reported_progress(record.get('progress')))
+                    else:
+                        continue
+                    count += 1
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+        return count
+
+    def _upsert(self, user_id, topic, column, timestamp, reported):
+        sessions = 1 if column == 'sessions' else 0
+        game_sessions = 1 if column == 'game_sessions' else 0
+        self._db.execute(
+            "INSERT INTO progress (user_id, topic, sessions, game_sessions, last_activity, reported) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, topic) DO UPDATE SET "
+            "sessions = sessions + excluded.sessions, "
+            "game_sessions = game_sessions + excluded.game_sessions, "
+            "last_activity = CASE WHEN last_activity IS NULL OR excluded.last_activity > last_activity "
+            "THEN excluded.last_activity ELSE last_activity END, "
+            "reported = COALESCE(excluded.reported, reported)",
+            (user_id, topic, sessions, game_sessions, timestamp, reported)
+        )
+
+    def _init_db(self):
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "user_id TEXT NOT NULL, topic TEXT NOT NULL, "
+                "sessions INTEGER NOT NULL DEFAULT 0, game_sessions INTEGER NOT NULL DEFAULT 0, "
+                "last_activity TEXT, reported REAL, "
+                "PRIMARY KEY (user_id, topic))"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"Error opening progress database: {e}")
+            self._db = None
@@ -0,0 +1,150 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import StorageConfig
+
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+
+# What the AI service returns instead of raising when a generation fails
+FAILURE_PREFIXES = (
+    "I'm having trouble processing",
+    "I'm getting a lot of questions right now",
+    "OpenAI service is not available",
+    "I couldn't generate"
+)
+
+
+def normalize_subject(subject):
+    """Collapse whitespace and case so route input and catalogue titles share a key"""
+    return " ".join(str(subject).split()).lower()
+
+
+def validate_practice_text(text):
+    """Return the practice questions text if it looks like a real answer, else None"""
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    if len(text) < 40 or text.startswith(FAILURE_PREFIXES):
+        return None
+    return text
+
+
+def validate_math_questions(parsed, count):
+    """Return count well-formed math questions from parsed model output, else None
+
+    Each question needs a non-empty question and answer; ids and the type
+    are filled in so the game UI can rely on them.
+    """
+    if not isinstance(parsed, list):
+        return None
+    questions = []
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        question = str(item.get("question") or "").strip()
+        answer = str(item.get("answer") if item.get("answer") is not None else "").strip()
+        if not question or not answer:
+            continue
+        questions.append({
+            "id": f"math-{len(questions) + 1}",
+            "question": question,
+            "type": item.get("type") or "number",
+            "answer": answer
+        })
+    return questions[:count] if len(questions) >= count else None
+
+
+class QuestionBank:
+    """Pre-generated question sets keyed by kind, subject and difficulty
+
+    Filled offline by pregenerate_questions.py and read by the AI service
+    before it calls a model. Practice questions are stored as the text the
+    model returned for a given count; math questions as a list that can
+    be sliced to any smaller count.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {"hits": 0, "misses": 0}
+        self._init_db()
+
+    def get(self, kind, subject, difficulty, count):
+        """Return the stored set for (kind, subject, difficulty) covering count questions, or None"""
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT count, payload FROM questions WHERE kind = ? AND subject = ? AND difficulty = ?",
+                (kind, normalize_subject(subject), str(difficulty).lower())
+            ).fetchone()
+            # Text can't be trimmed to fewer questions, lists can
+            usable = row is not None and (row[0] == count or (row[0] > count and kind != "practice"))
+            self._stats["hits" if usable else "misses"] += 1
+        if not usable:
+            return None
+
+        payload = json.loads(row[1])
+        return payload[:count] if isinstance(payload, list) else payload
+
+    def has(self, kind, subject, difficulty):
+        if self._db is None:
+            return False
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM questions WHERE kind = ? AND subject = ? AND difficulty = ?",
+                (kind, normalize_subject(subject), str(difficulty).lower())
+            ).fetchone() is not None
+
+    def put(self, kind, subject, difficulty, count, payload):
+        """Store or replace one question set"""
+        if self._db is None:
+            return False
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO questions (kind, subject, difficulty, count, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, normalize_subject(subject), str(difficulty).lower(), count,
+                 json.dumps(payload), datetime.now().isoformat())
+            )
+            self._db.commit()
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            if self._db is not None:
+                stats["sets"] = dict(self._db.execute("SELECT kind, COUNT(*) FROM questions GROUP BY kind").fetchall())
+        return stats
+
+    def _init_db(self):
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                "kind TEXT NOT NULL, subject TEXT NOT NULL, difficulty TEXT NOT NULL, "
+                "count INTEGER NOT NULL, payload TEXT NOT NULL, created_at TEXT, "
+                "PRIMARY KEY (kind, subject, difficulty))"
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"Error opening question bank: {e}")
+            self._db = None
+
+
+# Create a singleton instance
+_question_bank = None
+
+def get_question_bank():
+    """Open the question bank on first use; None when it is disabled"""
+    global _question_bank
+    if _question_bank is None and StorageConfig.QUESTION_BANK_ENABLED:
+        _question_bank = QuestionBank(StorageConfig.QUESTION_BANK_DB_PATH)
+    return _question_bank
@@ -0,0 +1,363 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import importlib.util
+from datetime import datetime
+
+from config import ResourceConfig
+from services.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pypdf = lazy_import("pypdf")
+
+TEXT_EXTENSIONS = ('.txt', '.md', '.markdown', '.rst')
+# PDFs are read when pypdf (pulled in by llama-index) is installed
+HAS_PYPDF = importlib.util.find_spec("pypdf") is not None
+MANIFEST_NAME = 'manifest.json'
+
+
+def read_document(path):
+    """Return the text of a supported document, or None"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension in TEXT_EXTENSIONS:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        if extension == '.pdf' and HAS_PYPDF:
+            reader = pypdf.PdfReader(path)
+            return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        print(f"Error reading document {path}: {e}")
+    return None
+
+
+def document_extensions():
+    return TEXT_EXTENSIONS + (('.pdf',) if HAS_PYPDF else ())
+
+
+def chunk_text(text, size=1200, overlap=200):
+    """Split text into chunks of at most size characters
+
+    Paragraphs are kept whole where they fit and long ones are split at
+    word boundaries. Each chunk after the first starts with the last
+    overlap characters of the previous one, so a sentence cut at a
+    boundary is still found with its context.
+    """
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        paragraph = " ".join(paragraph.split())
+        while len(paragraph) > size:
+            cut = paragraph.rfind(" ", 0, size)
+            cut = cut if cut > 0 else size
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if paragraph:
+            pieces.append(paragraph)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            # Start the overlap at a word, and only if the piece still fits after it
+            tail = tail[tail.find(" ") + 1:] if " " in tail else ""
+            current = f"{tail} {piece}" if tail and len(tail) + 1 + len(piece) <= size else piece
+        else:
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def scan_documents(root):
+    """{relative path: (mtime_ns, size)} for every supported document under root"""
+    found = {}
+    extensions = document_extensions()
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(extensions):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                found[os.path.relpath(path, root).replace(os.sep, '/')] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def _open_array(path):
+    # Read-only mmap of a .npy file (np.load here would be the lazy proxy's own load())
+    return np.lib.format.open_memmap(path, mode='r')
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RagIndex:
+    """Read side of the document index written by build_index
+
+    The embeddings are a float32 .npy matrix opened with mmap, so loading
+    costs milliseconds whatever the corpus size and the pages are shared
+    between workers. Chunk texts live in a JSON-lines sidecar and are read
+    by byte offset only for the chunks a search returns. The index is
+    reopened when the indexer publishes a new manifest, so re-indexing
+    doesn't need a restart.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.manifest = None
+        self.vectors = None
+        self.offsets = None
+        self._chunks_path = None
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+        self._stats = {"searches": 0, "search_ms": 0.0, "loads": 0}
+        self._maybe_reload()
+
+    @property
+    def embedder(self):
+        return self.manifest.get("embedder") if self.manifest else None
+
+    @property
+    def version(self):
+        return self.manifest.get("version") if self.manifest else None
+
+    def ready(self):
+        """True when an index with at least one chunk is loaded (reloading it if it changed)"""
+        self._maybe_reload()
+        return self.vectors is not None and len(self.vectors) > 0
+
+    def search(self, vector, k=4, min_score=0.0):
+        """Return up to k chunks most similar to vector as dicts with text, source and score"""
+        with self._lock:
+            vectors, offsets, chunks_path = self.vectors, self.offsets, self._chunks_path
+        if vectors is None or not len(vectors):
+            return []
+
+        started = time.perf_counter()
+        query = np.array(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        results = []
+        top = [row for row in top if scores[row] >= min_score]
+        try:
+            if top:
+                with open(chunks_path, 'rb') as f:
+                    for row in top:
+                        f.seek(int(offsets[row]))
+                        record = json.loads(f.read(int(offsets[row + 1] - offsets[row])))
+                        record["score"] = round(float(scores[row]), 4)
+                        results.append(record)
+        except OSError as e:
+            # The indexer replaced this version between our reload check and the read
+            print(f"Error reading document chunks: {e}")
+
+        with self._lock:
+            self._stats["searches"] += 1
+            self._stats["search_ms"] += (time.perf_counter() - started) * 1000
+        return results
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            searches = stats["searches"]
+            stats["search_ms"] = round(stats["search_ms"] / searches, 3) if searches else None
+            if self.manifest:
+                stats.update(
+                    chunks=self.manifest.get("count", 0),
+                    documents=len(self.manifest.get("files", {})),
+                    embedder=self.embedder,
+                    built_at=self.manifest.get("created_at")
+                )
+        return stats
+
+    def _maybe_reload(self):
+        manifest_path = os.path.join(self.path, MANIFEST_NAME)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        with self._lock:
+            if mtime == self._manifest_mtime:
+                return
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                vectors = offsets = chunks_path = None
+                if manifest.get("count"):
+                    vectors = _open_array(os.path.join(self.path, manifest["embeddings"]))
+                    offsets = _open_array(os.path.join(self.path, manifest["offsets"]))
+                    chunks_path = os.path.join(self.path, manifest["chunks"])
+            except Exception as e:
+                print(f"Error loading document index from {self.path}: {e}")
+                return
+
+            # Searches already running keep the arrays they started with
+            self.manifest, self.vectors, self.offsets, self._chunks_path = manifest, vectors, offsets, chunks_path
+            self._manifest_mtime = mtime
+            self._stats["loads"] += 1
+
+
+def build_index(docs_path, index_path, embed_batch, embedder, chunk_chars=1200, chunk_overlap=200,
+                batch_size=64, rebuild=False, log=print):
+    """Index the documents under docs_path into index_path; returns a summary dict
+
+    Only new and changed files are chunked and embedded: rows of unchanged
+    files (same size and mtime, or same content hash) are copied from the
+    previous index, and deleted files are dropped. embed_batch takes a list
+    of texts and returns one vector per text (or None on failure, which
+    aborts the run and leaves the previous index in place). A changed
+    embedder or chunking setting, or rebuild=True, re-embeds everything.
+    The new files are written under a fresh version and published by
+    replacing the manifest, so a running server switches over atomically.
+    """
+    os.makedirs(index_path, exist_ok=True)
+    old = _read_manifest(index_path)
+    settings = {"embedder": embedder, "chunk_chars": chunk_chars, "chunk_overlap": chunk_overlap}
+    if old and (rebuild or any(old.get(key) != value for key, value in settings.items())):
+        old = None
+    old_files = old.get("files", {}) if old else {}
+    old_vectors = _open_array(os.path.join(index_path, old["embeddings"])) if old and old.get("count") else None
+
+    current = scan_documents(docs_path) if os.path.isdir(docs_path) else {}
+    summary = {"documents": len(current), "reused": 0, "embedded": 0, "removed": len(set(old_files) - set(current)),
+               "chunks": 0, "changed": False}
+
+    # Per file: ('reuse', start, end) rows of the old index, or ('new', chunks)
+    plan = {}
+    for rel, (mtime_ns, size) in sorted(current.items()):
+        entry = old_files.get(rel)
+        digest = None
+        if entry and (entry["mtime_ns"], entry["size"]) != (mtime_ns, size):
+            digest = _file_digest(os.path.join(docs_path, rel))
+            if digest != entry["sha1"]:
+                entry = None
+        if entry:
+            plan[rel] = ("reuse", entry, digest or entry["sha1"])
+            summary["reused"] += 1
+        else:
+            text = read_document(os.path.join(docs_path, rel))
+            chunks = chunk_text(text, chunk_chars, chunk_overlap) if text else []
+            plan[rel] = ("new", chunks, digest or _file_digest(os.path.join(docs_path, rel)))
+            summary["embedded"] += 1
+
+    # Nothing to do unless a file was added, changed, removed or merely touched
+    if old and not summary["embedded"] and not summary["removed"] and \
+            all(plan[rel][1]["mtime_ns"] == current[rel][0] for rel in plan):
+        summary["chunks"] = old.get("count", 0)
+        return summary
+
+    # Embed every new chunk before writing anything
+    pending = [(rel, chunk) for rel, (kind, chunks, _) in plan.items() if kind == "new" for chunk in chunks]
+    new_vectors = []
+    for start in range(0, len(pending), batch_size):
+        batch = [chunk for _, chunk in pending[start:start + batch_size]]
+        vectors = embed_batch(batch)
+        if vectors is None or len(vectors) != len(batch):
+            raise RuntimeError(f"Embedding failed for chunks {start}-{start + len(batch)}")
+        new_vectors.append(np.asarray(vectors, dtype=np.float32))
+        log(f"  embedded {min(start + batch_size, len(pending))}/{len(pending)} chunks")
+    new_vectors = np.concatenate(new_vectors) if new_vectors else None
+
+    count = sum(item["end"] - item["start"] if kind == "reuse" else len(item) for kind, item, _ in plan.values())
+    dim = new_vectors.shape[1] if new_vectors is not None else (old_vectors.shape[1] if old_vectors is not None else 0)
+
+    version = str(time.time_ns())
+    names = {
+        "embeddings": f"embeddings-{version}.npy",
+        "offsets": f"offsets-{version}.npy",
+        "chunks": f"chunks-{version}.jsonl"
+    }
+    files = {}
+    offsets = [0]
+    matrix = None
+    if count:
+        matrix = np.lib.format.open_memmap(os.path.join(index_path, names["embeddings"]), mode='w+',
+                                           dtype=np.float32, shape=(count, dim))
+    old_chunks = open(os.path.join(index_path, old["chunks"]), 'rb') if old and old.get("count") else None
+    old_offsets = _open_array(os.path.join(index_path, old["offsets"])) if old_chunks else None
+    try:
+        with open(os.path.join(index_path, names["chunks"]), 'wb') as out:
+            row = 0
+            new_row = 0
+            for rel, (kind, item, digest) in plan.items():
+                first = row
+                if kind == "reuse" and item["end"] > item["start"]:
+                    matrix[row:row + item["end"] - item["start"]] = old_vectors[item["start"]:item["end"]]
+                    old_chunks.seek(int(old_offsets[item["start"]]))
+                    data = old_chunks.read(int(old_offsets[item["end"]] - old_offsets[item["start"]]))
+                    out.write(data)
+                    for i in range(item["start"], item["end"]):
+                        offsets.append(offsets[-1] + int(old_offsets[i + 1] - old_offsets[i]))
+                    row += item["end"] - item["start"]
+                elif kind == "new":
+                    for chunk in item:
+                        vector = new_vectors[new_row]
+                        matrix[row] = vector / max(float(np.linalg.norm(vector)), 1e-12)
+                        line = (json.dumps({"source": rel, "text": chunk}, ensure_ascii=False) + "\n").encode('utf-8')
+                        out.write(line)
+                        offsets.append(offsets[-1] + len(line))
+                        row += 1
+                        new_row += 1
+                files[rel] = {"mtime_ns": current[rel][0], "size": current[rel][1], "sha1": digest,
+                              "start": first, "end": row}
+    finally:
+        if old_chunks:
+            old_chunks.close()
+    if matrix is not None:
+        matrix.flush()
+        del matrix
+    np.save(os.path.join(index_path, names["offsets"]), np.asarray(offsets, dtype=np.int64))
+
+    manifest = dict(settings, **names, version=version, count=count, dim=dim, files=files,
+                    created_at=datetime.now().isoformat())
+    temp_path = os.path.join(index_path, MANIFEST_NAME + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp_path, os.path.join(index_path, MANIFEST_NAME))
+
+    # Older versions are no longer referenced. Servers that still have them
+    # mapped keep their data on POSIX; on Windows they are removed next run
+    for name in os.listdir(index_path):
+        if name.startswith(("embeddings-", "offsets-", "chunks-")) and name not in names.values():
+            try:
+                os.remove(os.path.join(index_path, name))
+            except OSError:
+                pass
+
+    summary.update(chunks=count, changed=True)
+    return summary
+
+
+def _read_manifest(index_path):
+    try:
+        with open(os.path.join(index_path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading document index manifest: {e}")
+        return None
+
+
+# Create a singleton instance
+_rag_index = None
+
+def get_rag_index():
+    """Open the document index on first use; None when retrieval is disabled"""
+    global _rag_index
+    if _rag_index is None and ResourceConfig.RAG_ENABLED:
+        _rag_index = RagIndex(ResourceConfig.RAG_INDEX_PATH)
+    return _rag_index
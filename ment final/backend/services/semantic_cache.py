@@ -0,0 +1,198 @@
+import time
+import threading
+from collections import OrderedDict
+
+from services.lazy_import import lazy_import
+from services.cache_service import PROMPT_SETTINGS_KEYS, normalize_prompt
+
+np = lazy_import("numpy")
+
+
+def _kmeans(sample, k, iterations=8, seed=0):
+    """Spherical k-means on unit rows; returns k unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        members, starts = np.unique(assign[order], return_index=True)
+        centroids[members] = np.add.reduceat(sample[order], starts, axis=0)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+class VectorIndex:
+    """Fixed-capacity cosine index, scanned exactly while small and IVF-style once large
+
+    Vectors are unit-normalized and stored as float32 in preallocated
+    slots (float16 halves the memory but converting it back costs more
+    than the search); when every slot is used the oldest is overwritten. Past
+    train_size entries the index clusters them into about sqrt(n) coarse
+    lists (k-means) and a search only scores the vectors in the nprobe
+    lists whose centroids are closest to the query, as FAISS's IVF-Flat
+    does. Clustering is redone each time the index grows fourfold.
+    Every vector carries a group id and a search only returns vectors
+    from its own group.
+    """
+    def __init__(self, dim, capacity, nprobe=8, train_size=4096):
+        self.dim = dim
+        self.capacity = capacity
+        self.nprobe = nprobe
+        self.train_size = train_size
+        # np.zeros pages are only committed as slots are written
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.lists = np.zeros(capacity, dtype=np.int32)
+        self.groups = np.full(capacity, -1, dtype=np.int32)
+        self.centroids = None
+        self.size = 0
+        self.trained_size = 0
+        self._next = 0
+
+    def add(self, vector, group):
+        """Store a unit vector and return its slot"""
+        slot = self._next
+        self._next = (self._next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.vectors[slot] = vector
+        self.groups[slot] = group
+        if self.centroids is not None:
+            self.lists[slot] = int(np.argmax(self.centroids @ vector))
+
+        if self.size >= self.train_size and self.size >= 4 * self.trained_size:
+            self.train()
+        return slot
+
+    def search(self, vector, group):
+        """Return (slots, scores) of the candidate vectors in group"""
+        if self.centroids is None:
+            slots = np.flatnonzero(self.groups[:self.size] == group)
+        else:
+            nprobe = min(self.nprobe, len(self.centroids))
+            probed = np.zeros(len(self.centroids), dtype=bool)
+            probed[np.argpartition(self.centroids @ vector, -nprobe)[-nprobe:]] = True
+            slots = np.flatnonzero(probed[self.lists[:self.size]])
+            slots = slots[self.groups[slots] == group]
+        scores = self.vectors[slots] @ vector
+        return slots, scores
+
+    def train(self):
+        n = self.size
+        k = int(min(max(np.sqrt(n), 16), 4096))
+        rng = np.random.default_rng(n)
+        sample_rows = rng.choice(n, size=min(n, 64 * k), replace=False)
+        self.centroids = _kmeans(self.vectors[sample_rows], k)
+        for start in range(0, n, 8192):
+            block = self.vectors[start:start + 8192]
+            self.lists[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        self.trained_size = n
+
+
+class SemanticCache:
+    """Answers to past questions, served again for questions that mean the same thing
+
+    Questions are embedded with embed (text -> vector, or None on failure)
+    and looked up in a VectorIndex. A cached answer is returned when its
+    question's cosine similarity is at least threshold and it was asked
+    with the same prompt-affecting settings (teaching style, personality,
+    difficulty) and course document index version. Recent embeddings are memoized so a miss followed by a
+    set embeds the question once.
+    """
+    def __init__(self, embed, threshold=0.93, max_entries=50000, ttl=86400, nprobe=8, train_size=4096,
+                 memo_entries=2048):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.memo_entries = memo_entries
+        self.index = None
+        self._answers = [None] * max_entries
+        self._expires = None
+        self._groups = {}
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "embed_errors": 0, "lookup_ms": 0.0}
+
+    def get(self, prompt, user_settings=None, index_version=None):
+        """Return the cached answer for a question like prompt, or None
+
+        index_version is the course document index the answer must have been
+        grounded in (None for ungrounded answers).
+        """
+        vector = self.embedding(prompt)
+        if vector is None:
+            return None
+
+        started = time.perf_counter()
+        answer = None
+        with self._lock:
+            group = self._groups.get(self._group_key(user_settings, index_version))
+            if self.index is not None and group is not None:
+                slots, scores = self.index.search(vector, group)
+                scores[self._expires[slots] < time.time()] = -1.0
+                if len(scores):
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        answer = self._answers[slots[best]]
+            self._stats["hits" if answer is not None else "misses"] += 1
+            self._stats["lookup_ms"] += (time.perf_counter() - started) * 1000
+        return answer
+
+    def set(self, prompt, user_settings, answer, index_version=None):
+        """Remember answer for prompt; embeds only if prompt wasn't just looked up"""
+        if not answer:
+            return
+        vector = self.embedding(prompt)
+        if vector is None:
+            return
+
+        with self._lock:
+            if self.index is None:
+                self.index = VectorIndex(len(vector), self.max_entries, self.nprobe, self.train_size)
+                self._expires = np.zeros(self.max_entries, dtype=np.float64)
+            group = self._groups.setdefault(self._group_key(user_settings, index_version), len(self._groups))
+            slot = self.index.add(vector, group)
+            self._answers[slot] = answer
+            self._expires[slot] = time.time() + self.ttl
+            self._stats["sets"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self.index.size if self.index is not None else 0
+            stats["lists"] = len(self.index.centroids) if self.index is not None and self.index.centroids is not None else 0
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["lookup_ms"] = round(stats["lookup_ms"] / lookups, 3) if lookups else None
+        return stats
+
+    def _group_key(self, user_settings, index_version=None):
+        return tuple((user_settings or {}).get(k) for k in PROMPT_SETTINGS_KEYS) + (index_version,)
+
+    def embedding(self, prompt):
+        """Unit float32 embedding of prompt (memoized), or None if embedding failed"""
+        key = normalize_prompt(prompt)
+        with self._lock:
+            vector = self._memo.get(key)
+            if vector is not None:
+                self._memo.move_to_end(key)
+                return vector
+
+        try:
+            raw = self.embed(prompt)
+        except Exception as e:
+            print(f"Error embedding question for the semantic cache: {e}")
+            raw = None
+        if raw is None:
+            with self._lock:
+                self._stats["embed_errors"] += 1
+            return None
+
+        vector = np.asarray(raw, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            self._memo[key] = vector
+            while len(self._memo) > self.memo_entries:
+                self._memo.popitem(last=False)
+        return vector
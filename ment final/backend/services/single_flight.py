@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+
+class _Call:
+    """One in-flight call that concurrent identical requests wait on
+
+    done is a threading.Event for sync calls and the asyncio.Task running
+    the call for coroutines.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and get the same result or
+    exception. Nothing is kept once the call finishes, so this only
+    removes duplicate work that overlaps in time. Sync callers and
+    coroutines are tracked separately, since a coroutine must not block its
+    event loop waiting on a thread and vice versa.
+    """
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "leaders": 0, "coalesced": 0, "errors": 0, "max_waiters": 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) unless an identical call is already running, then share its outcome"""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._join(call)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Coroutine counterpart of do; fn must return an awaitable"""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._async_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._async_calls[key] = _Call()
+                # The call runs in its own task, so cancelling the leader doesn't fail it for the others
+                call.done = asyncio.get_running_loop().create_task(self._run_async(key, fn, args, kwargs))
+                # Retrieve the outcome so an error nobody is left waiting on isn't logged by asyncio
+                call.done.add_done_callback(lambda task: task.cancelled() or task.exception())
+                self._stats["leaders"] += 1
+            else:
+                self._join(call)
+
+        # shield: a caller being cancelled must not cancel the shared call
+        return await asyncio.shield(call.done)
+
+    async def _run_async(self, key, fn, args, kwargs):
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        stats["coalesced_ratio"] = round(stats["coalesced"] / stats["calls"], 3) if stats["calls"] else None
+        return stats
+
+    def _join(self, call):
+        # Called with the lock held
+        call.waiters += 1
+        self._stats["coalesced"] += 1
+        self._stats["max_waiters"] = max(self._stats["max_waiters"], call.waiters)
@@ -1,19 +1,83 @@
 import os
+import re
 import base64
-import tempfile
-from google.cloud import speech, texttospeech
 import subprocess
 import asyncio
-import edge_tts
-from pydub import AudioSegment
-import sounddevice as sd
-import numpy as np
-import requests
+import threading
 from dotenv import load_dotenv
+from config import AppConfig, CacheConfig, SpeechConfig
+from services.audio_cache import AudioCache
+from services.audio_transcoder import get_transcoder
+from services.lazy_import import lazy_import
+from services.async_runtime import run_async, http_session
+from services.streaming_stt import VoiceStream, GoogleStreamingRecognizer, WavReplayRecognizer
+
+# Heavy, modality-specific libraries load on first use
+speech = lazy_import("google.cloud.speech")
+texttospeech = lazy_import("google.cloud.texttospeech")
+edge_tts = lazy_import("edge_tts")
 
 # Load environment variables
 load_dotenv()
 
+# Default Google TTS voice settings
+SPEECH_DEFAULTS = {
+    "language_code": "en-US",
+    "name": "en-US-Neural2-F",  # Female voice
+    "gender": "FEMALE",
+    "speaking_rate": 1.0,  # Normal speed
+    "pitch": 0.0  # Default pitch
+}
+
+# Fixed phrases spoken often enough to synthesize ahead of time
+CANNED_PHRASES = [
+    "Hi, I'm Mentaura. How can I help you today? What are you interested in learning about?",
+    "OpenAI service is not available. Please check your API key configuration.",
+    "I'm having trouble processing your request right now."
+]
+
+# speech_to_text returns its errors as text starting with this
+STT_ERROR_PREFIX = "Failed to convert speech to text"
+
+def transcription_failed(transcript):
+    """True when speech_to_text produced nothing usable to answer"""
+    return not transcript or transcript.startswith(STT_ERROR_PREFIX)
+
+def split_into_segments(text, max_chars=300):
+    """Split text into sentence-sized segments for pipelined synthesis
+    
+    The first sentence is kept on its own so it reaches the listener as
+    fast as possible; later sentences are merged up to max_chars to keep
+    the number of provider calls down. Sentences longer than max_chars
+    are broken on clause boundaries, then on whitespace.
+    """
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+|\n+', text or "") if s.strip()]
+    
+    pieces = []
+    for sentence in sentences:
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(", ", 0, max_chars), sentence.rfind("; ", 0, max_chars))
+            if cut <= 0:
+                cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars - 1
+            pieces.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            pieces.append(sentence)
+    
+    segments = []
+    for piece in pieces:
+        if len(segments) > 1 and len(segments[-1]) + len(piece) + 1 <= max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return segments
+
+async def _next_segment(segments):
+    # run_async() needs a coroutine, not the bare __anext__ awaitable
+    return await segments.__anext__()
+
 class SpeechService:
     def __init__(self):
         # Speech clients
@@ -21,6 +85,19 @@ class SpeechService:
         self.tts_client = None
         self.edge_voices = None
         self.elevenlabs_api_key = os.environ.get("ELEVENLABS_API_KEY")
+        self._google_clients_ready = False
+        self._google_clients_lock = threading.Lock()
+        
+        # Synthesized audio keyed on text + voice settings + provider
+        self.audio_cache = None
+        if CacheConfig.AUDIO_CACHE_ENABLED:
+            try:
+                self.audio_cache = AudioCache(CacheConfig.AUDIO_CACHE_DIR, CacheConfig.AUDIO_CACHE_MAX_BYTES)
+            except Exception as e:
+                print(f"Error initializing audio cache: {e}")
+        
+        # Format conversion through ffmpeg pipes, off the request thread
+        self.transcoder = get_transcoder()
         
     def init_google_speech(self):
         """Initialize Google Cloud Speech-to-Text client"""
@@ -40,6 +117,16 @@ class SpeechService:
             print(f"Error initializing Google Text-to-Speech: {e}")
             return None
     
+    def ensure_google_clients(self):
+        """Create the Google Cloud clients on first use; returns True if TTS is available"""
+        if not self._google_clients_ready:
+            with self._google_clients_lock:
+                if not self._google_clients_ready:
+                    self.init_google_speech()
+                    self.init_google_tts()
+                    self._google_clients_ready = True
+        return self.tts_client is not None
+    
     async def list_edge_voices(self):
         """List available Edge TTS voices"""
         try:
@@ -49,29 +136,29 @@ class SpeechService:
             print(f"Error listing Edge TTS voices: {e}")
             return []
     
+    def probe_google_tts(self):
+        """Health probe: list voices to confirm credentials and reachability"""
+        if not self.ensure_google_clients():
+            return False
+        self.tts_client.list_voices(language_code=SPEECH_DEFAULTS["language_code"])
+        return True
+    
+    def probe_edge_tts(self):
+        """Health probe: fetch the Edge TTS voice list"""
+        return bool(run_async(self.list_edge_voices()))
+    
     async def speech_to_text(self, audio_data):
         """Convert speech to text using Google Speech-to-Text"""
         try:
+            self.ensure_google_clients()
             if not self.stt_client:
-                return "Speech-to-Text service not initialized"
-            
-            # Create a temporary file to store the audio data
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_filename = temp_file.name
-                
-                # If audio_data is base64 encoded, decode it
-                if isinstance(audio_data, str):
-                    audio_bytes = base64.b64decode(audio_data)
-                    temp_file.write(audio_bytes)
-                else:
-                    temp_file.write(audio_data)
+                return f"{STT_ERROR_PREFIX}: Speech-to-Text service not initialized"
             
-            # Read the temporary file
-            with open(temp_filename, "rb") as audio_file:
-                content = audio_file.read()
-            
-            # Delete the temporary file
-            os.unlink(temp_filename)
+            # Keep the audio in memory; decode it if it arrived base64 encoded
+            if isinstance(audio_data, str):
+                content = base64.b64decode(audio_data)
+            else:
+                content = bytes(audio_data)
             
             # Configure the speech recognition request
             audio = speech.RecognitionAudio(content=content)
@@ -81,8 +168,8 @@ class SpeechService:
                 language_code="en-US"
             )
             
-            # Perform the speech recognition
-            response = self.stt_client.recognize(config=config, audio=audio)
+            # Perform the speech recognition off the event loop
+            response = await asyncio.to_thread(self.stt_client.recognize, config=config, audio=audio)
             
             # Extract and return the transcribed text
             transcript = ""
@@ -92,25 +179,33 @@ class SpeechService:
             return transcript
         except Exception as e:
             print(f"Error in speech-to-text conversion: {e}")
-            return f"Failed to convert speech to text: {str(e)}"
+            return f"{STT_ERROR_PREFIX}: {str(e)}"
+    
+    def open_voice_stream(self, sample_rate=None, language_code="en-US"):
+        """Start a streaming recognition session; returns a VoiceStream or None"""
+        sample_rate = sample_rate or SpeechConfig.STT_SAMPLE_RATE
+        if SpeechConfig.STT_STUB_WAV:
+            recognizer = WavReplayRecognizer(SpeechConfig.STT_STUB_WAV)
+        else:
+            self.ensure_google_clients()
+            if not self.stt_client:
+                return None
+            recognizer = GoogleStreamingRecognizer(self.stt_client, sample_rate, language_code)
+        
+        return VoiceStream(
+            recognizer,
+            idle_timeout=SpeechConfig.STT_STREAM_IDLE_TIMEOUT,
+            max_bytes=sample_rate * 2 * SpeechConfig.STT_STREAM_MAX_SECONDS
+        )
     
     async def text_to_speech_google(self, text, voice_settings=None):
-        """Convert text to speech using Google Text-to-Speech"""
+        """Convert text to speech using Google Text-to-Speech; returns MP3 bytes"""
         try:
-            if not self.tts_client:
+            if not self.ensure_google_clients():
                 return None
             
-            # Default voice settings
-            default_settings = {
-                "language_code": "en-US",
-                "name": "en-US-Neural2-F",  # Female voice
-                "gender": "FEMALE",
-                "speaking_rate": 1.0,  # Normal speed
-                "pitch": 0.0  # Default pitch
-            }
-            
             # Override defaults with provided settings
-            settings = default_settings.copy()
+            settings = SPEECH_DEFAULTS.copy()
             if voice_settings:
                 settings.update(voice_settings)
             
@@ -131,49 +226,36 @@ class SpeechService:
                 pitch=settings["pitch"]
             )
             
-            # Generate the speech
-            response = self.tts_client.synthesize_speech(
+            # Generate the speech off the event loop so concurrent segments overlap
+            response = await asyncio.to_thread(
+                self.tts_client.synthesize_speech,
                 input=synthesis_input,
                 voice=voice,
                 audio_config=audio_config
             )
             
-            # Encode the audio content as base64
-            audio_base64 = base64.b64encode(response.audio_content).decode("utf-8")
-            
-            return audio_base64
+            return response.audio_content
         except Exception as e:
             print(f"Error in Google text-to-speech conversion: {e}")
             return None
     
     async def text_to_speech_edge(self, text, voice="en-US-AriaNeural", rate="+0%", volume="+0%"):
-        """Convert text to speech using Edge TTS (free alternative)"""
+        """Convert text to speech using Edge TTS (free alternative); returns MP3 bytes"""
         try:
-            # Create a temporary file to store the audio
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_file:
-                temp_filename = temp_file.name
-            
-            # Use Edge TTS to generate speech
+            # Collect the streamed audio in memory rather than via a temp file
             communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
-            await communicate.save(temp_filename)
-            
-            # Read the audio file and encode it as base64
-            with open(temp_filename, "rb") as audio_file:
-                audio_content = audio_file.read()
+            audio_content = bytearray()
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio_content.extend(chunk["data"])
             
-            # Delete the temporary file
-            os.unlink(temp_filename)
-            
-            # Encode the audio content as base64
-            audio_base64 = base64.b64encode(audio_content).decode("utf-8")
-            
-            return audio_base64
+            return bytes(audio_content) or None
         except Exception as e:
             print(f"Error in Edge TTS text-to-speech conversion: {e}")
             return None
     
-    def text_to_speech_elevenlabs(self, text, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
-        """Convert text to speech using ElevenLabs (limited free tier)"""
+    async def text_to_speech_elevenlabs(self, text, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
+        """Convert text to speech using ElevenLabs (limited free tier); returns MP3 bytes"""
         try:
             if not self.elevenlabs_api_key:
                 return None
@@ -195,32 +277,46 @@ class SpeechService:
                 }
             }
             
-            response = requests.post(url, json=data, headers=headers)
-            
-            if response.status_code == 200:
-                # Encode the audio content as base64
-                audio_base64 = base64.b64encode(response.content).decode("utf-8")
-                return audio_base64
-            else:
-                print(f"ElevenLabs API error: {response.text}")
+            # Pooled keep-alive connection on the shared event loop
+            session = await http_session()
+            async with session.post(url, json=data, headers=headers) as response:
+                if response.status == 200:
+                    return await response.read()
+                print(f"ElevenLabs API error: {await response.text()}")
                 return None
         except Exception as e:
             print(f"Error in ElevenLabs text-to-speech conversion: {e}")
             return None
     
-    async def text_to_speech(self, text, voice_settings=None):
-        """Convert text to speech using the best available service"""
+    async def synthesize_speech(self, text, voice_settings=None):
+        """Convert text to speech using the best available service
+        
+        Returns (mp3_bytes, cache_key); cache_key is None when the audio
+        cache is disabled, otherwise the audio can be fetched again with
+        get_cached_audio(cache_key).
+        """
         # Try ElevenLabs first (best quality but limited free tier)
         if self.elevenlabs_api_key:
-            result = self.text_to_speech_elevenlabs(text)
+            cache_key = self._audio_cache_key(text, "EXAVITQu4vr4xnSDxMaL", 1.0, 0.0, "elevenlabs")
+            result = self._cached_audio(cache_key)
+            if not result:
+                result = self._store_audio(cache_key, await self.text_to_speech_elevenlabs(text))
             if result:
-                return result
+                return result, cache_key
         
         # Try Google TTS next
-        if self.tts_client:
-            result = await self.text_to_speech_google(text, voice_settings)
+        if self.ensure_google_clients():
+            settings = SPEECH_DEFAULTS.copy()
+            if voice_settings:
+                settings.update(voice_settings)
+            cache_key = self._audio_cache_key(
+                text, settings["name"], settings["speaking_rate"], settings["pitch"], "google"
+            )
+            result = self._cached_audio(cache_key)
+            if not result:
+                result = self._store_audio(cache_key, await self.text_to_speech_google(text, voice_settings))
             if result:
-                return result
+                return result, cache_key
         
         # Fall back to Edge TTS (always free)
         voice = "en-US-AriaNeural"  # Female voice by default
@@ -233,64 +329,158 @@ class SpeechService:
             rate_value = voice_settings.get("speaking_rate")
             rate = f"{int((rate_value - 1) * 100)}%"
         
-        return await self.text_to_speech_edge(text, voice, rate)
+        cache_key = self._audio_cache_key(text, voice, rate, "+0Hz", "edge")
+        result = self._cached_audio(cache_key)
+        if not result:
+            result = self._store_audio(cache_key, await self.text_to_speech_edge(text, voice, rate))
+        return result, (cache_key if result else None)
+    
+    async def text_to_speech(self, text, voice_settings=None):
+        """Convert text to speech, returning base64 MP3 for JSON responses"""
+        audio, _ = await self.synthesize_speech(text, voice_settings)
+        if not audio:
+            return None
+        return base64.b64encode(audio).decode("utf-8")
+    
+    def get_cached_audio(self, cache_key):
+        """Return MP3 bytes previously synthesized under cache_key, or None"""
+        if self.audio_cache is None or not cache_key:
+            return None
+        return self.audio_cache.get(cache_key)
+    
+    async def text_to_speech_pipeline(self, text, voice_settings=None, max_concurrency=None, binary=False):
+        """Synthesize text sentence by sentence, yielding audio segments in order
+        
+        Segments are synthesized concurrently (bounded by max_concurrency) but
+        yielded in reading order, so playback can start as soon as the first
+        sentence is ready regardless of how long the whole answer is. Audio
+        is base64 text unless binary=True, which yields raw MP3 bytes.
+        """
+        segments = split_into_segments(text, SpeechConfig.TTS_SEGMENT_MAX_CHARS)
+        if not segments:
+            return
+        
+        semaphore = asyncio.Semaphore(max_concurrency or SpeechConfig.TTS_PIPELINE_CONCURRENCY)
+        
+        async def synthesize(segment):
+            async with semaphore:
+                audio, _ = await self.synthesize_speech(segment, voice_settings)
+                if audio and not binary:
+                    return base64.b64encode(audio).decode("utf-8")
+                return audio
+        
+        # Semaphore waiters are woken in FIFO order, so earlier segments are
+        # always synthesized first
+        tasks = [asyncio.ensure_future(synthesize(segment)) for segment in segments]
+        try:
+            for index, (segment, task) in enumerate(zip(segments, tasks)):
+                yield {
+                    "index": index,
+                    "text": segment,
+                    "audio": await task,
+                    "final": index == len(segments) - 1
+                }
+        finally:
+            # Client went away mid-answer: don't keep synthesizing for nobody
+            for task in tasks:
+                task.cancel()
+    
+    def stream_text_to_speech(self, text, voice_settings=None, max_concurrency=None, binary=False):
+        """Synchronous wrapper around text_to_speech_pipeline for Flask/Socket.IO handlers
+        
+        The pipeline runs on the shared event loop, so segments from every
+        caller share one loop and one connection pool.
+        """
+        segments = self.text_to_speech_pipeline(text, voice_settings, max_concurrency, binary)
+        try:
+            while True:
+                try:
+                    yield run_async(_next_segment(segments))
+                except StopAsyncIteration:
+                    break
+        finally:
+            run_async(segments.aclose())
+    
+    async def prewarm_audio_cache(self, phrases=None):
+        """Synthesize fixed phrases up front so their first request is a cache hit"""
+        if self.audio_cache is None:
+            return 0
+        warmed = 0
+        for phrase in phrases or CANNED_PHRASES:
+            try:
+                audio, _ = await self.synthesize_speech(phrase)
+                if audio:
+                    warmed += 1
+            except Exception as e:
+                print(f"Error pre-warming audio cache: {e}")
+        return warmed
+    
+    def _audio_cache_key(self, text, voice, rate, pitch, provider):
+        if self.audio_cache is None:
+            return None
+        return self.audio_cache.make_key(text, voice, rate, pitch, provider)
+    
+    def _cached_audio(self, cache_key):
+        """Return cached MP3 bytes, or None"""
+        if cache_key is None:
+            return None
+        return self.audio_cache.get(cache_key)
+    
+    def _store_audio(self, cache_key, audio):
+        """Cache freshly synthesized MP3 bytes and pass them through"""
+        if cache_key is not None and audio:
+            self.audio_cache.put(cache_key, audio)
+        return audio
     
     def process_audio(self, audio_data, target_format="mp3"):
-        """Process audio data (e.g., change format, speed, pitch)"""
+        """Convert audio to target_format, returning base64 for JSON responses
+        
+        The bytes are piped through ffmpeg in the transcoder's worker pool;
+        nothing is written to disk.
+        """
         try:
-            # Create temporary files for input and output
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as input_file:
-                input_filename = input_file.name
-                
-                # If audio_data is base64 encoded, decode it
-                if isinstance(audio_data, str):
-                    audio_bytes = base64.b64decode(audio_data)
-                    input_file.write(audio_bytes)
-                else:
-                    input_file.write(audio_data)
-            
-            # Create output filename
-            output_filename = input_filename.replace(".wav", f".{target_format}")
-            
-            # Use pydub to process the audio
-            audio = AudioSegment.from_file(input_filename)
-            
-            # Save in target format
-            audio.export(output_filename, format=target_format)
-            
-            # Read the processed audio
-            with open(output_filename, "rb") as output_file:
-                processed_audio = output_file.read()
-            
-            # Delete temporary files
-            os.unlink(input_filename)
-            os.unlink(output_filename)
-            
-            # Encode as base64
+            # If audio_data is base64 encoded, decode it
+            if isinstance(audio_data, str):
+                audio_data = base64.b64decode(audio_data)
+            processed_audio = self.transcoder.transcode(audio_data, target_format)
             return base64.b64encode(processed_audio).decode("utf-8")
         except Exception as e:
             print(f"Error processing audio: {e}")
             return None
+    
+    def stream_processed_audio(self, audio_data, target_format="mp3", chunk_size=16384):
+        """Convert audio to target_format, yielding raw chunks as they are encoded
+        
+        For chunked HTTP responses: playback can start before the whole
+        clip is converted.
+        """
+        if isinstance(audio_data, str):
+            audio_data = base64.b64decode(audio_data)
+        return self.transcoder.stream(audio_data, target_format, chunk_size=chunk_size)
+
+# Create a singleton instance
+_speech_service = None
 
 def setup_speech_services():
-    """Initialize and setup all speech services"""
-    speech_service = SpeechService()
+    """Initialize and setup all speech services
     
-    # Setup Google Cloud services if possible
-    try:
-        speech_service.init_google_speech()
-    except Exception as e:
-        print(f"Google Speech-to-Text setup failed: {e}")
+    Every caller shares one instance. Nothing here talks to the network or
+    imports the provider SDKs; provider reachability (including the Edge
+    TTS voice list) is checked by the background health probes instead.
+    """
+    global _speech_service
     
-    try:
-        speech_service.init_google_tts()
-    except Exception as e:
-        print(f"Google Text-to-Speech setup failed: {e}")
+    if _speech_service is not None:
+        return _speech_service
+    
+    speech_service = SpeechService()
     
-    # Get Edge TTS voices
-    try:
-        asyncio.run(speech_service.list_edge_voices())
-    except Exception as e:
-        print(f"Edge TTS voices listing failed: {e}")
+    # Google Cloud clients (and the google.cloud import behind them) are
+    # created on first use, or ahead of time here in the background
+    if AppConfig.WARM_UP_IMPORTS:
+        threading.Thread(
+            target=speech_service.ensure_google_clients, name='speech-warm-up', daemon=True
+        ).start()
     
-    return speech_service 
\ No newline at end of file
+    _speech_service = speech_service
+    return _speech_service
@@ -0,0 +1,164 @@
+import os
+import time
+import wave
+import queue
+from services.lazy_import import lazy_import
+
+speech = lazy_import("google.cloud.speech")
+
+
+class VoiceStream:
+    """One live recognition: audio frames in, (text, is_final) results out
+
+    Socket handlers push frames as they arrive from the browser and the
+    recognizer consumes them from a background task. The stream ends when
+    the client says so, when no audio arrives for idle_timeout seconds or
+    after max_bytes of audio, whichever comes first.
+    """
+    def __init__(self, recognizer, idle_timeout=10.0, max_bytes=None):
+        self.recognizer = recognizer
+        self.idle_timeout = idle_timeout
+        self.max_bytes = max_bytes
+        self.bytes_received = 0
+        self.closed = False
+        self._frames = queue.Queue()
+
+    def push(self, frame):
+        """Queue a chunk of LINEAR16 audio; ignored once the stream is closed"""
+        if self.closed or not frame:
+            return
+        self._frames.put(bytes(frame))
+
+    def close(self):
+        """End of audio; the recognizer finalizes whatever it has heard"""
+        if not self.closed:
+            self.closed = True
+            self._frames.put(None)
+
+    def frames(self):
+        while True:
+            try:
+                frame = self._frames.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                print("Voice stream idle, closing it")
+                return
+            if frame is None:
+                return
+            self.bytes_received += len(frame)
+            yield frame
+            if self.max_bytes and self.bytes_received >= self.max_bytes:
+                print("Voice stream reached its length limit, closing it")
+                return
+
+    def results(self):
+        return self.recognizer.recognize(self.frames())
+
+
+class GoogleStreamingRecognizer:
+    """Google Cloud streaming recognition with interim results
+
+    In single-utterance mode Google detects the end of speech itself, so
+    the final transcript can arrive before the browser stops recording.
+    """
+    def __init__(self, client, sample_rate=16000, language_code="en-US", single_utterance=True):
+        self.client = client
+        self.sample_rate = sample_rate
+        self.language_code = language_code
+        self.single_utterance = single_utterance
+
+    def recognize(self, frames):
+        config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=self.sample_rate,
+                language_code=self.language_code
+            ),
+            interim_results=True,
+            single_utterance=self.single_utterance
+        )
+        requests = (speech.StreamingRecognizeRequest(audio_content=frame) for frame in frames)
+
+        finals = []
+        partial = ""
+        for response in self.client.streaming_recognize(config=config, requests=requests):
+            interim = []
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                transcript = result.alternatives[0].transcript.strip()
+                if result.is_final:
+                    finals.append(transcript)
+                    if self.single_utterance:
+                        yield " ".join(finals), True
+                        return
+                else:
+                    interim.append(transcript)
+            partial = " ".join(finals + interim).strip()
+            if partial:
+                yield partial, False
+
+        yield " ".join(finals) or partial, True
+
+
+class WavReplayRecognizer:
+    """Offline stand-in for streaming recognition, driven by a WAV file
+
+    The transcript comes from a .txt file next to the WAV (or the file
+    name, underscores as spaces). Words are revealed as interim results in
+    proportion to how much of the recording has been received, and the
+    final transcript is emitted once the whole recording has arrived (the
+    way single-utterance endpointing fires) or the stream ends. Replaying
+    the same WAV with replay_wav() exercises the whole pipeline without
+    credentials or network access.
+    """
+    def __init__(self, wav_path, transcript=None, final_delay=0.0):
+        self.wav_path = wav_path
+        self.final_delay = final_delay
+        with wave.open(wav_path, "rb") as wav:
+            self.sample_rate = wav.getframerate()
+            self.total_bytes = wav.getnframes() * wav.getsampwidth() * wav.getnchannels()
+        self.transcript = transcript or self._load_transcript(wav_path)
+
+    @staticmethod
+    def _load_transcript(wav_path):
+        sidecar = os.path.splitext(wav_path)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        return os.path.splitext(os.path.basename(wav_path))[0].replace("_", " ")
+
+    def recognize(self, frames):
+        words = self.transcript.split()
+        received = 0
+        shown = 0
+        for frame in frames:
+            received += len(frame)
+            if received >= self.total_bytes:
+                break
+            # Hold back the last word until the utterance is complete
+            target = min(len(words) - 1, len(words) * received // max(self.total_bytes, 1))
+            if target > shown:
+                shown = target
+                yield " ".join(words[:shown]), False
+
+        if self.final_delay:
+            time.sleep(self.final_delay)
+        yield self.transcript, True
+
+
+def replay_wav(wav_path, frame_ms=100, realtime=True):
+    """Yield a WAV file's PCM data in frame_ms chunks, optionally at real-time pace"""
+    with wave.open(wav_path, "rb") as wav:
+        frames_per_chunk = max(1, wav.getframerate() * frame_ms // 1000)
+        started = time.perf_counter()
+        sent_ms = 0
+        while True:
+            chunk = wav.readframes(frames_per_chunk)
+            if not chunk:
+                return
+            if realtime:
+                delay = started + sent_ms / 1000 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield chunk
+            sent_ms += frame_ms
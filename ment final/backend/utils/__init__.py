@@ -2,6 +2,8 @@ import os
 import json
 import base64
 import re
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime, timezone
 
 def sanitize_input(text):
@@ -92,6 +94,18 @@ def extract_keywords(text, max_keywords=5):
     # Return top keywords
     return [word for word, count in sorted_words[:max_keywords]]
 
+def detect_emotion(user_text, response_text):
+    """Pick the avatar emotion for a response based on the exchange"""
+    if "error" in response_text.lower() or "sorry" in response_text.lower():
+        return "concerned"
+    elif any(word in user_text.lower() for word in ["how", "why", "what", "explain"]):
+        return "thoughtful"
+    elif any(word in user_text.lower() for word in ["thanks", "thank", "appreciate"]):
+        return "happy"
+    elif any(word in user_text.lower() for word in ["amazing", "wow", "cool", "awesome"]):
+        return "excited"
+    return "neutral"
+
 def parse_json_safe(text):
     """Safely parse JSON from text, even when embedded in other text"""
     if not text:
@@ -113,6 +127,83 @@ def parse_json_safe(text):
     except json.JSONDecodeError:
         return None
 
+def fan_out(executor, calls, timeout=None):
+    """Run independent calls concurrently and collect whatever finishes in time
+
+    Args:
+        executor: Executor the calls are submitted to
+        calls: Dict mapping a name to a zero-argument callable
+        timeout: Seconds each call may take, measured from submission
+
+    Returns:
+        Tuple of (results, errors) dicts keyed by call name. A call that
+        raises or misses the deadline appears in errors only.
+    """
+    futures = {name: executor.submit(func) for name, func in calls.items()}
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        remaining = None if deadline is None else max(0, deadline - time.monotonic())
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            # The worker keeps running, but the request no longer waits for it
+            future.cancel()
+            errors[name] = 'timed out'
+        except Exception as e:
+            errors[name] = str(e)
+    
+    return results, errors
+
+def read_media_request(req, field, json_fields=('settings', 'voiceSettings')):
+    """Pull a media upload and its accompanying fields out of a request
+
+    Multipart uploads give the file part's raw bytes, so nothing is
+    base64-decoded or held twice; JSON bodies give the base64 string in
+    data[field] as before.
+
+    Args:
+        req: The Flask request
+        field: Name of the file part / JSON key holding the media
+        json_fields: Form fields that carry JSON-encoded objects
+
+    Returns:
+        Tuple of (data, media, mime_type, binary). binary is True for
+        multipart uploads, so callers can answer binary clients in kind.
+    """
+    upload = req.files.get(field)
+    if upload is not None:
+        data = req.form.to_dict()
+        for name in json_fields:
+            if isinstance(data.get(name), str):
+                try:
+                    data[name] = json.loads(data[name])
+                except json.JSONDecodeError:
+                    data[name] = None
+        return data, upload.read(), upload.mimetype, True
+    
+    data = req.get_json(silent=True) or {}
+    return data, data.get(field), None, False
+
+def precompiled_response(entry, req, max_age=300):
+    """Serve a pre-serialized StaticJSON body with ETag/Last-Modified, answering 304 when the client is current"""
+    from flask import Response
+    
+    headers = dict(entry.headers)
+    headers['Cache-Control'] = f'public, max-age={max_age}'
+    
+    # If-None-Match wins over If-Modified-Since when both are sent, and uses weak comparison (RFC 9110)
+    if req.if_none_match:
+        not_modified = req.if_none_match.contains_weak(entry.etag)
+    else:
+        not_modified = req.if_modified_since is not None and req.if_modified_since >= entry.last_modified
+    
+    if not_modified:
+        return Response(status=304, headers=headers)
+    return Response(entry.body, mimetype='application/json', headers=headers)
+
 def create_response(data=None, message=None, success=True, status_code=200):
     """Create a standardized API response"""
     response = {
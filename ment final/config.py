@@ -22,6 +22,53 @@ class AIConfig:
     GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY", "")
     GOOGLE_MODEL = "gemini-1.5-pro"
     
+    # Provider rate limits (requests per minute) and circuit breaker settings
+    GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", 60))
+    OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", 60))
+    TTS_REQUESTS_PER_MINUTE = int(os.environ.get("TTS_REQUESTS_PER_MINUTE", 300))
+    PROVIDER_BURST = int(os.environ.get("PROVIDER_BURST", 10))
+    PROVIDER_FAILURE_THRESHOLD = int(os.environ.get("PROVIDER_FAILURE_THRESHOLD", 5))
+    PROVIDER_RECOVERY_TIMEOUT = float(os.environ.get("PROVIDER_RECOVERY_TIMEOUT", 30))
+    
+    # Background provider health probes (never run at startup or in requests)
+    HEALTH_PROBES_ENABLED = os.environ.get("PROVIDER_HEALTH_PROBES", "True").lower() in ("true", "1", "t")
+    HEALTH_PROBE_INTERVAL = int(os.environ.get("PROVIDER_HEALTH_PROBE_INTERVAL", 300))
+    
+    # Create the speech clients (and import google.cloud) in the background after startup
+    WARM_UP_IMPORTS = os.environ.get("WARM_UP_IMPORTS", "True").lower() in ("true", "1", "t")
+    
+    # Pooled keep-alive sessions for raw REST calls (services/http_pool.py)
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 60))
+    HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+    HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.5))
+    
+    # TTS audio cache
+    AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", "audio_cache")
+    AUDIO_CACHE_MAX_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+    
+    # Conversation history in /api/process_text prompts (services/conversation_context.py)
+    CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 600))  # summary plus recent messages
+    CONTEXT_RECENT_MESSAGES = int(os.environ.get("CONTEXT_RECENT_MESSAGES", 4))  # kept verbatim (up to the cap below)
+    CONTEXT_MESSAGE_MAX_TOKENS = int(os.environ.get("CONTEXT_MESSAGE_MAX_TOKENS", 200))
+    CONTEXT_SUMMARY_MAX_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_MAX_TOKENS", 200))
+    CONTEXT_SUMMARIZER = os.environ.get("CONTEXT_SUMMARIZER", "local")  # "local" (extractive) or "llm"
+    CONTEXT_MAX_USERS = int(os.environ.get("CONTEXT_MAX_USERS", 5000))
+    CONTEXT_MAX_TOPICS = int(os.environ.get("CONTEXT_MAX_TOPICS", 5))
+    
+    # Image OCR (services/ocr_pipeline.py)
+    OCR_WORKERS = int(os.environ.get("OCR_WORKERS", 2))  # Tesseract worker processes; 0 runs OCR in the request thread
+    OCR_PREFORK = os.environ.get("OCR_PREFORK", "True").lower() in ("true", "1", "t")  # start workers at import
+    OCR_MAX_PENDING = int(os.environ.get("OCR_MAX_PENDING", 8))  # images waiting for a worker before "busy"
+    OCR_TIMEOUT = float(os.environ.get("OCR_TIMEOUT", 30))
+    OCR_PREPROCESS = os.environ.get("OCR_PREPROCESS", "True").lower() in ("true", "1", "t")
+    OCR_MAX_SIDE = int(os.environ.get("OCR_MAX_SIDE", 1600))  # downsample photos to this many pixels on the long side
+    OCR_TESSERACT_CONFIG = os.environ.get("OCR_TESSERACT_CONFIG", "")
+    OCR_CACHE_ENTRIES = int(os.environ.get("OCR_CACHE_ENTRIES", 512))
+    OCR_PERCEPTUAL_CACHE = os.environ.get("OCR_PERCEPTUAL_CACHE", "False").lower() in ("true", "1", "t")
+    OCR_PERCEPTUAL_MAX_DISTANCE = int(os.environ.get("OCR_PERCEPTUAL_MAX_DISTANCE", 4))
+    
     # Voice settings
     TTS_VOICE = "en-US-Standard-C"
     TTS_LANGUAGE = "en-US"
@@ -0,0 +1,225 @@
+import re
+import threading
+import importlib.util
+from collections import OrderedDict
+
+from services.lazy_import import lazy_import
+
+# Exact counts when tiktoken (pulled in by llama-index) is installed, an estimate otherwise
+tiktoken = lazy_import("tiktoken")
+HAS_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+_encoding = None
+_encoding_lock = threading.Lock()
+
+# User ids the frontend sends for signed-out visitors; they share no history
+ANONYMOUS_USERS = ("", "guest", "anonymous")
+
+
+def _get_encoding():
+    """The tokenizer, or None when tiktoken is missing or can't fetch its vocabulary"""
+    global _encoding, HAS_TIKTOKEN
+    if _encoding is None and HAS_TIKTOKEN:
+        with _encoding_lock:
+            if _encoding is None and HAS_TIKTOKEN:
+                try:
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    # The vocabulary is downloaded on first use; offline hosts estimate instead
+                    print(f"Error loading tiktoken encoding, estimating token counts: {e}")
+                    HAS_TIKTOKEN = False
+    return _encoding
+
+
+def count_tokens(text):
+    """Number of model tokens in text (about four characters each without tiktoken)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens, at a word boundary, marking the cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+    else:
+        cut = text[:max_tokens * 4]
+    return cut.rsplit(" ", 1)[0].rstrip(",;:") + " ..."
+
+
+def local_summary(previous, messages, max_tokens=200):
+    """Extractive rolling summary: the first sentence of each message, oldest lines dropped first
+
+    Costs no model call, so it can run on the request path.
+    """
+    lines = previous.splitlines() if previous else []
+    for role, text in messages:
+        sentence = re.split(r"(?<=[.!?])\s+", " ".join(text.split()), maxsplit=1)[0]
+        speaker = "Student asked" if role == "user" else "Mentaura explained"
+        lines.append(f"- {speaker}: {truncate_tokens(sentence, 40)}")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationWindow:
+    """What build() selected for one prompt, and what it cost"""
+    __slots__ = ("summary", "messages", "tokens", "raw_tokens")
+
+    def __init__(self, summary, messages, tokens, raw_tokens):
+        self.summary = summary
+        self.messages = messages
+        self.tokens = tokens
+        self.raw_tokens = raw_tokens
+
+    def render(self):
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this conversation:\n{self.summary}\n")
+        if self.messages:
+            parts.append("Previous conversation:")
+            for role, text in self.messages:
+                parts.append(f"{'Student' if role == 'user' else 'Mentaura'}: {text}")
+        return "\n".join(parts) + "\n" if parts else ""
+
+
+class ConversationContext:
+    """Per-user conversation history kept under a fixed token budget
+
+    The server records every exchange, so a signed-in student's history
+    comes from here rather than from the messages the frontend re-sends
+    (those are only used for anonymous users and to seed a history the
+    server doesn't have yet, e.g. after a restart). A prompt gets the
+    rolling summary of older turns plus as many of the last
+    recent_messages messages as fit in budget_tokens, each cut to
+    message_max_tokens. Messages that fall out of the recent window are
+    folded into the summary by summarize(previous_summary, messages) in a
+    background thread, or by the local extractive summary when summarize
+    is None or fails.
+    """
+    def __init__(self, budget_tokens=600, recent_messages=4, message_max_tokens=200, summary_max_tokens=200,
+                 max_users=5000, summarize=None):
+        self.budget_tokens = budget_tokens
+        self.recent_messages = recent_messages
+        self.message_max_tokens = message_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_users = max_users
+        self.summarize = summarize
+        self._users = OrderedDict()  # user_id -> {"summary", "messages", "pending", "summarizing"}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "prompt_tokens": 0, "saved_tokens": 0, "summaries": 0, "summary_errors": 0}
+
+    def build(self, user_id, client_messages, text):
+        """Select the history for a prompt answering text; returns a ConversationWindow"""
+        client_messages = [
+            ("user" if m.get("role") == "user" else "ai", str(m.get("text", "")))
+            for m in client_messages or [] if isinstance(m, dict) and m.get("text")
+        ]
+        # What pasting the re-sent history verbatim would have cost
+        raw_tokens = sum(count_tokens(message) for _, message in client_messages)
+        # The frontend appends the question itself before sending the history
+        if client_messages and client_messages[-1] == ("user", text):
+            client_messages.pop()
+
+        summary = ""
+        messages = client_messages[-self.recent_messages:]
+        if user_id not in ANONYMOUS_USERS:
+            with self._lock:
+                state = self._users.get(user_id)
+                if state is None:
+                    state = self._new_state(user_id)
+                    state["messages"] = client_messages[-self.recent_messages:]
+                else:
+                    self._users.move_to_end(user_id)
+                summary, messages = state["summary"], list(state["messages"])
+
+        selected = []
+        used = count_tokens(summary)
+        for role, message in reversed(messages):
+            message = truncate_tokens(message, self.message_max_tokens)
+            cost = count_tokens(message)
+            if used + cost > self.budget_tokens:
+                break
+            selected.append((role, message))
+            used += cost
+        selected.reverse()
+        return ConversationWindow(summary, selected, used, raw_tokens)
+
+    def record(self, user_id, text, response_text):
+        """Remember one exchange; older messages move into the summary"""
+        if user_id in ANONYMOUS_USERS or not response_text:
+            return
+        with self._lock:
+            state = self._users.get(user_id) or self._new_state(user_id)
+            state["messages"].extend([("user", text), ("ai", response_text)])
+            overflow = len(state["messages"]) - self.recent_messages
+            if overflow > 0:
+                state["pending"].extend(state["messages"][:overflow])
+                del state["messages"][:overflow]
+            if not state["pending"] or state["summarizing"]:
+                return
+            pending, state["pending"] = state["pending"], []
+            previous = state["summary"]
+            state["summarizing"] = self.summarize is not None
+
+        if self.summarize is None:
+            self._store_summary(user_id, local_summary(previous, pending, self.summary_max_tokens))
+        else:
+            threading.Thread(target=self._summarize, args=(user_id, previous, pending), daemon=True).start()
+
+    def report(self, window, prompt_tokens, instruction_tokens_saved=0):
+        """Record one prompt's size; returns the per-request numbers for the response"""
+        saved = max(window.raw_tokens - window.tokens, 0) + instruction_tokens_saved
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["saved_tokens"] += saved
+        return {"promptTokens": prompt_tokens, "contextTokens": window.tokens, "savedTokens": saved}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["users"] = len(self._users)
+        requests = stats["requests"]
+        stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / requests) if requests else None
+        stats["avg_saved_tokens"] = round(stats["saved_tokens"] / requests) if requests else None
+        stats["token_counter"] = "tiktoken" if _get_encoding() is not None else "estimate"
+        return stats
+
+    def _new_state(self, user_id):
+        state = self._users[user_id] = {"summary": "", "messages": [], "pending": [], "summarizing": False}
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return state
+
+    def _summarize(self, user_id, previous, pending):
+        summary = None
+        try:
+            summary = self.summarize(previous, pending)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+        if summary:
+            summary = truncate_tokens(summary, self.summary_max_tokens)
+        else:
+            with self._lock:
+                self._stats["summary_errors"] += 1
+            summary = local_summary(previous, pending, self.summary_max_tokens)
+        self._store_summary(user_id, summary)
+
+    def _store_summary(self, user_id, summary):
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                return
+            state["summary"] = summary
+            state["summarizing"] = False
+            self._stats["summaries"] += 1
+            # Messages that overflowed while this summary was being written
+            if state["pending"]:
+                pending, state["pending"] = state["pending"], []
+                state["summary"] = local_summary(summary, pending, self.summary_max_tokens)
@@ -0,0 +1,333 @@
+import os
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from services.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Perceptual hash: one ink/no-ink bit per cell of a HASH_SIZE x HASH_SIZE grid
+HASH_SIZE = 64
+
+
+class OcrBusy(Exception):
+    """Raised instead of queueing when max_pending images are already waiting for OCR"""
+    def __init__(self, pending, retry_after=2):
+        super().__init__(f"OCR queue is full ({pending} images pending)")
+        self.retry_after = retry_after
+
+
+def _init_worker():
+    # N workers each running a multi-threaded Tesseract/OpenCV would oversubscribe the CPU
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    try:
+        import cv2 as worker_cv2
+        import pytesseract  # noqa: F401 - imported now so the first image doesn't pay for it
+        worker_cv2.setNumThreads(1)
+    except ImportError:
+        pass
+
+
+def preprocess_image(image_data, max_side=1600):
+    """Decode image bytes to a downsampled, binarized greyscale array for Tesseract
+
+    Decodes straight to greyscale (at 1/2, 1/4 or 1/8 scale when the photo
+    is that much larger than max_side, which JPEG decodes much faster),
+    shrinks the long side to max_side and applies an adaptive threshold so
+    uneven lighting on a phone photo doesn't wash out the text.
+    """
+    import cv2 as worker_cv2
+    import numpy as worker_np
+
+    buffer = worker_np.frombuffer(image_data, worker_np.uint8)
+    flag = worker_cv2.IMREAD_GRAYSCALE
+    long_side = max(_image_size(image_data) or (0, 0))
+    for factor, reduced in ((8, worker_cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, worker_cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                            (2, worker_cv2.IMREAD_REDUCED_GRAYSCALE_2)):
+        if long_side // factor >= max_side:
+            flag = reduced
+            break
+    img = worker_cv2.imdecode(buffer, flag)
+    if img is None:
+        raise ValueError("Could not decode image")
+
+    scale = max_side / max(img.shape)
+    if scale < 1:
+        img = worker_cv2.resize(img, None, fx=scale, fy=scale, interpolation=worker_cv2.INTER_AREA)
+    return worker_cv2.adaptiveThreshold(img, 255, worker_cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                        worker_cv2.THRESH_BINARY, 31, 15)
+
+
+def _image_size(image_data):
+    """(width, height) from the image header, or None if PIL can't read it"""
+    try:
+        import io
+        from PIL import Image
+        with Image.open(io.BytesIO(image_data)) as header:
+            return header.size
+    except Exception:
+        return None
+
+
+def ocr_image(image_data, preprocess=True, max_side=1600, tesseract_config=""):
+    """Extract text from image bytes; runs in a pool worker
+
+    Returns (text, preprocess_ms, ocr_ms). With preprocess=False the image
+    is decoded in full colour, as the app originally did.
+    """
+    import cv2 as worker_cv2
+    import numpy as worker_np
+    import pytesseract
+
+    started = time.perf_counter()
+    if preprocess:
+        img = preprocess_image(image_data, max_side)
+    else:
+        img = worker_cv2.imdecode(worker_np.frombuffer(image_data, worker_np.uint8), worker_cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Could not decode image")
+    decoded = time.perf_counter()
+    text = pytesseract.image_to_string(img, config=tesseract_config)
+    return text, (decoded - started) * 1000, (time.perf_counter() - decoded) * 1000
+
+
+def perceptual_hash(image_data):
+    """Ink-layout hash of the image as an int, or None if it can't be decoded
+
+    Decoded at 1/8 scale, normalized to a fixed size and thresholded, then
+    each cell of a HASH_SIZE x HASH_SIZE grid becomes one bit: does it
+    hold ink. The same photo re-compressed (as messaging apps and browsers
+    do) differs by a bit or two. So does the same worksheet with one more
+    answer written in, so near matches are only safe for printed material.
+    Costs a few milliseconds in the request thread (OpenCV releases the GIL).
+    """
+    img = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+    img = cv2.resize(img, (HASH_SIZE * 4, HASH_SIZE * 4), interpolation=cv2.INTER_AREA)
+    ink = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10)
+    cells = cv2.resize(ink, (HASH_SIZE, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(cells > 48).tobytes(), "big")
+
+
+class OcrPipeline:
+    """Image-to-text with a result cache in front of a bounded worker pool
+
+    Results are cached by the SHA-256 of the image bytes: the same photo
+    uploaded again, retried, or shared around a class. With perceptual=True
+    an image whose perceptual hash is within max_distance bits of a cached
+    one also counts as a hit, which catches re-compressed copies; it is off
+    by default because a worksheet with one more answer filled in looks
+    the same to the hash. Concurrent uploads of the same image share one
+    OCR run.
+
+    Misses run in a pool of `workers` processes, so decoding, OpenCV and
+    Tesseract never hold the GIL the web threads need. Processes are
+    forked, and start() should run while the app is still single-threaded;
+    where fork isn't available (Windows) a thread pool is used instead,
+    which works because OpenCV releases the GIL and pytesseract runs the
+    tesseract binary in a subprocess. workers=0 runs OCR in the calling
+    thread. At most max_pending images are queued or being read, counting
+    ones whose requests already timed out; beyond that extract_text raises
+    OcrBusy.
+    """
+    def __init__(self, workers=2, max_pending=8, timeout=30, preprocess=True, max_side=1600,
+                 tesseract_config="", cache_entries=512, perceptual=False, max_distance=4):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.preprocess = preprocess
+        self.max_side = max_side
+        self.tesseract_config = tesseract_config
+        self.cache_entries = cache_entries
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.pool_type = "inline"
+        if workers > 0:
+            self.pool_type = "process" if "fork" in multiprocessing.get_all_start_methods() else "thread"
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._cache = OrderedDict()  # sha256 -> (text, phash)
+        self._phashes = {}  # phash -> sha256
+        self._inflight = {}  # sha256 -> Future
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hits": 0, "perceptual_hits": 0, "shared": 0, "misses": 0,
+                       "rejected": 0, "errors": 0, "restarts": 0, "preprocess_ms": 0.0, "ocr_ms": 0.0}
+
+    def start(self):
+        """Create the pool and its worker processes now rather than on the first image"""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        # Workers start on demand; keep them all busy at once so every one is launched
+        for future in [executor.submit(time.sleep, 0.05) for _ in range(self.workers)]:
+            future.result()
+
+    def extract_text(self, image_data):
+        """Text in the image, from the cache or a pool worker
+
+        Raises OcrBusy when the queue is full, ValueError for bytes that
+        aren't an image and TimeoutError when OCR takes over timeout seconds.
+        """
+        if not image_data:
+            raise ValueError("Empty image")
+        key = hashlib.sha256(image_data).hexdigest()
+        with self._lock:
+            self._stats["requests"] += 1
+            text = self._lookup(key)
+            if text is not None:
+                self._stats["hits"] += 1
+                return text
+
+        phash = None
+        if self.perceptual and key not in self._inflight:
+            phash = perceptual_hash(image_data)
+            if phash is not None:
+                with self._lock:
+                    text = self._lookup_perceptual(phash)
+                    if text is not None:
+                        self._stats["perceptual_hits"] += 1
+                        self._store(key, text, phash)
+                        return text
+
+        if self.workers <= 0:
+            with self._lock:
+                self._stats["misses"] += 1
+            try:
+                result = ocr_image(image_data, self.preprocess, self.max_side, self.tesseract_config)
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise
+            return self._finish(key, phash, result)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                # The same image is already being read for another request
+                self._stats["shared"] += 1
+                shared = True
+            elif not self._slots.acquire(blocking=False):
+                self._stats["rejected"] += 1
+                raise OcrBusy(self.max_pending)
+            else:
+                self._stats["misses"] += 1
+                try:
+                    future = self._inflight[key] = self._submit(image_data)
+                except Exception:
+                    self._slots.release()
+                    raise
+                shared = False
+        if shared:
+            return self._wait(future)[0]
+        # The slot stays taken until the worker is done, even if we stop waiting for it;
+        # added outside the lock because an already finished future runs the callback here
+        future.add_done_callback(lambda done: self._release(key, done))
+        try:
+            result = self._wait(future)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        return self._finish(key, phash, result)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._cache)
+            stats["pending"] = len(self._inflight)
+        ocr_runs = stats["misses"] - stats["errors"]
+        stats["avg_preprocess_ms"] = round(stats.pop("preprocess_ms") / ocr_runs, 1) if ocr_runs > 0 else None
+        stats["avg_ocr_ms"] = round(stats.pop("ocr_ms") / ocr_runs, 1) if ocr_runs > 0 else None
+        hits = stats["hits"] + stats["perceptual_hits"] + stats["shared"]
+        stats["hit_ratio"] = round(hits / stats["requests"], 4) if stats["requests"] else 0.0
+        stats["pool"] = self.pool_type
+        stats["workers"] = self.workers
+        return stats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _new_executor(self):
+        if self.pool_type == "process":
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("fork"),
+                                       initializer=_init_worker)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _submit(self, image_data):
+        # Called with self._lock held
+        if self._executor is None:
+            self._executor = self._new_executor()
+        args = (ocr_image, image_data, self.preprocess, self.max_side, self.tesseract_config)
+        try:
+            return self._executor.submit(*args)
+        except BrokenProcessPool:
+            # A worker died (out of memory, tesseract crash); start a fresh pool
+            print("OCR worker pool broke, restarting it")
+            self._stats["restarts"] += 1
+            self._executor.shutdown(wait=False)
+            self._executor = self._new_executor()
+            return self._executor.submit(*args)
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        self._slots.release()
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise TimeoutError(f"OCR took longer than {self.timeout}s")
+
+    def _finish(self, key, phash, result):
+        text, preprocess_ms, ocr_ms = result
+        with self._lock:
+            self._stats["preprocess_ms"] += preprocess_ms
+            self._stats["ocr_ms"] += ocr_ms
+            self._store(key, text, phash)
+        return text
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        self._cache.move_to_end(key)
+        return entry[0]
+
+    def _lookup_perceptual(self, phash):
+        key = self._phashes.get(phash)
+        if key is None and self.max_distance > 0:
+            for candidate, candidate_key in self._phashes.items():
+                if bin(candidate ^ phash).count("1") <= self.max_distance:
+                    key = candidate_key
+                    break
+        return self._lookup(key) if key is not None else None
+
+    def _store(self, key, text, phash):
+        if self.cache_entries <= 0:
+            return
+        self._cache[key] = (text, phash)
+        self._cache.move_to_end(key)
+        if phash is not None:
+            self._phashes[phash] = key
+        while len(self._cache) > self.cache_entries:
+            old_key, (_, old_phash) = self._cache.popitem(last=False)
+            if old_phash is not None and self._phashes.get(old_phash) == old_key:
+                del self._phashes[old_phash]
@@ -0,0 +1,249 @@
+import time
+import threading
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of waiting when a provider can't take a call right now"""
+    def __init__(self, provider, reason, retry_after):
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{provider} unavailable ({reason}), retry after {retry_after:.0f}s")
+
+
+def is_rate_limit_error(error):
+    """Recognise 429s from the OpenAI, Gemini and Google Cloud clients"""
+    name = type(error).__name__
+    return name in ("RateLimitError", "ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def is_client_error(error):
+    """Recognise errors caused by the request itself (bad input, blocked content), not the provider
+
+    Authentication errors and timeouts aren't included: every caller would
+    hit them, so they should still open the circuit.
+    """
+    name = type(error).__name__
+    if name in ("BadRequestError", "UnprocessableEntityError", "NotFoundError", "InvalidArgument",
+                "BlockedPromptException", "StopCandidateException"):
+        return True
+    # OpenAI errors carry status_code, Google API errors the HTTP code
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available; never blocks"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def retry_after(self, tokens=1):
+        """Seconds until tokens will be available"""
+        with self._lock:
+            self._refill()
+            missing = tokens - self._tokens
+            return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker around a single provider
+
+    Consecutive failures past failure_threshold open the circuit, and a
+    provider-side 429 opens it straight away. After recovery_timeout a
+    single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_for = recovery_timeout
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self):
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self._open_for - time.monotonic())
+
+    def release_trial(self):
+        """Hand back a half-open trial slot that was granted but not used"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, open_for=None):
+        """Count a failure; open_for forces the circuit open for that many seconds"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if open_for is not None or self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._open_for = open_for if open_for is not None else self.recovery_timeout
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() >= self._opened_at + self._open_for:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+
+
+class ProviderGuard:
+    """Rate limiter plus circuit breaker shared by every caller of one provider"""
+    def __init__(self, name, rate=1.0, capacity=10, failure_threshold=5, recovery_timeout=30):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self._counts = {"calls": 0, "successes": 0, "failures": 0, "client_errors": 0, "rate_limited": 0,
+                        "rejected": 0}
+        self._lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the guard, raising ProviderUnavailable instead of sleeping"""
+        self._admit()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        """Await coroutine function func through the guard; admission never blocks the loop"""
+        self._admit()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    def call_stream(self, func, *args, **kwargs):
+        """Run func through the guard and yield from the stream it returns
+
+        Errors raised part way through the stream count against the
+        provider like errors from the call itself.
+        """
+        self._admit()
+        try:
+            for chunk in func(*args, **kwargs):
+                yield chunk
+        except GeneratorExit:
+            # The caller stopped reading; the provider was answering fine
+            self._record_success()
+            raise
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+
+    def _admit(self):
+        if not self.breaker.allow_request():
+            self._count("rejected")
+            raise ProviderUnavailable(self.name, "circuit_open", self.breaker.retry_after())
+        if not self.bucket.try_acquire():
+            # Give back the half-open trial slot we may have taken
+            self.breaker.release_trial()
+            self._count("rejected")
+            raise ProviderUnavailable(self.name, "rate_limited", self.bucket.retry_after())
+        self._count("calls")
+
+    def _record_success(self):
+        self._count("successes")
+        self.breaker.record_success()
+
+    def _record_failure(self, error):
+        if is_client_error(error):
+            # The provider answered; only this request was wrong
+            self._count("client_errors")
+            self.breaker.release_trial()
+        elif is_rate_limit_error(error):
+            self._count("rate_limited")
+            self.breaker.record_failure(open_for=self.breaker.recovery_timeout)
+        else:
+            self._count("failures")
+            self.breaker.record_failure()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        stats["state"] = self.breaker.state
+        stats["retry_after"] = round(self.breaker.retry_after(), 1)
+        stats["tokens_available"] = round(self.bucket.available(), 2)
+        return stats
+
+    def _count(self, key):
+        with self._lock:
+            self._counts[key] += 1
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name, **kwargs):
+    """Return the process-wide guard for a provider, creating it on first use"""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = ProviderGuard(name, **kwargs)
+        return _guards[name]
+
+
+def guard_stats():
+    """Return the state of every provider guard, for health/metrics endpoints"""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}